@@ -0,0 +1,154 @@
+"""
+Binary audio frames for the /ws protocol.
+
+A client that sends "binary": true next to "setup" gets the model's audio as
+binary WebSocket frames instead of base64 inside JSON text frames, and may
+send microphone audio and images the same way. Every binary frame is a
+4-byte header followed by the raw payload:
+
+    byte 0     kind: 1 = audio/pcm, 2 = image/jpeg
+    byte 1     protocol version (1)
+    bytes 2-3  sequence number, little-endian, wrapping at 65536
+
+Text, tool results and live plays stay JSON text frames, and clients that
+do not ask for binary frames keep the JSON protocol unchanged.
+"""
+import base64
+import json
+import struct
+import time
+
+from fastapi import WebSocketDisconnect
+
+HEADER = struct.Struct("<BBH")
+VERSION = 1
+KIND_PCM = 1
+KIND_JPEG = 2
+MIME_TYPES = {KIND_PCM: "audio/pcm", KIND_JPEG: "image/jpeg"}
+KINDS = {mime_type: kind for kind, mime_type in MIME_TYPES.items()}
+
+
+def pack(kind, sequence, payload):
+    return HEADER.pack(kind, VERSION, sequence & 0xFFFF) + payload
+
+
+def unpack(frame):
+    """
+    Split a binary frame into (mime_type, sequence, payload)
+    """
+    if len(frame) < HEADER.size:
+        raise ValueError(f"Binary frame of {len(frame)} bytes has no header")
+    kind, version, sequence = HEADER.unpack_from(frame)
+    if version != VERSION or kind not in MIME_TYPES:
+        raise ValueError(f"Unsupported binary frame kind {kind} version {version}")
+    return MIME_TYPES[kind], sequence, frame[HEADER.size:]
+
+
+class WireStats:
+    """
+    Media frames, payload and wire bytes and time spent encoding and
+    decoding them, per protocol. Everything runs on the event loop, so
+    there is no lock.
+    """
+
+    def __init__(self):
+        self.protocols = {
+            protocol: {
+                "sessions": 0, "frames_in": 0, "frames_out": 0,
+                "payload_bytes_in": 0, "payload_bytes_out": 0,
+                "wire_bytes_in": 0, "wire_bytes_out": 0,
+                "codec_ms": 0.0, "sequence_gaps": 0,
+            } for protocol in ("json", "binary")
+        }
+
+    def snapshot(self):
+        report = {}
+        for protocol, entry in self.protocols.items():
+            sessions = entry["sessions"] or 1
+            payload = entry["payload_bytes_in"] + entry["payload_bytes_out"]
+            wire = entry["wire_bytes_in"] + entry["wire_bytes_out"]
+            report[protocol] = {
+                **entry,
+                "codec_ms": round(entry["codec_ms"], 1),
+                "codec_ms_per_session": round(entry["codec_ms"] / sessions, 2),
+                "wire_bytes_per_session": wire // sessions,
+                "wire_overhead_ratio": round(wire / payload - 1, 3) if payload else 0.0,
+            }
+        return report
+
+
+wire_stats = WireStats()
+
+
+class AudioWire:
+    """
+    One client connection on /ws. Incoming frames of either protocol come
+    out of receive() as JSON protocol messages; media chunks of binary
+    frames carry raw bytes as data.
+    """
+
+    def __init__(self, websocket, binary=False, stats=wire_stats):
+        self.websocket = websocket
+        self.binary = binary
+        self.stats = stats.protocols["binary" if binary else "json"]
+        self.stats["sessions"] += 1
+        self.sequence_out = 0
+        self.sequence_in = None
+
+    def _count_in(self, stats, payload_bytes, wire_bytes, started):
+        stats["frames_in"] += 1
+        stats["payload_bytes_in"] += payload_bytes
+        stats["wire_bytes_in"] += wire_bytes
+        stats["codec_ms"] += (time.perf_counter() - started) * 1000
+
+    async def receive(self):
+        message = await self.websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+
+        started = time.perf_counter()
+        frame = message.get("bytes")
+        if frame is not None:
+            mime_type, sequence, payload = unpack(frame)
+            stats = wire_stats.protocols["binary"]
+            if self.sequence_in is not None and sequence != (self.sequence_in + 1) & 0xFFFF:
+                stats["sequence_gaps"] += 1
+            self.sequence_in = sequence
+            self._count_in(stats, len(payload), len(frame), started)
+            return {"realtime_input": {"media_chunks": [{"mime_type": mime_type, "data": payload}]}}
+
+        text = message["text"]
+        data = json.loads(text)
+        chunks = data.get("realtime_input", {}).get("media_chunks", [])
+        if chunks:
+            # base64 carries 3 payload bytes in every 4 characters
+            payload_bytes = sum(len(chunk.get("data", "")) * 3 // 4 for chunk in chunks)
+            self._count_in(wire_stats.protocols["json"], payload_bytes, len(text), started)
+        return data
+
+    async def send_json(self, message):
+        await self.websocket.send_text(json.dumps(message))
+
+    async def send_text(self, text):
+        """
+        Send a message that is already serialized, such as a live_play update shared by many sessions
+        """
+        await self.websocket.send_text(text)
+
+    async def send_media(self, mime_type, payload):
+        started = time.perf_counter()
+        if self.binary:
+            frame = pack(KINDS[mime_type], self.sequence_out, payload)
+            self.sequence_out += 1
+        else:
+            frame = json.dumps({"audio": base64.b64encode(payload).decode("utf-8")})
+        self.stats["codec_ms"] += (time.perf_counter() - started) * 1000
+        self.stats["frames_out"] += 1
+        self.stats["payload_bytes_out"] += len(payload)
+        # JSON frames are ASCII, so characters are bytes
+        self.stats["wire_bytes_out"] += len(frame)
+
+        if self.binary:
+            await self.websocket.send_bytes(frame)
+        else:
+            await self.websocket.send_text(frame)
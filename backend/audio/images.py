@@ -0,0 +1,176 @@
+"""
+Frame policy for camera images on /ws.
+
+Browsers send JPEG frames at whatever rate and size they capture, while
+Gemini only needs about one frame a second of a mostly static scene. Each
+session forwards at most MAX_FPS frames a second and skips frames whose
+difference hash (dHash) is within DUPLICATE_BITS of the last forwarded
+one, sending a refresh every KEYFRAME_SECONDS even if nothing changed.
+With Pillow installed, frames larger than MAX_SIDE pixels are also
+downscaled and recompressed at JPEG_QUALITY. Without it, only byte-identical
+frames count as duplicates and frames are forwarded as they came.
+"""
+import base64
+import hashlib
+import io
+import os
+import time
+
+import numpy as np
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+ENABLED = os.environ.get("AUDIO_IMAGE_POLICY", "1") == "1"
+MAX_FPS = float(os.environ.get("AUDIO_IMAGE_MAX_FPS", 1))
+DUPLICATE_BITS = int(os.environ.get("AUDIO_IMAGE_DUPLICATE_BITS", 4))
+KEYFRAME_SECONDS = float(os.environ.get("AUDIO_IMAGE_KEYFRAME_SECONDS", 10))
+MAX_SIDE = int(os.environ.get("AUDIO_IMAGE_MAX_SIDE", 768))
+JPEG_QUALITY = int(os.environ.get("AUDIO_IMAGE_JPEG_QUALITY", 70))
+
+
+def dhash(data):
+    """
+    64-bit difference hash of a JPEG: brightness gradients of a 9x8 grayscale
+    thumbnail. The JPEG is decoded at reduced size, which is much cheaper.
+    """
+    image = Image.open(io.BytesIO(data))
+    image.draft("L", (64, 64))
+    pixels = np.asarray(image.convert("L").resize((9, 8), Image.BILINEAR), dtype=np.int16)
+    bits = np.packbits(pixels[:, 1:] > pixels[:, :-1])
+    return int.from_bytes(bits.tobytes(), "big")
+
+
+def downscale(data, max_side=MAX_SIDE, quality=JPEG_QUALITY):
+    """
+    The JPEG scaled to fit max_side and recompressed, or the original bytes
+    when that is not smaller
+    """
+    image = Image.open(io.BytesIO(data))
+    if max(image.size) > max_side:
+        image.draft("RGB", (max_side, max_side))
+        image = image.convert("RGB")
+        image.thumbnail((max_side, max_side), Image.BILINEAR)
+    else:
+        image = image.convert("RGB")
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=quality, optimize=True)
+    return output.getvalue() if output.tell() < len(data) else data
+
+
+class FramePolicy:
+    """
+    Per-session image filter. filter() takes a frame (raw bytes or base64
+    text) and returns the JPEG bytes to forward, or None to skip it.
+    """
+
+    def __init__(self, max_fps=MAX_FPS, duplicate_bits=DUPLICATE_BITS, keyframe_seconds=KEYFRAME_SECONDS,
+                 max_side=MAX_SIDE):
+        self.min_interval = 1 / max_fps if max_fps > 0 else 0
+        self.duplicate_bits = duplicate_bits
+        self.keyframe_seconds = keyframe_seconds
+        self.max_side = max_side if Image is not None else 0
+        self.last_sent_at = None
+        self.last_fingerprint = None
+        self.first_at = None
+        self.last_at = None
+
+        self.frames_in = 0
+        self.frames_out = 0
+        self.rate_dropped = 0
+        self.duplicates = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.policy_ms = 0.0
+
+    def _fingerprint(self, data):
+        if Image is not None:
+            try:
+                return dhash(data)
+            except (OSError, ValueError):
+                pass
+        return hashlib.sha1(data).digest()
+
+    def _is_duplicate(self, fingerprint):
+        if self.last_fingerprint is None or type(fingerprint) is not type(self.last_fingerprint):
+            return False
+        if isinstance(fingerprint, int):
+            return bin(fingerprint ^ self.last_fingerprint).count("1") <= self.duplicate_bits
+        return fingerprint == self.last_fingerprint
+
+    def filter(self, frame, now=None):
+        started = time.perf_counter()
+        now = time.monotonic() if now is None else now
+        data = base64.b64decode(frame) if isinstance(frame, str) else frame
+        self.first_at = now if self.first_at is None else self.first_at
+        self.last_at = now
+        self.frames_in += 1
+        self.bytes_in += len(data)
+        try:
+            since_sent = None if self.last_sent_at is None else now - self.last_sent_at
+            if since_sent is not None and since_sent < self.min_interval:
+                self.rate_dropped += 1
+                return None
+
+            fingerprint = self._fingerprint(data)
+            if self._is_duplicate(fingerprint) and since_sent < self.keyframe_seconds:
+                self.duplicates += 1
+                return None
+
+            if self.max_side:
+                try:
+                    data = downscale(data, self.max_side)
+                except (OSError, ValueError):
+                    pass
+            self.last_sent_at = now
+            self.last_fingerprint = fingerprint
+            self.frames_out += 1
+            self.bytes_out += len(data)
+            return data
+        finally:
+            self.policy_ms += (time.perf_counter() - started) * 1000
+
+    def stats(self):
+        minutes = max((self.last_at or 0) - (self.first_at or 0), 1) / 60
+        return {
+            "frames_in": self.frames_in,
+            "frames_out": self.frames_out,
+            "rate_dropped": self.rate_dropped,
+            "duplicates": self.duplicates,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "frames_per_minute_in": round(self.frames_in / minutes, 1),
+            "frames_per_minute_out": round(self.frames_out / minutes, 1),
+            "bytes_per_minute_in": int(self.bytes_in / minutes),
+            "bytes_per_minute_out": int(self.bytes_out / minutes),
+            "policy_ms": round(self.policy_ms, 1),
+        }
+
+
+class ImageStats:
+    """
+    Totals of finished sessions that sent images, for /metrics
+    """
+
+    def __init__(self):
+        self.sessions = 0
+        self.totals = {}
+
+    def add(self, policy):
+        self.sessions += 1
+        for key in ("frames_in", "frames_out", "rate_dropped", "duplicates", "bytes_in", "bytes_out", "policy_ms"):
+            self.totals[key] = round(self.totals.get(key, 0) + getattr(policy, key), 1)
+
+    def snapshot(self):
+        return {
+            "enabled": ENABLED,
+            "max_fps": MAX_FPS,
+            "downscale": Image is not None and MAX_SIDE > 0,
+            "sessions": self.sessions,
+            **self.totals,
+        }
+
+
+image_stats = ImageStats()
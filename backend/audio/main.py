@@ -1,149 +1,50 @@
 import asyncio
+import copy
 import json
 import os
 import websockets
-import requests
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from google import genai
-import base64
 import uvicorn
-from datetime import datetime
 import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from mlbdata import aio, games
+from mlbdata.client import get_client
+from mlbdata.metrics import snapshot as metrics
+from mlbdata.live import MAX_TRACKED_GAMES, get_tracker
+from mlbdata.projection import TOOL_SCHEMAS, VERBOSE_DESCRIPTION, project_response
+from mlbdata.tools import URL_TOOLS, call_url_tool, call_url_tool_async
+from frames import VERSION as FRAME_VERSION, AudioWire, wire_stats
+from images import ENABLED as IMAGE_POLICY_ENABLED, FramePolicy, image_stats
+from queues import session_queues
+from vad import ENABLED as VAD_ENABLED, VoiceGate, vad_stats
 
 
 MODEL = "gemini-2.0-flash-exp"
 
-client = genai.Client(
-    api_key='',
-    http_options={'api_version': 'v1alpha'}
-)
+_genai_client = None
 
-def fetch_mlb_data(url):
-    response = requests.get(url)
-    return response.text
-
-def get_mlb_seasons(content):
-    return fetch_mlb_data(f"https://statsapi.mlb.com/api/v1/seasons/{content['season']}?sportId=1")
-
-def get_mlb_leagues(season):
-    return fetch_mlb_data(f"https://statsapi.mlb.com/api/v1/league?sportId=1&season={season['season']}")
-
-def get_mlb_teams(season):
-    return fetch_mlb_data(f"https://statsapi.mlb.com/api/v1/teams?sportId=1&season={season['season']}")
+def get_genai_client():
+    # Created on first use so importing this module has no side effects,
+    # e.g. in the season scan's spawned workers. Only called on the event loop
+    global _genai_client
+    if _genai_client is None:
+        _genai_client = genai.Client(
+            api_key='',
+            http_options={'api_version': 'v1alpha'}
+        )
+    return _genai_client
 
-def get_mlb_roster(content):
-    return fetch_mlb_data(f"https://statsapi.mlb.com/api/v1/teams/{content['team_id']}/roster/active?season={content['season']}")
-
-def extract_season(gamedate):
-    """
-    Extract the season (year) from the game date
-    Handles multiple date formats
-    """
-    date_formats = [
-        '%Y-%m-%d',  # YYYY-MM-DD
-        '%d-%m-%Y',  # DD-MM-YYYY
-        '%m-%d-%Y',  # MM-DD-YYYY
-        '%Y/%m/%d',  # YYYY/MM/DD
-        '%d/%m/%Y',  # DD/MM/YYYY
-        '%m/%d/%Y'   # MM/DD/YYYY
-    ]
-    
-    for fmt in date_formats:
-        try:
-            date_obj = datetime.strptime(gamedate, fmt)
-            return date_obj.year
-        except ValueError:
-            continue
-    
-    # If no format matches, try to extract year directly
-    try:
-        # Try extracting 4-digit year
-        year = int(''.join(filter(str.isdigit, gamedate))[:4])
-        if 1900 <= year <= datetime.now().year + 1:
-            return year
-    except (ValueError, TypeError):
-        pass
-    print(datetime.now().year)
-    # If all else fails, return current year
-    return datetime.now().year
+def fetch_mlb_data(url):
+    return get_client().fetch_text(url)
 
-def get_game_data(content):
-
-    try:
-        # Extract season and format date
-
-        season = extract_season(content['gamedate'])
-        
-        url = f"https://statsapi.mlb.com/api/v1/schedule?sportId=1&season={season}&types=regular&date={content['gamedate']}&teamIds={content['team_id']}"
-        
-        api_response = requests.get(url)
-        api_response.raise_for_status()
-        
-        data = api_response.json()
-        
-        if 'totalGames' not in data or data['totalGames'] is None:
-            return json.dumps({"error": "Invalid or missing 'totalGames' in API response."}, indent=2)
-        
-        if data['totalGames'] == 0:
-            return json.dumps({"error": "No games found for the specified date and team."}, indent=2)
-        
-        if 'dates' not in data or not data['dates']:
-            return json.dumps({"error": "Invalid or missing 'dates' in API response."}, indent=2)
-        
-        games = data['dates'][0]['games']
-        if not games:
-            return json.dumps({"error": "No games data found in API response."}, indent=2)
-        
-        gamePk = games[0]['gamePk']
-        
-        gameurl = f"https://statsapi.mlb.com/api/v1/schedule?sportId=1&season={season}&types=regular&date={content['gamedate']}&gamePk={gamePk}&hydrate=game(content(highlights(highlights)))"
-        
-        response = requests.get(gameurl)
-        response.raise_for_status()
-        data = response.json()
-        
-        if 'dates' not in data or not data['dates'] or 'games' not in data['dates'][0] or not data['dates'][0]['games']:
-            return json.dumps({"error": "Invalid or missing game data in API response."}, indent=2)
-        
-        game_data = data['dates'][0]['games'][0]
-        
-        output = {
-            "game_date": game_data.get('gameDate', 'Unknown'),
-            "status": game_data.get('status', {}).get('detailedState', 'Unknown'),
-            "teams": {
-                "away": {
-                    "name": game_data.get('teams', {}).get('away', {}).get('team', {}).get('name', 'Unknown'),
-                    "score": game_data.get('teams', {}).get('away', {}).get('score', 'Unknown')
-                },
-                "home": {
-                    "name": game_data.get('teams', {}).get('home', {}).get('team', {}).get('name', 'Unknown'),
-                    "score": game_data.get('teams', {}).get('home', {}).get('score', 'Unknown')
-                }
-            },
-            "highlights": []
-        }
-        
-        if 'content' in game_data and 'highlights' in game_data['content']:
-            highlights = game_data['content']['highlights']['highlights'].get('items', [])
-            for highlight in highlights:
-                highlight_data = {
-                    "title": highlight.get('headline', 'Unknown'),
-                    "id": highlight.get('id', 'Unknown'),
-                    "video_url": next((p['url'] for p in highlight.get('playbacks', []) if p.get('name') == 'mp4Avc'), None)
-                }
-                output['highlights'].append(highlight_data)
-        
-        return json.dumps(output, indent=2)
-    
-    except ValueError as e:
-        return json.dumps({"error": f"Date parsing error: {str(e)}"}, indent=2)
-    except requests.exceptions.RequestException as e:
-        return json.dumps({"error": f"An error occurred while fetching data: {str(e)}"}, indent=2)
-    except KeyError as e:
-        return json.dumps({"error": f"Missing expected data in API response: {str(e)}"}, indent=2)
-    except Exception as e:
-        return json.dumps({"error": f"An unexpected error occurred: {str(e)}"}, indent=2)
+def tool_json(name, content, data):
+    # Only the fields the tool declaration promises are sent to the model
+    return json.dumps(project_response(name, data, content.get('verbose')), separators=(",", ":"))
 
+def url_tool(name, content):
+    return tool_json(name, content, call_url_tool(name, content))
 
 def get_mlb_attendance(season, team_id):
     return fetch_mlb_data(f"https://statsapi.mlb.com/api/v1/attendance?teamId={team_id}&season={season}")
@@ -153,163 +54,24 @@ def get_mlb_team_roster_stats(content):
     return fetch_mlb_data(f"http://statsapi.mlb.com/api/v1/teams/{content['team']}/roster/active?hydrate=person(education,draft,stats)/")
 
 
-def get_game_highlights(content):
-
-    season = extract_season(content['gamedate'])
-    base_url = f"https://statsapi.mlb.com/api/v1/schedule?sportId=1&season={season}&types=regular&date={content['gamedate']}&teamIds={content['team_id']}&hydrate=game(content(highlights(highlights)))"
-    
-    try:
-        response = requests.get(base_url)
-        response.raise_for_status()
-        data = response.json()
-        
-        games = data['dates'][0]['games']
-        if not games:
-            return json.dumps({"error": "No games data found in API response."}, indent=2)
-        
-        gamePk = games[0]['gamePk']
-
-    except requests.RequestException as e:
-        print(f"Error fetching game data: {e}")
-        return None
-
-    base_url = f"https://statsapi.mlb.com/api/v1.1/game/{gamePk}/feed/live"
-    
-    try:
-        response = requests.get(base_url)
-        response.raise_for_status()
-        data = response.json()
-    except requests.RequestException as e:
-        print(f"Error fetching game data: {e}")
-        return None
-
-    highlights = {
-        "game_info": {
-            "gamePk": gamePk,
-            "home_team": data["gameData"]["teams"]["home"]["name"],
-            "away_team": data["gameData"]["teams"]["away"]["name"],
-            "home_score": data["liveData"]["linescore"]["teams"]["home"]["runs"],
-            "away_score": data["liveData"]["linescore"]["teams"]["away"]["runs"],
-        },
-        "key_plays": []
-    }
-
-    all_plays = data["liveData"]["plays"]["allPlays"]
-
-    for play in all_plays:
-        if is_key_play(play):
-            play_data = extract_play_data(play)
-            highlights["key_plays"].append(play_data)
-
-    return highlights
-
-def is_key_play(play):
-    event = play["result"]["event"]
-    return (event in ["Home Run", "Strikeout"] or
-            play["about"]["isScoringPlay"] or
-            "out" in event.lower())
-
-def extract_play_data(play):
-    result = play["result"]
-    about = play["about"]
-    matchup = play["matchup"]
-
-    play_data = {
-        "play_id": play["playEvents"][-1].get("playId", ""),
-        "inning": about["inning"],
-        "is_top_inning": about["isTopInning"],
-        "event": result["event"],
-        "description": result["description"],
-        "is_scoring_play": about["isScoringPlay"],
-        "batter": matchup["batter"]["fullName"],
-        "pitcher": matchup["pitcher"]["fullName"],
-        "pitch_data": extract_pitch_data(play["playEvents"][-1])
-    }
-
-    return play_data
-
-def extract_pitch_data(pitch_event):
-    if "pitchData" not in pitch_event:
-        return {}
-
-    pitch_data = pitch_event["pitchData"]
-    return {
-        "start_speed": pitch_data.get("startSpeed"),
-        "end_speed": pitch_data.get("endSpeed"),
-        "spin_rate": pitch_data.get("breaks", {}).get("spinRate"),
-        "pitch_type": pitch_event.get("details", {}).get("type", {}).get("description")
-    }
-
-def get_video_highlights(game_id):
-    url = f"https://statsapi.mlb.com/api/v1/game/{game_id}/content"
-    
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-    except requests.RequestException as e:
-        print(f"Error fetching video highlights: {e}")
-        return {}
-
-    video_urls = {}
-    for highlight in data.get("highlights", {}).get("highlights", {}).get("items", []):
-        play_id = highlight.get("guid", "")
-        video_url = next((p["url"] for p in highlight.get("playbacks", []) if p.get("name") == "mp4Avc"), None)
-        if play_id and video_url:
-            video_urls[play_id] = video_url
-
-    return video_urls
+# Game and clutch tools are shared with the web backend in mlbdata.games,
+# these only serialize their results for the Live API
+def get_game_data(content):
+    return json.dumps(games.get_game_data(content), indent=2)
 
 def get_mlb_clutch_plays(content):
-    highlights = get_game_highlights(content)
-    if not highlights:
-        return
-    gamesPk = highlights['game_info']
-    video_urls = get_video_highlights(gamesPk['gamePk'])
-
-    for play in highlights["key_plays"]:
-        play["video_url"] = video_urls.get(play["play_id"], "")
+    highlights = games.get_mlb_clutch_plays(content)
+    return highlights.to_json() if highlights else None
 
-    return json.dumps(highlights, indent=2)
+def get_season_clutch_moments(content):
+    return json.dumps(games.get_season_clutch_moments(content), separators=(",", ":"))
 
 def get_current_play(content):
-    season = extract_season(content['gamedate'])
-
-    url = f"https://statsapi.mlb.com/api/v1/schedule?sportId=1&season={season}&types=regular&date={content['gamedate']}&teamIds={content['team_id']}"
-
-    api_response = requests.get(url)
-
-    data = api_response.json()
-        
-    if 'totalGames' not in data or data['totalGames'] is None:
-        return json.dumps({"error": "Invalid or missing 'totalGames' in API response."}, indent=2)
-        
-    if data['totalGames'] == 0:
-        return json.dumps({"error": "No games found for the specified date and team."}, indent=2)
-        
-    if 'dates' not in data or not data['dates']:
-        return json.dumps({"error": "Invalid or missing 'dates' in API response."}, indent=2)
-        
-    games = data['dates'][0]['games']
-
-    if not games:
-        return json.dumps({"error": "No games data found in API response."}, indent=2)
-        
-    game_pk = games[0]['gamePk']
-
-    gameurl = f"https://statsapi.mlb.com/api/v1.1/game/{game_pk}/feed/live"
-
-    game_api_response = requests.get(gameurl)
-
-    gamedata = game_api_response.json()
-
-    currentplay = gamedata['liveData']['plays']['currentPlay']
+    return json.dumps(games.get_current_play(content), indent=2)
 
-    return json.dumps(currentplay, indent=2)
+# Projected tools take an optional "verbose" argument, left out of "required"
+verbose_prop = {"verbose": {"type": "BOOLEAN", "description": VERBOSE_DESCRIPTION}}
 
-def get_team_standings(content):
-    return fetch_mlb_data(f"https://statsapi.mlb.com/api/v1/standings?leagueId={content['league_id']}&season={content['season']}")
-    
 # Define tools (functions)
 tools = [
     {
@@ -319,7 +81,7 @@ tools = [
                 "description": func_desc,
                 "parameters": {
                     "type": "OBJECT",
-                    "properties": func_props,
+                    "properties": {**func_props, **(verbose_prop if func_name in TOOL_SCHEMAS else {})},
                     "required": list(func_props.keys())
                 }
             }
@@ -330,117 +92,493 @@ tools = [
         ("get_mlb_teams", "Retrieves all MLB teams for a season, this retrieves the team id that will be used for accessing information for games, roster,clutch plays, current plays. Call this API first for any team info that needs team_id", {"season": {"type": "STRING", "description": "Season for MLB"}}),
         ("get_mlb_roster", "Provides MLB team roster information,Retrieve the team_id from get_mlb_teams API, please do not ask the user to provide you the team_id. If you know the get_mlb_teams API then get the data proactively", {"season": {"type": "STRING", "description": "Season for MLB"}, "team_id": {"type": "STRING", "description": "Team Id for MLB"}}),
         ("get_game_data", "Retrieves information and highlights about a game. Use game date in YYYY-MM-DD format.", {"team_id": {"type": "STRING", "description": "Team Id for MLB"}, "gamedate": {"type": "STRING", "description": "Game Date for MLB game"}}),
-        ("get_mlb_clutch_plays", "Get the Clutch Plays for a MLB game. Use game date in YYYY-MM-DD format", {"team_id": {"type": "STRING", "description": "Team Id for MLB"}, "gamedate": {"type": "STRING", "description": "Game Date for MLB game"}}),
+        ("get_mlb_clutch_plays", "Get the Clutch Plays for a MLB game, ranked by win probability added and leverage index. Use game date in YYYY-MM-DD format", {"team_id": {"type": "STRING", "description": "Team Id for MLB"}, "gamedate": {"type": "STRING", "description": "Game Date for MLB game"}}),
+        ("get_season_clutch_moments", "Get the biggest clutch moments of a MLB team's whole season, ranked by win probability added and leverage index across every finished game. The first scan of a season takes a while, later calls resume from where it stopped", {"team_id": {"type": "STRING", "description": "Team Id for MLB"}, "season": {"type": "STRING", "description": "MLB season"}}),
         ("get_current_play", "Get the Current Plays for a MLB game. Use game date in YYYY-MM-DD format", {"team_id": {"type": "STRING", "description": "Team Id for MLB"}, "gamedate": {"type": "STRING", "description": "Game Date for MLB game"}}),
         ("get_team_standings", "Get the team standings based on the league id of the team", {"league_id": {"type": "STRING", "description": "League Id for MLB"}, "season": {"type": "STRING", "description": "MLB season"}}),
     ]
 ]
 
 function_handler = {
-    "get_mlb_seasons": get_mlb_seasons,
-    "get_mlb_leagues": get_mlb_leagues,
-    "get_mlb_teams": get_mlb_teams,
-    "get_mlb_roster": get_mlb_roster,
+    **{name: partial(url_tool, name) for name in (
+        "get_mlb_seasons", "get_mlb_leagues", "get_mlb_teams", "get_mlb_roster", "get_team_standings")},
     "get_game_data": get_game_data,
     "get_mlb_clutch_plays": get_mlb_clutch_plays,
+    "get_season_clutch_moments": get_season_clutch_moments,
     "get_current_play": get_current_play,
-    "get_team_standings":get_team_standings,
 }
 
+# Single Stats API calls are awaited on the event loop. The other tool functions
+# do blocking HTTP calls, so they run on a bounded thread pool instead.
+# Each session may only hold a few tool calls at a time.
+TOOL_WORKERS = int(os.environ.get("TOOL_WORKERS", 16))
+TOOL_CALLS_PER_SESSION = int(os.environ.get("TOOL_CALLS_PER_SESSION", 4))
+TOOL_CALL_TIMEOUT = float(os.environ.get("TOOL_CALL_TIMEOUT", 20))
+
+tool_executor = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="mlb-tool")
+
+async def run_tool(name, params, session_slots):
+    """
+    Run a tool in one of the session's slots. A tool on the executor keeps
+    its slot until its thread returns, even when the caller stopped waiting,
+    so a session never has more than TOOL_CALLS_PER_SESSION threads busy.
+    """
+    await session_slots.acquire()
+    if name in URL_TOOLS:
+        try:
+            # Url tools return the Stats API document, the others their text already
+            return tool_json(name, params, await call_url_tool_async(name, params))
+        finally:
+            session_slots.release()
+
+    loop = asyncio.get_running_loop()
+
+    def release_slot(_):
+        try:
+            loop.call_soon_threadsafe(session_slots.release)
+        except RuntimeError:
+            pass  # the event loop has already shut down
+
+    try:
+        future = tool_executor.submit(function_handler[name], params)
+    except BaseException:
+        session_slots.release()
+        raise
+    future.add_done_callback(release_slot)
+    return await asyncio.wrap_future(future)
+
+async def execute_function_call(function_call, session_slots):
+    """
+    Run one Gemini function call and build its function response.
+    Failures are returned as an error entry so the model still gets an
+    answer for every call id in the batch.
+    """
+    name = function_call.name
+    params = {key: value for key, value in function_call.args.items()}
+    print(params)
+
+    if name not in function_handler:
+        response = {"error": f"Unknown function: {name}"}
+    else:
+        try:
+            result = await asyncio.wait_for(run_tool(name, params, session_slots), TOOL_CALL_TIMEOUT)
+            response = {"result": result}
+        except asyncio.TimeoutError:
+            print(f"Function {name} timed out")
+            response = {"error": f"{name} did not finish within {TOOL_CALL_TIMEOUT} seconds"}
+        except asyncio.CancelledError:
+            # Answer the call anyway; if the whole batch is being cancelled,
+            # gather still raises CancelledError once every call has returned
+            print(f"Function {name} was cancelled")
+            response = {"error": f"{name} was cancelled"}
+        except Exception as e:
+            print(f"Error executing function: {e}")
+            response = {"error": f"{name} failed: {e}"}
+
+    return {
+        "name": name,
+        "response": response,
+        "id": function_call.id
+    }
+
+# Live game subscriptions: one poller per gamePk, whatever the number of fans
+LIVE_POLL_FAST = float(os.environ.get("LIVE_POLL_FAST", 3))
+LIVE_POLL_SLOW = float(os.environ.get("LIVE_POLL_SLOW", 20))
+LIVE_POLL_IDLE = float(os.environ.get("LIVE_POLL_IDLE", 60))
+LIVE_SEND_TIMEOUT = float(os.environ.get("LIVE_SEND_TIMEOUT", 5))
+LIVE_SUBSCRIPTIONS_PER_SESSION = int(os.environ.get("LIVE_SUBSCRIPTIONS_PER_SESSION", 3))
+# A poller gives up on a game after this many failed polls in a row
+LIVE_MAX_POLL_FAILURES = int(os.environ.get("LIVE_MAX_POLL_FAILURES", 5))
+# Subscribers served between yields to the event loop during a broadcast
+LIVE_FANOUT_BATCH = int(os.environ.get("LIVE_FANOUT_BATCH", 250))
+
+def summarize_live_play(play):
+    about = play.get("about", {})
+    result = play.get("result", {})
+    matchup = play.get("matchup", {})
+    return {
+        "at_bat_index": about.get("atBatIndex"),
+        "inning": about.get("inning"),
+        "is_top_inning": about.get("isTopInning"),
+        "event": result.get("event"),
+        "description": result.get("description"),
+        "is_scoring_play": about.get("isScoringPlay"),
+        "batter": matchup.get("batter", {}).get("fullName"),
+        "pitcher": matchup.get("pitcher", {}).get("fullName"),
+        "away_score": result.get("awayScore"),
+        "home_score": result.get("homeScore"),
+    }
+
+def live_game_snapshot(game_pk, seen_plays):
+    """
+    Read the tracked feed of a game and return its state, the current play
+    and the plays completed after the first seen_plays ones
+    """
+    def read(feed):
+        plays = feed["liveData"]["plays"]
+        completed = [p for p in plays.get("allPlays", []) if p.get("about", {}).get("isComplete")]
+        status = feed["gameData"]["status"]
+        current_play = plays.get("currentPlay", {})
+        return {
+            "state": status.get("abstractGameState"),
+            "detailed_state": status.get("detailedState", ""),
+            "inning_state": feed["liveData"].get("linescore", {}).get("inningState", ""),
+            "current_play": copy.deepcopy(current_play),
+            "current_key": (current_play.get("about", {}).get("atBatIndex"), len(current_play.get("playEvents", []))),
+            "new_plays": [summarize_live_play(p) for p in completed[seen_plays:]],
+            "completed_plays": len(completed),
+        }
+
+    return get_tracker(game_pk).read(read)
+
+def next_poll_interval(snapshot):
+    """
+    Poll quickly during at-bats, slowly between innings, in delays and before the game
+    """
+    detailed_state = snapshot["detailed_state"]
+    if snapshot["state"] == "Preview":
+        return LIVE_POLL_IDLE
+    if "Delay" in detailed_state or "Suspended" in detailed_state:
+        return LIVE_POLL_IDLE
+    if snapshot["inning_state"] in ("Middle", "End"):
+        return LIVE_POLL_SLOW
+    return LIVE_POLL_FAST
+
+def parse_game_pk(value):
+    """
+    gamePk from a client message, or None when it is not a positive integer
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if not isinstance(value, int) or not 0 < value < 2 ** 31:
+        return None
+    return value
+
+def is_unknown_game(error):
+    response = getattr(error, "response", None)
+    return response is not None and response.status_code == 404
+
+class GameSubscriptions:
+    """
+    Shares one background poller per live gamePk between all subscribed
+    sessions and pushes every new play to each of them. A subscriber is a
+    session's downstream queue, so updates are written to the socket in
+    order with everything else the session sends.
+    """
+
+    def __init__(self):
+        self.subscribers = {}
+        self.pollers = {}
+        self.last_message = {}
+        self.messages_sent = 0
+        self.send_failures = 0
+        self.rejected = 0
+
+    def games_of(self, subscriber):
+        return [game_pk for game_pk, subscribers in self.subscribers.items() if subscriber in subscribers]
+
+    async def subscribe(self, value, subscriber):
+        """
+        Subscribe to a game by the id a client sent. Invalid ids and
+        subscriptions over the limits are answered with an error message.
+        """
+        game_pk = parse_game_pk(value)
+        if game_pk is None:
+            error = "gamePk must be a positive integer"
+        elif subscriber not in self.subscribers.get(game_pk, ()) and \
+                len(self.games_of(subscriber)) >= LIVE_SUBSCRIPTIONS_PER_SESSION:
+            error = f"At most {LIVE_SUBSCRIPTIONS_PER_SESSION} games can be followed at once"
+        elif game_pk not in self.pollers and len(self.pollers) >= MAX_TRACKED_GAMES:
+            error = "Too many live games are being followed, try again later"
+        else:
+            error = None
+        if error is not None:
+            self.rejected += 1
+            await self._send(subscriber, json.dumps({"live_play": {"gamePk": value, "error": error}}, default=str))
+            return
+
+        self.subscribers.setdefault(game_pk, set()).add(subscriber)
+        if game_pk not in self.pollers:
+            self.pollers[game_pk] = asyncio.create_task(self._poll(game_pk))
+        elif game_pk in self.last_message:
+            await self._send(subscriber, self.last_message[game_pk])
+        print(f"Subscribed to game {game_pk}, {len(self.subscribers[game_pk])} subscribers")
+
+    async def subscribe_to_team_game(self, content, subscriber):
+        loop = asyncio.get_running_loop()
+        try:
+            game_pk = await loop.run_in_executor(tool_executor, games.find_game_pk, content)
+        except Exception as e:
+            print(f"Could not resolve game for subscription: {e}")
+            return
+        if game_pk is not None:
+            await self.subscribe(game_pk, subscriber)
+
+    def unsubscribe(self, value, subscriber):
+        game_pk = parse_game_pk(value)
+        subscribers = self.subscribers.get(game_pk)
+        if subscribers is None:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            self._stop(game_pk)
+
+    def unsubscribe_all(self, subscriber):
+        for game_pk in self.games_of(subscriber):
+            self.unsubscribe(game_pk, subscriber)
+
+    def _stop(self, game_pk):
+        self.subscribers.pop(game_pk, None)
+        self.last_message.pop(game_pk, None)
+        poller = self.pollers.pop(game_pk, None)
+        if poller is not None and poller is not asyncio.current_task():
+            poller.cancel()
+
+    async def _poll(self, game_pk):
+        loop = asyncio.get_running_loop()
+        seen_plays = None
+        last_key = None
+        failures = 0
+        try:
+            while self.subscribers.get(game_pk):
+                try:
+                    snapshot = await loop.run_in_executor(
+                        tool_executor, live_game_snapshot, game_pk, seen_plays or 0
+                    )
+                    failures = 0
+                except Exception as e:
+                    failures += 1
+                    print(f"Polling game {game_pk} failed: {e}")
+                    if is_unknown_game(e) or failures >= LIVE_MAX_POLL_FAILURES:
+                        error = "Unknown game" if is_unknown_game(e) else "The game feed is unavailable"
+                        await self._broadcast(game_pk, json.dumps({"live_play": {"gamePk": game_pk, "error": error}}))
+                        break
+                    await asyncio.sleep(LIVE_POLL_SLOW)
+                    continue
+
+                if seen_plays is None:
+                    # Subscribers start from the current play, not the whole game log
+                    snapshot["new_plays"] = []
+                seen_plays = snapshot.pop("completed_plays")
+                key = snapshot.pop("current_key")
+
+                if snapshot["new_plays"] or key != last_key or snapshot["state"] == "Final":
+                    last_key = key
+                    message = json.dumps({"live_play": {"gamePk": game_pk, **snapshot}})
+                    self.last_message[game_pk] = message
+                    await self._broadcast(game_pk, message)
+
+                if snapshot["state"] == "Final":
+                    break
+                await asyncio.sleep(next_poll_interval(snapshot))
+        finally:
+            if self.pollers.get(game_pk) is asyncio.current_task():
+                self._stop(game_pk)
+
+    async def _send(self, subscriber, message):
+        try:
+            await asyncio.wait_for(subscriber.put(message), LIVE_SEND_TIMEOUT)
+            self.messages_sent += 1
+            return True
+        except asyncio.TimeoutError:
+            self.send_failures += 1
+            return False
+
+    async def _broadcast(self, game_pk, message):
+        """
+        Queue message for every subscriber of a game. A queue with room takes
+        it at once, which is much cheaper inline than as a task with its own
+        timeout; only full queues are waited on, up to LIVE_SEND_TIMEOUT, and
+        dropped when that runs out.
+        """
+        subscribers = list(self.subscribers.get(game_pk, ()))
+        full = []
+        for number, subscriber in enumerate(subscribers, 1):
+            if subscriber.full():
+                full.append(subscriber)
+            else:
+                await subscriber.put(message)
+                self.messages_sent += 1
+            if number % LIVE_FANOUT_BATCH == 0:
+                # Keep serving audio during a large fan-out
+                await asyncio.sleep(0)
+        delivered = await asyncio.gather(*(self._send(subscriber, message) for subscriber in full))
+        for subscriber, ok in zip(full, delivered):
+            if not ok:
+                self.unsubscribe(game_pk, subscriber)
+
+    def stats(self):
+        return {
+            "live_games": len(self.pollers),
+            "subscribers": sum(len(s) for s in self.subscribers.values()),
+            "messages_sent": self.messages_sent,
+            "send_failures": self.send_failures,
+            "rejected": self.rejected,
+        }
+
+game_subscriptions = GameSubscriptions()
+
 app = FastAPI()
 
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
 
+@app.get("/metrics")
+async def metrics_snapshot():
+    return {**metrics(), "async_stats_api": aio.stats(), "game_subscriptions": game_subscriptions.stats(),
+            "audio_wire": wire_stats.snapshot(), "vad": vad_stats.snapshot(), "images": image_stats.snapshot(),
+            "session_queues": session_queues.stats()}
+
+@app.on_event("shutdown")
+async def close_stats_api():
+    await aio.close_async_client()
+
 
 @app.websocket("/ws")
 async def gemini_session_handler(websocket: WebSocket):
     await websocket.accept()
+    # Silence is dropped before it reaches Gemini when AUDIO_VAD=1
+    voice_gate = VoiceGate() if VAD_ENABLED else None
+    # Camera frames are rate limited, deduplicated and downscaled unless AUDIO_IMAGE_POLICY=0
+    frame_policy = FramePolicy() if IMAGE_POLICY_ENABLED else None
     try:
         config_message = await websocket.receive_text()
         config_data = json.loads(config_message)
         config = config_data.get("setup", {})
+        wire = AudioWire(websocket, binary=bool(config_data.get("binary")))
+        if wire.binary:
+            await wire.send_json({"protocol": {"binary": True, "version": FRAME_VERSION}})
         
         config["tools"] = tools
         
-        async with client.aio.live.connect(model=MODEL, config=config) as session:
+        async with get_genai_client().aio.live.connect(model=MODEL, config=config) as session:
             print("Connected to Gemini API")
+            tool_slots = asyncio.Semaphore(TOOL_CALLS_PER_SESSION)
 
-            async def send_to_gemini():
+            # Bounded queues decouple the socket from the Gemini session in both directions
+            queue_id, upstream, downstream = session_queues.create()
+            # Live game subscriptions started by tool calls, cancelled with the session
+            subscribing = set()
+
+            async def read_from_client():
                 try:
                     while True:
-                        message = await websocket.receive_text()
-                        data = json.loads(message)
-                        
+                        try:
+                            data = await wire.receive()
+                        except ValueError as e:
+                            print(f"Dropping malformed frame: {e}")
+                            continue
+
+                        if "subscribe_game" in data:
+                            await game_subscriptions.subscribe(data["subscribe_game"], downstream)
+                        elif "unsubscribe_game" in data:
+                            game_subscriptions.unsubscribe(data["unsubscribe_game"], downstream)
+
                         if "realtime_input" in data:
                             for chunk in data["realtime_input"]["media_chunks"]:
+                                # data is base64 text from JSON frames and raw bytes from binary ones,
+                                # the Live API client accepts both
                                 if chunk["mime_type"] == "audio/pcm":
-                                    await session.send({"mime_type": "audio/pcm", "data": chunk["data"]})
+                                    pcm = voice_gate.filter(chunk["data"]) if voice_gate else chunk["data"]
+                                    if pcm:
+                                        await upstream.put({"mime_type": "audio/pcm", "data": pcm}, media=True)
                                 elif chunk["mime_type"] == "image/jpeg":
-                                    await session.send({"mime_type": "image/jpeg", "data": chunk["data"]})
+                                    image = chunk["data"]
+                                    if frame_policy:
+                                        # JPEG decoding would stall the event loop, so it runs on a thread
+                                        image = await asyncio.get_running_loop().run_in_executor(
+                                            None, frame_policy.filter, image)
+                                    if image:
+                                        await upstream.put({"mime_type": "image/jpeg", "data": image}, media=True)
                 except WebSocketDisconnect:
                     print("Client connection closed (send)")
 
+            async def send_to_gemini():
+                while True:
+                    await session.send(await upstream.get())
+
             async def receive_from_gemini():
+                while True:
+                    async for response in session.receive():
+                        if response.server_content is None:
+                            if response.tool_call is not None:
+                                print(f"Tool call received: {response.tool_call}")
+                                function_calls = response.tool_call.function_calls
+                                function_responses = list(await asyncio.gather(*(
+                                    execute_function_call(function_call, tool_slots)
+                                    for function_call in function_calls
+                                )))
+                                await downstream.put({"text": json.dumps(function_responses)})
+                                print("Function executed")
+
+                                # Keep pushing plays of a game the fan asked about
+                                for function_call, function_response in zip(function_calls, function_responses):
+                                    if function_call.name == "get_current_play" and "result" in function_response["response"]:
+                                        task = asyncio.create_task(game_subscriptions.subscribe_to_team_game(
+                                            dict(function_call.args), downstream
+                                        ))
+                                        subscribing.add(task)
+                                        task.add_done_callback(subscribing.discard)
+
+                                await session.send(function_responses)
+                                continue
+
+                        model_turn = response.server_content.model_turn
+                        if model_turn:
+                            for part in model_turn.parts:
+                                if hasattr(part, 'text') and part.text is not None:
+                                    await downstream.put({"text": part.text})
+                                elif hasattr(part, 'inline_data') and part.inline_data is not None:
+                                    await downstream.put(part.inline_data.data, media=True)
+
+                        if response.server_content.turn_complete:
+                            print('\n<Turn complete>')
+
+            async def write_to_client():
                 try:
                     while True:
-                        async for response in session.receive():
-                            if response.server_content is None:
-                                if response.tool_call is not None:
-                                    print(f"Tool call received: {response.tool_call}")
-                                    function_calls = response.tool_call.function_calls
-                                    function_responses = []
-
-                                    for function_call in function_calls:
-                                        name = function_call.name
-                                        args = function_call.args
-                                        call_id = function_call.id
-                                        params = {key: value for key, value in args.items()}
-                                        print(params)
-                                        
-                                        if name in function_handler:
-                                            try:
-                                                result = function_handler[name](params)
-                                                function_responses.append({
-                                                    "name": name,
-                                                    "response": {"result": result},
-                                                    "id": call_id  
-                                                })
-                                               
-                                                await websocket.send_text(json.dumps({"text": json.dumps(function_responses)}))
-                                                print("Function executed")
-                                            except Exception as e:
-                                                print(f"Error executing function: {e}")
-                                                continue
-
-                                    await session.send(function_responses)
-                                    continue
-
-                            model_turn = response.server_content.model_turn
-                            if model_turn:
-                                for part in model_turn.parts:
-                                    if hasattr(part, 'text') and part.text is not None:
-                                        await websocket.send_text(json.dumps({"text": part.text}))
-                                    elif hasattr(part, 'inline_data') and part.inline_data is not None:
-                                        base64_audio = base64.b64encode(part.inline_data.data).decode('utf-8')
-                                        await websocket.send_text(json.dumps({
-                                            "audio": base64_audio,
-                                        }))
-                                        print("audio received")
-
-                            if response.server_content.turn_complete:
-                                print('\n<Turn complete>')
+                        item = await downstream.get()
+                        if isinstance(item, bytes):
+                            await wire.send_media("audio/pcm", item)
+                        elif isinstance(item, str):
+                            await wire.send_text(item)
+                        else:
+                            await wire.send_json(item)
                 except WebSocketDisconnect:
                     print("Client connection closed (receive)")
 
-            await asyncio.gather(send_to_gemini(), receive_from_gemini())
+            # The session ends when any side stops: the client leaves or Gemini closes
+            tasks = [asyncio.create_task(coro) for coro in (
+                read_from_client(), send_to_gemini(), receive_from_gemini(), write_to_client())]
+            try:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                pending = tasks + list(subscribing)
+                for task in pending:
+                    task.cancel()
+                try:
+                    # Let the cancelled tasks unwind before their queues and subscriptions go away
+                    await asyncio.gather(*pending, return_exceptions=True)
+                finally:
+                    game_subscriptions.unsubscribe_all(downstream)
+                    session_queues.close(queue_id)
+            for task in done:
+                task.result()
 
     except WebSocketDisconnect:
         print("WebSocket disconnected")
     except Exception as e:
         print(f"Error in Gemini session: {e}")
     finally:
+        if voice_gate:
+            vad_stats.add(voice_gate)
+            print(f"VAD: {voice_gate.stats()}")
+        if frame_policy and frame_policy.frames_in:
+            image_stats.add(frame_policy)
+            print(f"Images: {frame_policy.stats()}")
         print("Gemini session closed.")
 
 if __name__ == "__main__":
@@ -0,0 +1,112 @@
+"""
+Bounded queues between the /ws socket and the Gemini session.
+
+Each session has an upstream queue (client to Gemini) and a downstream
+queue (Gemini to client). Media items are dropped oldest-first once
+max_media of them wait, so a stalled peer costs a bounded amount of
+memory and the audio that gets through is the most recent. Everything
+else (text, tool results) is never dropped; put() waits instead once
+max_messages of those are queued, which pushes back on the producer.
+"""
+import asyncio
+import itertools
+import os
+from collections import deque
+
+UPSTREAM_MAX_MEDIA = int(os.environ.get("AUDIO_UPSTREAM_MAX_MEDIA", 50))
+DOWNSTREAM_MAX_MEDIA = int(os.environ.get("AUDIO_DOWNSTREAM_MAX_MEDIA", 100))
+MAX_MESSAGES = int(os.environ.get("AUDIO_QUEUE_MAX_MESSAGES", 64))
+
+
+class MediaQueue:
+    def __init__(self, max_media, max_messages=MAX_MESSAGES):
+        self.max_media = max_media
+        self.max_messages = max_messages
+        self._items = deque()
+        self._changed = asyncio.Condition()
+        self.media = 0
+        self.messages = 0
+        self.peak = 0
+        self.dropped = 0
+        self.blocked = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def full(self):
+        """
+        True when put() of a message (not media) would wait
+        """
+        return self.messages >= self.max_messages
+
+    def _drop_oldest_media(self):
+        for index, (is_media, _) in enumerate(self._items):
+            if is_media:
+                del self._items[index]
+                self.media -= 1
+                self.dropped += 1
+                return
+
+    async def put(self, item, media=False):
+        async with self._changed:
+            if media:
+                if self.media >= self.max_media:
+                    self._drop_oldest_media()
+                self.media += 1
+            else:
+                if self.messages >= self.max_messages:
+                    self.blocked += 1
+                    await self._changed.wait_for(lambda: self.messages < self.max_messages)
+                self.messages += 1
+            self._items.append((media, item))
+            self.peak = max(self.peak, len(self._items))
+            self._changed.notify_all()
+
+    async def get(self):
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._items)
+            media, item = self._items.popleft()
+            if media:
+                self.media -= 1
+            else:
+                self.messages -= 1
+            self._changed.notify_all()
+            return item
+
+    def stats(self):
+        return {"depth": len(self._items), "peak": self.peak, "dropped": self.dropped, "blocked": self.blocked}
+
+
+class SessionQueues:
+    """
+    Upstream and downstream queues of the open sessions, for /metrics
+    """
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self.open = {}
+        self.closed = {"sessions": 0, "upstream_dropped": 0, "downstream_dropped": 0}
+
+    def create(self):
+        session_id = next(self._ids)
+        upstream, downstream = MediaQueue(UPSTREAM_MAX_MEDIA), MediaQueue(DOWNSTREAM_MAX_MEDIA)
+        self.open[session_id] = (upstream, downstream)
+        return session_id, upstream, downstream
+
+    def close(self, session_id):
+        upstream, downstream = self.open.pop(session_id)
+        self.closed["sessions"] += 1
+        self.closed["upstream_dropped"] += upstream.dropped
+        self.closed["downstream_dropped"] += downstream.dropped
+
+    def stats(self):
+        return {
+            "limits": {"upstream_media": UPSTREAM_MAX_MEDIA, "downstream_media": DOWNSTREAM_MAX_MEDIA,
+                       "messages": MAX_MESSAGES},
+            "open": [{"session": session_id, "upstream": upstream.stats(), "downstream": downstream.stats()}
+                     for session_id, (upstream, downstream) in self.open.items()],
+            "closed": self.closed,
+        }
+
+
+session_queues = SessionQueues()
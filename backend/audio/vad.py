@@ -0,0 +1,197 @@
+"""
+Voice activity detection for microphone audio on /ws.
+
+Each chunk of 16 kHz PCM16 is cut into 20 ms frames and classified with
+NumPy: a frame is speech when its RMS energy clears a threshold that
+follows the noise floor, or when it is a little quieter but crosses zero
+often (unvoiced consonants such as "s" and "f") and still stands out from
+the noise floor, which steady hiss does not. Speech is forwarded with
+PRE_ROLL_MS of audio before it, so onsets are not clipped, and HANGOVER_MS
+after it, so Gemini still hears the pause that ends a turn. Longer silence
+is dropped, or thinned to one frame in THIN_EVERY when that is set.
+"""
+import base64
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+ENABLED = os.environ.get("AUDIO_VAD", "0") == "1"
+SAMPLE_RATE = int(os.environ.get("AUDIO_VAD_SAMPLE_RATE", 16000))
+FRAME_MS = 20
+THRESHOLD_DBFS = float(os.environ.get("AUDIO_VAD_THRESHOLD_DBFS", -45))
+NOISE_MARGIN_DB = float(os.environ.get("AUDIO_VAD_NOISE_MARGIN_DB", 10))
+PRE_ROLL_MS = int(os.environ.get("AUDIO_VAD_PRE_ROLL_MS", 300))
+HANGOVER_MS = int(os.environ.get("AUDIO_VAD_HANGOVER_MS", 800))
+THIN_EVERY = int(os.environ.get("AUDIO_VAD_THIN_EVERY", 0))
+
+# Share of sample pairs that cross zero in unvoiced speech, how far below
+# the threshold such frames may be and how far above the noise floor they must be
+UNVOICED_ZCR = 0.25
+UNVOICED_MARGIN_DB = 10
+UNVOICED_FLOOR_DB = 6
+# Most the noise floor rises per frame: on frames below the threshold, and
+# more slowly when every frame clears it, so steady noise louder than the
+# threshold is learned in seconds while a long sentence lifts it a few dB
+FLOOR_RISE_DB = 0.5
+FLOOR_CREEP_DB = 0.05
+# Gemini bills audio input at about 32 tokens per second
+TOKENS_PER_SECOND = 32
+
+FULL_SCALE = 32768.0
+
+
+def _ratio(db):
+    return 10 ** (db / 20)
+
+
+class VoiceGate:
+    """
+    Per-session VAD state. filter() takes a chunk (raw bytes or base64 text)
+    and returns the PCM bytes to forward, which may be empty.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, pre_roll_ms=PRE_ROLL_MS, hangover_ms=HANGOVER_MS,
+                 thin_every=THIN_EVERY, threshold_dbfs=THRESHOLD_DBFS):
+        self.frame_samples = sample_rate * FRAME_MS // 1000
+        self.frame_bytes = self.frame_samples * 2
+        self.pre_roll = pre_roll_ms // FRAME_MS
+        self.hangover = hangover_ms // FRAME_MS
+        self.thin_every = thin_every
+        self.min_threshold = FULL_SCALE * _ratio(threshold_dbfs)
+        self.noise_floor = self.min_threshold / _ratio(NOISE_MARGIN_DB)
+        self.since_voice = 1 << 30
+        self.silent_run = 0
+        self.remainder = b""
+        self.dropped_tail = deque(maxlen=self.pre_roll)
+
+        self.frames_in = 0
+        self.frames_out = 0
+        self.voiced_frames = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.vad_ms = 0.0
+
+    def threshold(self):
+        return max(self.min_threshold, self.noise_floor * _ratio(NOISE_MARGIN_DB))
+
+    def classify(self, frames):
+        """
+        Speech mask for an (n, frame_samples) array of int16 frames
+        """
+        samples = frames.astype(np.float32)
+        rms = np.sqrt(np.mean(samples * samples, axis=1))
+        signs = np.signbit(samples)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+        threshold = self.threshold()
+        unvoiced = max(threshold / _ratio(UNVOICED_MARGIN_DB), self.noise_floor * _ratio(UNVOICED_FLOOR_DB))
+        voiced = (rms >= threshold) | ((rms >= unvoiced) & (zcr >= UNVOICED_ZCR))
+
+        # Follow the noise floor so a noisy room does not count as speech. Frames
+        # below the threshold are used even when they cross zero as often as
+        # unvoiced speech, or white noise would never be learned
+        quiet = rms < threshold
+        if quiet.any():
+            target, rise_db = float(np.median(rms[quiet])), FLOOR_RISE_DB
+        else:
+            target, rise_db = float(rms.min()), FLOOR_CREEP_DB
+        self.noise_floor = min(target, self.noise_floor * _ratio(rise_db * len(rms)))
+        return voiced
+
+    def keep_mask(self, voiced):
+        """
+        Frames to forward: speech, HANGOVER_MS after it (carried across
+        chunks) and PRE_ROLL_MS before it
+        """
+        n = len(voiced)
+        index = np.arange(n)
+        last_voice = np.maximum.accumulate(np.where(voiced, index, -1 - self.since_voice))
+        since_voice = index - last_voice
+        keep = since_voice <= self.hangover
+
+        next_voice = np.minimum.accumulate(np.where(voiced, index, n + self.pre_roll)[::-1])[::-1]
+        keep |= next_voice - index <= self.pre_roll
+
+        self.since_voice = min(int(since_voice[-1]), 1 << 30)
+        return keep
+
+    def filter(self, chunk):
+        started = time.perf_counter()
+        data = base64.b64decode(chunk) if isinstance(chunk, str) else chunk
+        self.bytes_in += len(data)
+        data = self.remainder + data
+        n = len(data) // self.frame_bytes
+        self.remainder = data[n * self.frame_bytes:]
+        if n == 0:
+            return b""
+
+        frames = np.frombuffer(data, dtype="<i2", count=n * self.frame_samples).reshape(n, self.frame_samples)
+        voiced = self.classify(frames)
+        keep = self.keep_mask(voiced)
+
+        if self.thin_every:
+            # Forward one frame in every thin_every of long silence
+            silent = np.cumsum(~keep) + self.silent_run
+            keep |= ~keep & (silent % self.thin_every == 0)
+            self.silent_run = int(silent[-1])
+
+        out = []
+        first_voice = int(np.argmax(voiced)) if voiced.any() else None
+        if first_voice is not None and first_voice < self.pre_roll and self.dropped_tail:
+            # The pre-roll starts in the previous chunk
+            out.extend(list(self.dropped_tail)[-(self.pre_roll - first_voice):])
+        kept = np.flatnonzero(keep)
+        out.extend(data[i * self.frame_bytes:(i + 1) * self.frame_bytes] for i in kept)
+
+        tail_start = int(kept[-1]) + 1 if len(kept) else 0
+        if len(kept):
+            self.dropped_tail.clear()
+        for i in range(max(tail_start, n - self.pre_roll), n):
+            self.dropped_tail.append(data[i * self.frame_bytes:(i + 1) * self.frame_bytes])
+
+        forwarded = b"".join(out)
+        self.frames_in += n
+        self.frames_out += len(forwarded) // self.frame_bytes
+        self.voiced_frames += int(voiced.sum())
+        self.bytes_out += len(forwarded)
+        self.vad_ms += (time.perf_counter() - started) * 1000
+        return forwarded
+
+    def stats(self):
+        frame_seconds = FRAME_MS / 1000
+        seconds_in = self.frames_in * frame_seconds
+        seconds_out = self.frames_out * frame_seconds
+        return {
+            "frames_in": self.frames_in,
+            "frames_out": self.frames_out,
+            "voiced_frames": self.voiced_frames,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": self.bytes_in - self.bytes_out,
+            "audio_seconds_saved": round(seconds_in - seconds_out, 1),
+            "tokens_saved_est": int((seconds_in - seconds_out) * TOKENS_PER_SECOND),
+            "vad_ms": round(self.vad_ms, 1),
+        }
+
+
+class VadStats:
+    """
+    Totals of finished sessions, for /metrics
+    """
+
+    def __init__(self):
+        self.sessions = 0
+        self.totals = {}
+
+    def add(self, gate):
+        self.sessions += 1
+        for key, value in gate.stats().items():
+            self.totals[key] = round(self.totals.get(key, 0) + value, 1)
+
+    def snapshot(self):
+        return {"enabled": ENABLED, "thin_every": THIN_EVERY, "sessions": self.sessions, **self.totals}
+
+
+vad_stats = VadStats()
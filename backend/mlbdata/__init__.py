@@ -0,0 +1,7 @@
+"""
+Shared MLB Stats API data access for the audio, web and video backends.
+
+Import the modules directly (mlbdata.client, mlbdata.metrics, ...): the
+package itself imports nothing, so a backend that needs one module does not
+pull in numpy and the clutch tables with the rest.
+"""
@@ -0,0 +1,110 @@
+"""
+asyncio counterpart of StatsApiClient for ASGI apps.
+
+Requests run on one pooled httpx.AsyncClient, so a worker can wait on many
+slow upstream calls without a thread for each. The TTL cache is shared
+with the blocking client, so reference data fetched by either is served
+to both.
+"""
+import asyncio
+import json
+import logging
+import os
+
+import httpx
+
+from mlbdata.cache import reference_ttl
+from mlbdata.client import CONNECT_TIMEOUT, MAX_RETRIES, POOL_MAXSIZE, READ_TIMEOUT, get_client
+from mlbdata.singleflight import AsyncSingleFlight, normalize_url
+
+logger = logging.getLogger(__name__)
+
+# Connections are cheap without a thread behind each, so the async pool is larger
+MAX_CONNECTIONS = int(os.environ.get("MLB_ASYNC_MAX_CONNECTIONS", 100))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_BACKOFF = 0.2
+
+
+class AsyncStatsApiClient:
+    def __init__(self, max_connections=MAX_CONNECTIONS, max_keepalive=POOL_MAXSIZE, retries=MAX_RETRIES):
+        self.retries = retries
+        self.cache = get_client().cache
+        self.flights = AsyncSingleFlight()
+        # httpcore rescans every queued request against every connection each
+        # time one is added or released, so under load requests beyond the
+        # pool wait here instead of queueing inside it
+        self.slots = asyncio.Semaphore(max_connections)
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive),
+            headers={"Accept": "application/json", "Accept-Encoding": "gzip, deflate"},
+        )
+
+    async def get(self, url, **kwargs):
+        """
+        GET with the same retry policy as the blocking client: 429 and 5xx
+        responses and connection errors are retried with exponential backoff
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.slots:
+                    response = await self.client.get(url, **kwargs)
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    return response
+                retry_after = response.headers.get("Retry-After", "")
+                delay = float(retry_after) if retry_after.isdigit() else RETRY_BACKOFF * (2 ** attempt)
+            except httpx.TransportError:
+                if attempt == self.retries:
+                    raise
+                delay = RETRY_BACKOFF * (2 ** attempt)
+            await asyncio.sleep(delay)
+
+    async def fetch_text(self, url):
+        """
+        Async fetch_text: cached reference data, single flight per url
+        """
+        key = normalize_url(url)
+        ttl = reference_ttl(url)
+        if ttl is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        async def fetch():
+            response = await self.get(url)
+            response.raise_for_status()
+            if ttl is not None:
+                self.cache.set(key, response.text, ttl, size=len(response.content))
+            return response.text
+
+        return await self.flights.do(key, fetch)
+
+    async def fetch_json(self, url):
+        return json.loads(await self.fetch_text(url))
+
+    async def close(self):
+        await self.client.aclose()
+
+
+_clients = {}
+
+
+def get_async_client():
+    """
+    Return the AsyncStatsApiClient of the running event loop
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _clients[loop] = AsyncStatsApiClient()
+    return client
+
+
+async def close_async_client():
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+
+def stats():
+    return {"clients": len(_clients), "coalescing": [c.flights.stats() for c in _clients.values()]}
@@ -0,0 +1,230 @@
+"""
+On-disk archive of completed games.
+
+Final games do not change, so their projected plays, linescore, highlight
+metadata and past seasons' schedules are written to SQLite the first time
+they are fetched and read from there afterwards. Rows are zlib-compressed
+JSON keyed by gamePk (or season).
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import date
+
+from mlbdata.client import STATS_API_BASE, get_client
+from mlbdata.feed import stream_feed_plays
+
+logger = logging.getLogger(__name__)
+
+# An empty path disables the archive
+ARCHIVE_PATH = os.environ.get("MLB_ARCHIVE_PATH", "mlb_archive.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    game_pk INTEGER PRIMARY KEY,
+    game_date TEXT,
+    linescore BLOB,
+    plays BLOB,
+    archived_at REAL
+);
+CREATE TABLE IF NOT EXISTS highlights (
+    game_pk INTEGER PRIMARY KEY,
+    items BLOB,
+    archived_at REAL
+);
+CREATE TABLE IF NOT EXISTS schedules (
+    season INTEGER PRIMARY KEY,
+    dates BLOB,
+    archived_at REAL
+);
+"""
+
+
+def _pack(value):
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+
+
+def _unpack(blob):
+    return json.loads(zlib.decompress(blob))
+
+
+class GameArchive:
+    """
+    SQLite store with one connection per thread. WAL mode lets several
+    server processes read while one of them writes.
+    """
+
+    def __init__(self, path=ARCHIVE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "read_ms": 0.0}
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _read(self, query, key):
+        started = time.perf_counter()
+        row = self._connection().execute(query, (key,)).fetchone()
+        value = None if row is None else [_unpack(col) if isinstance(col, bytes) else col for col in row]
+        with self._stats_lock:
+            self._stats["hits" if row is not None else "misses"] += 1
+            self._stats["read_ms"] += (time.perf_counter() - started) * 1000
+        return value
+
+    def _write(self, query, params):
+        conn = self._connection()
+        with conn:
+            conn.execute(query, params)
+        with self._stats_lock:
+            self._stats["writes"] += 1
+
+    def get_game(self, game_pk):
+        row = self._read("SELECT game_date, linescore, plays FROM games WHERE game_pk = ?", int(game_pk))
+        if row is None:
+            return None
+        return {"game_date": row[0], "linescore": row[1], "plays": row[2]}
+
+    def put_game(self, game_pk, game_date, linescore, plays):
+        self._write("INSERT OR REPLACE INTO games VALUES (?, ?, ?, ?, ?)",
+                    (int(game_pk), game_date, _pack(linescore), _pack(plays), time.time()))
+
+    def game_date(self, game_pk):
+        row = self._connection().execute("SELECT game_date FROM games WHERE game_pk = ?", (int(game_pk),)).fetchone()
+        return row[0] if row else None
+
+    def get_highlights(self, game_pk):
+        row = self._read("SELECT items FROM highlights WHERE game_pk = ?", int(game_pk))
+        return None if row is None else row[0]
+
+    def put_highlights(self, game_pk, items):
+        self._write("INSERT OR REPLACE INTO highlights VALUES (?, ?, ?)", (int(game_pk), _pack(items), time.time()))
+
+    def get_schedule(self, season):
+        row = self._read("SELECT dates FROM schedules WHERE season = ?", int(season))
+        return None if row is None else row[0]
+
+    def put_schedule(self, season, dates):
+        self._write("INSERT OR REPLACE INTO schedules VALUES (?, ?, ?)", (int(season), _pack(dates), time.time()))
+
+    def stats(self):
+        conn = self._connection()
+        with self._stats_lock:
+            counters = dict(self._stats)
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "path": self.path,
+            "games": conn.execute("SELECT COUNT(*) FROM games").fetchone()[0],
+            "highlights": conn.execute("SELECT COUNT(*) FROM highlights").fetchone()[0],
+            "schedules": conn.execute("SELECT COUNT(*) FROM schedules").fetchone()[0],
+            "bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+            **counters,
+            "read_ms": round(counters["read_ms"], 3),
+            "mean_read_ms": round(counters["read_ms"] / lookups, 3) if lookups else 0.0,
+        }
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_archive():
+    """
+    Return the process-wide archive, or None when MLB_ARCHIVE_PATH is empty
+    or the database cannot be opened
+    """
+    global _archive
+    if _archive is None and ARCHIVE_PATH:
+        with _archive_lock:
+            if _archive is None:
+                try:
+                    _archive = GameArchive(ARCHIVE_PATH)
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning(f"Game archive disabled, cannot open {ARCHIVE_PATH}: {e}")
+                    return None
+    return _archive
+
+
+def _settled(game_date):
+    # Highlight videos keep being added on the day of the game
+    return bool(game_date) and game_date < date.today().isoformat()
+
+
+def final_game(game, client=None):
+    """
+    Projected plays and linescore of a Final game, given its schedule entry.
+    Served from the archive when present, otherwise streamed once and archived.
+    """
+    game_pk = game["gamePk"]
+    archive = get_archive()
+    record = archive.get_game(game_pk) if archive else None
+    if record is not None:
+        return record
+
+    client = client or get_client()
+    game_date = game.get("officialDate") or game.get("gameDate", "")[:10]
+    plays = stream_feed_plays(game_pk, client)
+    linescore = client.fetch_json(f"{STATS_API_BASE}/v1/game/{game_pk}/linescore")
+    if archive:
+        archive.put_game(game_pk, game_date, linescore, plays)
+    return {"game_date": game_date, "linescore": linescore, "plays": plays}
+
+
+def _highlight_items(content):
+    items = []
+    for highlight in ((content.get("highlights") or {}).get("highlights") or {}).get("items", []):
+        items.append({
+            "title": highlight.get("headline", "Unknown"),
+            "id": highlight.get("id", "Unknown"),
+            "play_id": highlight.get("guid", ""),
+            "video_url": next((p["url"] for p in highlight.get("playbacks", []) if p.get("name") == "mp4Avc"), None),
+        })
+    return items
+
+
+def game_highlights(game_pk, game=None, client=None):
+    """
+    [{"title", "id", "play_id", "video_url"}] for a game's highlight videos.
+    Archived once the game is Final and its day has passed, identified either
+    by its schedule entry or by the game already being in the archive.
+    """
+    archive = get_archive()
+    items = archive.get_highlights(game_pk) if archive else None
+    if items is not None:
+        return items
+
+    client = client or get_client()
+    items = _highlight_items(client.fetch_json(f"{STATS_API_BASE}/v1/game/{game_pk}/content"))
+    if archive:
+        if game is not None:
+            final = game.get("status", {}).get("abstractGameState") == "Final"
+            game_date = game.get("officialDate") if final else None
+        else:
+            game_date = archive.game_date(game_pk)
+        if _settled(game_date):
+            archive.put_highlights(game_pk, items)
+    return items
+
+
+def video_urls_by_play(items):
+    """
+    play_id -> mp4 url mapping of a highlight list
+    """
+    return {item["play_id"]: item["video_url"] for item in items if item["play_id"] and item["video_url"]}
+
+
+def stats():
+    archive = get_archive()
+    return archive.stats() if archive else {"enabled": False}
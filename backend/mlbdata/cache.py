@@ -0,0 +1,121 @@
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+
+FOREVER = math.inf
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+CACHE_MAX_BYTES = int(os.environ.get("MLB_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+# Stats API reference endpoints and the TTL used while their season is current.
+# Seasons that are already over never change and are kept until evicted.
+REFERENCE_TTLS = [
+    (re.compile(r"/v1/seasons(/\d+)?$"), DAY),
+    (re.compile(r"/v1/league$"), DAY),
+    (re.compile(r"/v1/teams(/\d+)?$"), DAY),
+    (re.compile(r"/v1/standings$"), 5 * MINUTE),
+]
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with a per-entry TTL and a memory budget.
+    Entries are evicted least recently used first once max_bytes is exceeded.
+    """
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, size, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl, size):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic() + ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+            }
+
+
+def _season_of(path, query):
+    season = query.get("season", [None])[0]
+    if season is None:
+        match = re.search(r"/seasons/(\d+)$", path)
+        season = match.group(1) if match else None
+    try:
+        return int(season)
+    except (TypeError, ValueError):
+        return None
+
+
+def reference_ttl(url):
+    """
+    Return how long a Stats API response may be cached, in seconds.
+    FOREVER for past seasons, None if the endpoint is not reference data.
+    """
+    parsed = urlsplit(url)
+    path = parsed.path.rstrip("/")
+    for pattern, ttl in REFERENCE_TTLS:
+        if pattern.search(path):
+            season = _season_of(path, parse_qs(parsed.query))
+            if season is not None and season < datetime.now().year:
+                return FOREVER
+            return ttl
+    return None
@@ -0,0 +1,128 @@
+import json
+import logging
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from mlbdata.cache import TTLCache, reference_ttl
+from mlbdata.singleflight import SingleFlight, normalize_url
+
+logger = logging.getLogger(__name__)
+
+STATS_API_BASE = "https://statsapi.mlb.com/api"
+
+# Pool / timeout / retry policy, overridable per deployment
+POOL_CONNECTIONS = int(os.environ.get("MLB_HTTP_POOL_CONNECTIONS", 4))
+POOL_MAXSIZE = int(os.environ.get("MLB_HTTP_POOL_MAXSIZE", 32))
+CONNECT_TIMEOUT = float(os.environ.get("MLB_HTTP_CONNECT_TIMEOUT", 3.05))
+READ_TIMEOUT = float(os.environ.get("MLB_HTTP_READ_TIMEOUT", 10))
+MAX_RETRIES = int(os.environ.get("MLB_HTTP_RETRIES", 2))
+
+
+class StatsApiClient:
+    """
+    Keep-alive HTTP client for the MLB Stats API.
+    One pooled session is shared by every data function so repeated
+    lookups reuse open TCP/TLS connections instead of reconnecting.
+    """
+
+    def __init__(self, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                 timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), retries=MAX_RETRIES):
+        self.timeout = timeout
+        self.cache = TTLCache()
+        self.text_flights = SingleFlight()
+        self.json_flights = SingleFlight()
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.2,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry,
+            pool_block=False,
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def get_json(self, url, **kwargs):
+        response = self.get(url, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    def fetch_text(self, url):
+        """
+        GET a Stats API url and return the body text.
+        Reference data (teams, leagues, seasons, standings) is served from
+        the cache while its TTL lasts, and identical concurrent requests
+        share a single upstream call.
+        """
+        key = normalize_url(url)
+        ttl = reference_ttl(url)
+        if ttl is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        def fetch():
+            response = self.get(url)
+            response.raise_for_status()
+            text = response.text
+            if ttl is not None:
+                self.cache.set(key, text, ttl, size=len(response.content))
+            return text
+
+        return self.text_flights.do(key, fetch)
+
+    def fetch_json(self, url):
+        """
+        Like fetch_text, but concurrent callers also share the parsed document.
+        The result is shared between threads and must not be modified.
+        """
+        return self.json_flights.do(normalize_url(url), lambda: json.loads(self.fetch_text(url)))
+
+    def stats(self):
+        return {
+            "cache": self.cache.stats(),
+            "coalescing": {
+                "text": self.text_flights.stats(),
+                "json": self.json_flights.stats(),
+            },
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Return the process-wide StatsApiClient, creating it on first use
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = StatsApiClient()
+    return _client
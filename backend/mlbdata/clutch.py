@@ -0,0 +1,311 @@
+"""
+Table-driven clutch scoring.
+
+Win expectancy and leverage index tables are derived once, at import, from
+a plate-appearance Markov model of a half-inning. Scoring a game is then a
+sequential pass to recover the base-out-score state before and after each
+plate appearance, followed by vectorized lookups into the tables.
+"""
+import logging
+import os
+import time
+
+import numpy as np
+
+from mlbdata.plays import PlayLog
+
+logger = logging.getLogger(__name__)
+
+CLUTCH_TOP_K = int(os.environ.get("MLB_CLUTCH_TOP_K", 10))
+
+MAX_RUN_DIFF = 20
+MAX_RUNS = 12
+EXTRA_INNING = 10      # every inning after the 9th shares one table row
+REGULATION = 9
+
+OUT, WALK, SINGLE, DOUBLE, TRIPLE, HOME_RUN = range(6)
+
+# League-average outcome rates per plate appearance (walks include HBP)
+EVENT_PROBABILITIES = np.array([0.684, 0.097, 0.140, 0.044, 0.004, 0.031])
+
+_DIFFS = np.arange(-MAX_RUN_DIFF, MAX_RUN_DIFF + 1)
+_N_DIFFS = len(_DIFFS)
+
+FIRST, SECOND, THIRD = 1, 2, 4
+
+
+def _advance(outs, bases, event):
+    """
+    Base-out state and runs scored after one plate appearance outcome
+    """
+    first, second, third = bases & FIRST, (bases & SECOND) >> 1, (bases & THIRD) >> 2
+    if event == OUT:
+        return outs + 1, bases, 0
+    if event == WALK:
+        if not first:
+            return outs, bases | FIRST, 0
+        if not second:
+            return outs, bases | FIRST | SECOND, 0
+        return outs, FIRST | SECOND | THIRD, third
+    if event == SINGLE:
+        return outs, FIRST | (SECOND if first else 0), second + third
+    if event == DOUBLE:
+        return outs, SECOND | (THIRD if first else 0), second + third
+    if event == TRIPLE:
+        return outs, THIRD, first + second + third
+    return outs, 0, 1 + first + second + third
+
+
+def _shift(distribution, runs):
+    shifted = np.zeros_like(distribution)
+    if runs == 0:
+        return distribution.copy()
+    shifted[runs:] = distribution[:-runs]
+    shifted[-1] += distribution[-runs:].sum()
+    return shifted
+
+
+def _run_distributions():
+    """
+    P(runs scored in the rest of the half-inning) for every (outs, bases),
+    shape (4, 8, MAX_RUNS + 1). Three outs is the absorbing state.
+    """
+    dist = np.zeros((4, 8, MAX_RUNS + 1))
+    dist[3, :, 0] = 1.0
+    for outs in (2, 1, 0):
+        dist[outs, :, 0] = 1.0
+        for _ in range(60):
+            updated = np.zeros((8, MAX_RUNS + 1))
+            for bases in range(8):
+                for event, p in enumerate(EVENT_PROBABILITIES):
+                    next_outs, next_bases, runs = _advance(outs, bases, event)
+                    updated[bases] += p * _shift(dist[next_outs, next_bases], runs)
+            dist[outs] = updated
+    return dist
+
+
+def _shifted_indices(runs, sign):
+    return np.clip(np.arange(_N_DIFFS) + sign * runs, 0, _N_DIFFS - 1)
+
+
+def _half_inning_tables(dist):
+    """
+    Home win probability at the end of each half-inning, indexed by
+    [inning, half, run differential]. half 0 is the top, 1 the bottom.
+    """
+    after = np.zeros((EXTRA_INNING + 1, 2, _N_DIFFS))
+    home_ahead = (_DIFFS > 0).astype(float)
+
+    def play_half(after_half, start_bases, sign):
+        start = dist[0, start_bases]
+        return sum(start[r] * after_half[_shifted_indices(r, sign)] for r in range(MAX_RUNS + 1))
+
+    def finish(inning, next_top):
+        # End of the bottom half: the game is over unless it is tied in the 9th or later
+        after_bottom = next_top.copy()
+        if inning >= REGULATION:
+            after_bottom = np.where(_DIFFS != 0, home_ahead, next_top)
+        bases = SECOND if inning == EXTRA_INNING else 0
+        bottom = play_half(after_bottom, bases, +1)
+        # End of the top half: the home team does not bat when it already leads late
+        after_top = bottom
+        if inning >= REGULATION:
+            after_top = np.where(_DIFFS > 0, 1.0, bottom)
+        top = play_half(after_top, bases, -1)
+        return after_top, after_bottom, top
+
+    # Extra innings repeat until the tie is broken, so solve for a fixed point
+    extra_top = np.full(_N_DIFFS, 0.5)
+    for _ in range(200):
+        after_top, after_bottom, extra_top = finish(EXTRA_INNING, extra_top)
+    after[EXTRA_INNING, 0], after[EXTRA_INNING, 1] = after_top, after_bottom
+
+    next_top = extra_top
+    for inning in range(REGULATION, 0, -1):
+        after_top, after_bottom, next_top = finish(inning, next_top)
+        after[inning, 0], after[inning, 1] = after_top, after_bottom
+    return after
+
+
+def _win_expectancy(dist, after):
+    """
+    Home win probability before a plate appearance,
+    indexed by [inning, half, outs, bases, run differential]
+    """
+    table = np.zeros((EXTRA_INNING + 1, 2, 3, 8, _N_DIFFS))
+    for half, sign in ((0, -1), (1, +1)):
+        for runs in range(MAX_RUNS + 1):
+            shifted = after[:, half][:, _shifted_indices(runs, sign)]
+            table[:, half] += dist[:3, :, runs][None, :, :, None] * shifted[:, None, None, :]
+    return table
+
+
+def _state_visits():
+    """
+    Expected visits of each (outs, bases) state in a half-inning from (0, empty)
+    """
+    visits = np.zeros((3, 8))
+    occupancy = np.zeros((4, 8))
+    occupancy[0, 0] = 1.0
+    for _ in range(60):
+        visits += occupancy[:3]
+        moved = np.zeros((4, 8))
+        for outs in range(3):
+            for bases in range(8):
+                for event, p in enumerate(EVENT_PROBABILITIES):
+                    next_outs, next_bases, _ = _advance(outs, bases, event)
+                    moved[next_outs, next_bases] += p * occupancy[outs, bases]
+        occupancy = moved
+    return visits
+
+
+def _leverage_index(win_expectancy, after):
+    """
+    Expected absolute win probability swing of the next plate appearance,
+    normalized so that an average plate appearance scores 1.0
+    """
+    swing = np.zeros_like(win_expectancy)
+    for half, sign in ((0, -1), (1, +1)):
+        for outs in range(3):
+            for bases in range(8):
+                current = win_expectancy[:, half, outs, bases]
+                for event, p in enumerate(EVENT_PROBABILITIES):
+                    next_outs, next_bases, runs = _advance(outs, bases, event)
+                    index = _shifted_indices(runs, sign)
+                    if next_outs == 3:
+                        following = after[:, half][:, index]
+                    else:
+                        following = win_expectancy[:, half, next_outs, next_bases][:, index]
+                    swing[:, half, outs, bases] += p * np.abs(following - current)
+
+    weights = np.zeros_like(swing)
+    diff_weights = np.exp(-np.abs(_DIFFS) / 2.5)
+    weights[1:REGULATION + 1] = _state_visits()[None, None, :, :, None] * diff_weights
+    # Bottom of the 9th with the home team ahead is never played
+    weights[REGULATION:, 1, :, :, _DIFFS > 0] = 0.0
+    return swing / ((swing * weights).sum() / weights.sum())
+
+
+def _build_tables():
+    started = time.perf_counter()
+    dist = _run_distributions()
+    after = _half_inning_tables(dist)
+    win_expectancy = _win_expectancy(dist, after)
+    leverage = _leverage_index(win_expectancy, after)
+    logger.info(f"Built clutch tables in {(time.perf_counter() - started) * 1000:.1f} ms "
+                f"(run expectancy from empty, no outs: {(dist[0, 0] * np.arange(MAX_RUNS + 1)).sum():.3f})")
+    return after, win_expectancy, leverage
+
+
+AFTER_HALF, WIN_EXPECTANCY, LEVERAGE = _build_tables()
+
+
+def _bases_after(matchup):
+    return ((FIRST if matchup.get("postOnFirst") else 0) |
+            (SECOND if matchup.get("postOnSecond") else 0) |
+            (THIRD if matchup.get("postOnThird") else 0))
+
+
+def _play_states(plays):
+    """
+    Reconstruct the state before and after each complete plate appearance.
+    Returns the complete plays and an int array of
+    (inning, half, outs, bases, diff, outs after, bases after, diff after) rows.
+    """
+    complete = []
+    rows = []
+    half_inning = None
+    outs = bases = diff = 0
+    for play in plays:
+        about = play.get("about", {})
+        if not about.get("isComplete", True):
+            continue
+        inning = min(about.get("inning", 1), EXTRA_INNING)
+        half = 0 if about.get("isTopInning", True) else 1
+        matchup = play.get("matchup", {})
+
+        if (inning, half) != half_inning:
+            half_inning = (inning, half)
+            outs = 0
+            bases = 0
+            # Extra innings start with a runner on second
+            if inning == EXTRA_INNING and matchup.get("splits", {}).get("menOnBase") in ("RISP", "Men_On"):
+                bases = SECOND
+
+        result = play.get("result", {})
+        diff_after = int(result.get("homeScore", 0) or 0) - int(result.get("awayScore", 0) or 0)
+        outs_after = min(int(play.get("count", {}).get("outs", outs) or 0), 3)
+        bases_after = _bases_after(matchup) if outs_after < 3 else 0
+
+        complete.append(play)
+        rows.append((inning, half, min(outs, 2), bases, diff, outs_after, bases_after, diff_after))
+        outs, bases, diff = outs_after, bases_after, diff_after
+    return complete, np.array(rows, dtype=np.int64).reshape(-1, 8)
+
+
+def score_plays(plays, final=False):
+    """
+    Win probability added (for the batting team), leverage index, home win
+    probability after the play and clutch score of every complete play.
+    The clutch score is |WPA| weighted up by the square root of the leverage.
+    """
+    complete, states = _play_states(plays)
+    if not complete:
+        empty = np.zeros(0)
+        return complete, empty, empty, empty, empty
+
+    inning, half, outs, bases, diff, outs_after, bases_after, diff_after = states.T
+    d_before = np.clip(diff, -MAX_RUN_DIFF, MAX_RUN_DIFF) + MAX_RUN_DIFF
+    d_after = np.clip(diff_after, -MAX_RUN_DIFF, MAX_RUN_DIFF) + MAX_RUN_DIFF
+
+    we_before = WIN_EXPECTANCY[inning, half, outs, bases, d_before]
+    leverage = LEVERAGE[inning, half, outs, bases, d_before]
+    we_after = np.where(
+        outs_after >= 3,
+        AFTER_HALF[inning, half, d_after],
+        WIN_EXPECTANCY[inning, half, np.minimum(outs_after, 2), bases_after, d_after],
+    )
+    if final:
+        we_after[-1] = 1.0 if diff_after[-1] > 0 else 0.0 if diff_after[-1] < 0 else 0.5
+
+    wpa = np.where(half == 0, we_before - we_after, we_after - we_before)
+    score = np.abs(wpa) * np.sqrt(leverage)
+    return complete, wpa, leverage, we_after, score
+
+
+def top_clutch_plays(plays, final=False, limit=CLUTCH_TOP_K):
+    """
+    Return [(play, metrics)] for the highest scoring plays, best first
+    """
+    complete, wpa, leverage, we_after, score = score_plays(plays, final)
+    order = np.argsort(-score, kind="stable")[:max(int(limit), 0)]
+    return [
+        (complete[i], {
+            "wpa": float(wpa[i]),
+            "leverage_index": float(leverage[i]),
+            "home_win_probability": float(we_after[i]),
+            "clutch_score": float(score[i]),
+        })
+        for i in order
+    ]
+
+
+def score_game(game_info, plays, limit):
+    """
+    Top clutch plays of one Final game in wire format, and the time it took.
+    Runs in a season scan worker process, so it only takes and returns plain data.
+    """
+    started = time.perf_counter()
+    highlights = PlayLog(game_info)
+    for play, clutch in top_clutch_plays(plays, True, limit):
+        highlights.add(play, clutch)
+    return highlights.to_wire()["key_plays"], (time.perf_counter() - started) * 1000
+
+
+def init_score_worker():
+    """
+    Initializer of the season scan worker processes. Unpickling it imports
+    this module and nothing else from the backend, so each worker builds the
+    tables once at start instead of inside its first game.
+    """
+    logger.debug(f"Clutch scoring worker {os.getpid()} ready")
@@ -0,0 +1,120 @@
+import json
+import logging
+import os
+import threading
+import time
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+from mlbdata.client import STATS_API_BASE, get_client
+
+logger = logging.getLogger(__name__)
+
+STREAMING_ENABLED = os.environ.get("MLB_FEED_STREAMING", "1") == "1"
+
+# Leaves of each allPlays entry read by the clutch scorer and extractor
+PLAY_FIELDS = (
+    ("result", "event"),
+    ("result", "description"),
+    ("result", "awayScore"),
+    ("result", "homeScore"),
+    ("about", "atBatIndex"),
+    ("about", "inning"),
+    ("about", "isTopInning"),
+    ("about", "isScoringPlay"),
+    ("about", "isComplete"),
+    ("count", "outs"),
+    ("matchup", "batter", "fullName"),
+    ("matchup", "pitcher", "fullName"),
+    ("matchup", "postOnFirst", "id"),
+    ("matchup", "postOnSecond", "id"),
+    ("matchup", "postOnThird", "id"),
+    ("matchup", "splits", "menOnBase"),
+)
+
+# Leaves of the last playEvent of a play
+EVENT_FIELDS = (
+    ("playId",),
+    ("pitchData", "startSpeed"),
+    ("pitchData", "endSpeed"),
+    ("pitchData", "breaks", "spinRate"),
+    ("details", "type", "description"),
+)
+
+_stats_lock = threading.Lock()
+_stats = {"streamed_feeds": 0, "plays": 0, "stream_ms": 0.0}
+
+
+def _project(source, fields):
+    projected = {}
+    for path in fields:
+        value = source
+        for key in path:
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            target = projected
+            for key in path[:-1]:
+                target = target.setdefault(key, {})
+            target[path[-1]] = value
+    return projected
+
+
+def project_play(play):
+    """
+    Reduce a feed/live play to the same shape with only the fields the
+    clutch extractor needs. playEvents keeps just the last event.
+    """
+    projected = _project(play, PLAY_FIELDS)
+    events = play.get("playEvents") or []
+    projected["playEvents"] = [_project(events[-1], EVENT_FIELDS)] if events else []
+    return projected
+
+
+def iter_projected_plays(stream):
+    """
+    Walk liveData.plays.allPlays of a feed/live document one play at a time.
+    Only the current play is ever fully materialized, gameData.players,
+    boxscore and the rest of the document are skipped by the parser.
+    """
+    if ijson is None:
+        logger.warning("ijson is not installed, falling back to a full json parse")
+        for play in json.load(stream)["liveData"]["plays"]["allPlays"]:
+            yield project_play(play)
+        return
+
+    for play in ijson.items(stream, "liveData.plays.allPlays.item", use_float=True):
+        yield project_play(play)
+
+
+def stream_feed_plays(game_pk, client=None):
+    """
+    Download a game's feed/live document as a stream and return its projected plays.
+    With MLB_FEED_STREAMING=0 the document is downloaded and parsed whole.
+    """
+    client = client or get_client()
+    url = f"{STATS_API_BASE}/v1.1/game/{game_pk}/feed/live"
+    started = time.perf_counter()
+    if STREAMING_ENABLED:
+        with client.get(url, stream=True) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            plays = list(iter_projected_plays(response.raw))
+    else:
+        plays = [project_play(play) for play in client.get_json(url)["liveData"]["plays"]["allPlays"]]
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    with _stats_lock:
+        _stats["streamed_feeds"] += 1
+        _stats["plays"] += len(plays)
+        _stats["stream_ms"] += elapsed_ms
+    return plays
+
+
+def stats():
+    with _stats_lock:
+        return {**_stats, "stream_ms": round(_stats["stream_ms"], 3), "streaming": STREAMING_ENABLED and ijson is not None}
@@ -0,0 +1,190 @@
+"""
+Game tools shared by the audio and web backends.
+
+Each function returns plain data (a dict, or a PlayLog for clutch plays)
+and reports failures as {"error": ...}, so a backend only decides how to
+serialize the result for its model.
+"""
+import logging
+
+import requests
+
+from mlbdata.archive import final_game, game_highlights, video_urls_by_play
+from mlbdata.clutch import CLUTCH_TOP_K, top_clutch_plays
+from mlbdata.live import get_tracker
+from mlbdata.plays import PlayLog
+from mlbdata.schedule import get_schedule_index
+from mlbdata.season import scan_season
+
+logger = logging.getLogger(__name__)
+
+
+def find_game(content):
+    """
+    The team's game on content['gamedate'] (game_number picks one of a
+    doubleheader), resolved by the schedule index, or None
+    """
+    return get_schedule_index().find_game(content['team_id'], content['gamedate'], content.get('game_number'))
+
+
+def find_game_pk(content):
+    """
+    Return the gamePk of the team's game on the given date, or None
+    """
+    game = find_game(content)
+    return game['gamePk'] if game else None
+
+
+def get_game_data(content):
+    """
+    Date, status, score and highlight videos of a game
+    """
+    try:
+        game = find_game(content)
+        if game is None:
+            return {"error": "No games found for the specified date and team."}
+
+        teams = game.get('teams', {})
+        output = {
+            "game_date": game.get('gameDate', 'Unknown'),
+            "status": game.get('status', {}).get('detailedState', 'Unknown'),
+            "teams": {
+                side: {
+                    "name": teams.get(side, {}).get('team', {}).get('name', 'Unknown'),
+                    "score": teams.get(side, {}).get('score'),
+                } for side in ("away", "home")
+            },
+            # Highlights of past games are served from the game archive
+            "highlights": [
+                {"title": highlight['title'], "id": highlight['id'], "video_url": highlight['video_url']}
+                for highlight in game_highlights(game['gamePk'], game)
+            ],
+        }
+        return output
+
+    except ValueError as e:
+        return {"error": f"Date parsing error: {str(e)}"}
+    except requests.RequestException as e:
+        logger.error(f"API request failed: {str(e)}")
+        return {"error": f"An error occurred while fetching data: {str(e)}"}
+    except KeyError as e:
+        return {"error": f"Missing expected data in API response: {str(e)}"}
+
+
+def get_game_highlights(content):
+    """
+    PlayLog of a game's top clutch plays, or None when there is no game
+    """
+    try:
+        game = find_game(content)
+    except requests.RequestException as e:
+        logger.error(f"Error fetching game data: {e}")
+        return None
+
+    if game is None:
+        logger.info("No games data found for the specified date and team.")
+        return None
+
+    game_pk = game['gamePk']
+    limit = int(content.get('limit', CLUTCH_TOP_K))
+
+    def build_highlights(data):
+        highlights = PlayLog({
+            "gamePk": game_pk,
+            "home_team": data["gameData"]["teams"]["home"]["name"],
+            "away_team": data["gameData"]["teams"]["away"]["name"],
+            "home_score": data["liveData"]["linescore"]["teams"]["home"]["runs"],
+            "away_score": data["liveData"]["linescore"]["teams"]["away"]["runs"],
+        })
+
+        final = data["gameData"]["status"].get("abstractGameState") == "Final"
+        for play, clutch in top_clutch_plays(data["liveData"]["plays"]["allPlays"], final, limit):
+            highlights.add(play, clutch)
+
+        return highlights
+
+    try:
+        if game['status'].get('abstractGameState') == 'Final':
+            # Final games are read from the game archive, or streamed once and archived
+            record = final_game(game)
+            teams = game['teams']
+            # The archived linescore has the final score; the schedule entry's
+            # may predate it until the schedule window is refreshed
+            runs = (record.get('linescore') or {}).get('teams', {})
+            highlights = PlayLog({
+                "gamePk": game_pk,
+                "home_team": teams['home']['team']['name'],
+                "away_team": teams['away']['team']['name'],
+                "home_score": runs.get('home', {}).get('runs', teams['home'].get('score')),
+                "away_score": runs.get('away', {}).get('runs', teams['away'].get('score')),
+            })
+            for play, clutch in top_clutch_plays(record['plays'], True, limit):
+                highlights.add(play, clutch)
+            return highlights
+
+        # The tracker keeps a live feed in memory and only pulls diffPatch updates
+        return get_tracker(game_pk).read(build_highlights)
+    except requests.RequestException as e:
+        logger.error(f"Error fetching game data: {e}")
+        return None
+
+
+def get_video_highlights(game_pk):
+    """
+    Highlight video urls of a game by play id
+    """
+    try:
+        return video_urls_by_play(game_highlights(game_pk))
+    except requests.RequestException as e:
+        logger.error(f"Error fetching video highlights: {e}")
+        return {}
+
+
+def get_mlb_clutch_plays(content):
+    """
+    get_game_highlights with the highlight video of every play that has one
+    """
+    highlights = get_game_highlights(content)
+    if not highlights:
+        return None
+    video_urls = get_video_highlights(highlights.game_info['gamePk'])
+
+    for play in highlights.plays:
+        play.video_url = video_urls.get(play.play_id, "")
+
+    return highlights
+
+
+def get_season_clutch_moments(content):
+    """
+    Top clutch plays of a team's season (or start_date to end_date) with their videos
+    """
+    try:
+        report = scan_season(content['team_id'], season=content.get('season'),
+                             start_date=content.get('start_date'), end_date=content.get('end_date'),
+                             limit=int(content.get('limit', CLUTCH_TOP_K)))
+    except (requests.RequestException, ValueError) as e:
+        logger.error(f"Season scan failed: {str(e)}")
+        return {"error": str(e)}
+
+    video_urls = {}
+    for game_pk in {play['game_info']['gamePk'] for play in report['clutch_plays']}:
+        video_urls.update(get_video_highlights(game_pk))
+    for play in report['clutch_plays']:
+        play['video_url'] = video_urls.get(play['play_id'], "")
+
+    return {"summary": report['summary'], "clutch_plays": report['clutch_plays']}
+
+
+def get_current_play(content):
+    """
+    The play in progress of the team's game on the given date
+    """
+    try:
+        game_pk = find_game_pk(content)
+        if game_pk is None:
+            return {"error": "No games found for the specified date and team."}
+        return get_tracker(game_pk).current_play()
+    except requests.RequestException as e:
+        logger.error(f"API request failed: {str(e)}")
+        return {"error": str(e)}
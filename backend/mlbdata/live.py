@@ -0,0 +1,220 @@
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from mlbdata.client import STATS_API_BASE, get_client
+
+logger = logging.getLogger(__name__)
+
+MIN_REFRESH_SECONDS = float(os.environ.get("MLB_LIVE_MIN_REFRESH_SECONDS", 2))
+MAX_TRACKED_GAMES = int(os.environ.get("MLB_LIVE_MAX_GAMES", 32))
+
+
+class PatchError(Exception):
+    pass
+
+
+def _unescape(token):
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def _resolve(document, path):
+    """
+    Walk a JSON pointer and return (parent container, last token)
+    """
+    tokens = [_unescape(t) for t in path.split("/")[1:]]
+    if not tokens:
+        raise PatchError("Patching the document root is not supported")
+    parent = document
+    try:
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+    except (KeyError, IndexError, ValueError, TypeError) as e:
+        raise PatchError(f"Path {path} not found: {e}")
+    return parent, tokens[-1]
+
+
+def apply_patch_op(document, op):
+    """
+    Apply one RFC 6902 operation, as emitted by the feed/live diffPatch endpoint
+    """
+    kind = op.get("op")
+    parent, token = _resolve(document, op.get("path", ""))
+    try:
+        if isinstance(parent, list):
+            if kind == "add":
+                if token == "-":
+                    parent.append(op["value"])
+                else:
+                    parent.insert(int(token), op["value"])
+            elif kind == "replace":
+                parent[int(token)] = op["value"]
+            elif kind == "remove":
+                del parent[int(token)]
+            else:
+                raise PatchError(f"Unsupported patch op {kind}")
+        else:
+            if kind in ("add", "replace"):
+                parent[token] = op["value"]
+            elif kind == "remove":
+                del parent[token]
+            else:
+                raise PatchError(f"Unsupported patch op {kind}")
+    except (KeyError, IndexError, ValueError, TypeError) as e:
+        raise PatchError(f"Cannot {kind} {op.get('path')}: {e}")
+
+
+class LiveGameTracker:
+    """
+    In-memory copy of one game's feed/live document.
+    The first refresh downloads the full feed, later refreshes only fetch
+    the diffPatch since the last timecode and apply it in place. Any gap or
+    patch failure falls back to a full download.
+    """
+
+    def __init__(self, game_pk, client=None):
+        self.game_pk = game_pk
+        self.client = client or get_client()
+        self.feed = None
+        self.timecode = None
+        self.last_refresh = 0.0
+        self.last_update = None
+        self.full_fetches = 0
+        self.patch_updates = 0
+        self.bytes_received = 0
+        self.parse_ms = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def feed_url(self):
+        return f"{STATS_API_BASE}/v1.1/game/{self.game_pk}/feed/live"
+
+    @property
+    def is_final(self):
+        if self.feed is None:
+            return False
+        state = self.feed.get("gameData", {}).get("status", {}).get("abstractGameState")
+        return state == "Final"
+
+    def refresh(self, force=False):
+        with self._lock:
+            self._refresh(force)
+
+    def _refresh(self, force=False):
+        if self.feed is not None:
+            if self.is_final:
+                return
+            if not force and time.monotonic() - self.last_refresh < MIN_REFRESH_SECONDS:
+                return
+
+        if self.feed is None or self.timecode is None:
+            self._full_fetch()
+        else:
+            try:
+                self._patch()
+            except PatchError as e:
+                logger.warning(f"Game {self.game_pk}: diffPatch failed ({e}), fetching full feed")
+                self._full_fetch()
+        self.last_refresh = time.monotonic()
+
+    def _download(self, url, params=None):
+        response = self.client.get(url, params=params)
+        response.raise_for_status()
+        wire_bytes = int(response.headers.get("Content-Length") or len(response.content))
+        started = time.perf_counter()
+        data = json.loads(response.content)
+        parse_ms = (time.perf_counter() - started) * 1000
+        self.bytes_received += wire_bytes
+        self.parse_ms += parse_ms
+        return data, wire_bytes, parse_ms
+
+    def _set_feed(self, feed):
+        self.feed = feed
+        self.timecode = feed.get("metaData", {}).get("timeStamp")
+
+    def _full_fetch(self):
+        feed, wire_bytes, parse_ms = self._download(self.feed_url)
+        self._set_feed(feed)
+        self.full_fetches += 1
+        self.last_update = {"kind": "full", "bytes": wire_bytes, "parse_ms": round(parse_ms, 3)}
+
+    def _patch(self):
+        patches, wire_bytes, parse_ms = self._download(
+            f"{self.feed_url}/diffPatch", params={"startTimecode": self.timecode}
+        )
+        if isinstance(patches, dict):
+            # The endpoint answers with the whole feed when the gap is too large
+            self._set_feed(patches)
+            self.full_fetches += 1
+            kind = "full"
+        else:
+            started = time.perf_counter()
+            for patch in patches:
+                for op in patch.get("diff", []):
+                    apply_patch_op(self.feed, op)
+            parse_ms += (time.perf_counter() - started) * 1000
+            self.timecode = self.feed.get("metaData", {}).get("timeStamp", self.timecode)
+            self.patch_updates += 1
+            kind = "patch"
+        self.last_update = {"kind": kind, "bytes": wire_bytes, "parse_ms": round(parse_ms, 3)}
+
+    def read(self, reader):
+        """
+        Refresh if due, then call reader(feed) while holding the tracker lock.
+        The reader must not keep references into the feed after it returns.
+        """
+        with self._lock:
+            self._refresh()
+            return reader(self.feed)
+
+    def current_play(self):
+        return self.read(lambda feed: copy.deepcopy(feed["liveData"]["plays"].get("currentPlay", {})))
+
+    def stats(self):
+        return {
+            "game_pk": self.game_pk,
+            "timecode": self.timecode,
+            "final": self.is_final,
+            "full_fetches": self.full_fetches,
+            "patch_updates": self.patch_updates,
+            "bytes_received": self.bytes_received,
+            "parse_ms": round(self.parse_ms, 3),
+            "last_update": self.last_update,
+        }
+
+
+_trackers = OrderedDict()
+_trackers_lock = threading.Lock()
+
+
+def get_tracker(game_pk):
+    """
+    Return the tracker for a game, keeping at most MAX_TRACKED_GAMES in memory
+    """
+    game_pk = int(game_pk)
+    with _trackers_lock:
+        tracker = _trackers.get(game_pk)
+        if tracker is None:
+            tracker = _trackers[game_pk] = LiveGameTracker(game_pk)
+            while len(_trackers) > MAX_TRACKED_GAMES:
+                _trackers.popitem(last=False)
+        else:
+            _trackers.move_to_end(game_pk)
+        return tracker
+
+
+def stats():
+    with _trackers_lock:
+        trackers = list(_trackers.values())
+    return {
+        "tracked_games": len(trackers),
+        "full_fetches": sum(t.full_fetches for t in trackers),
+        "patch_updates": sum(t.patch_updates for t in trackers),
+        "bytes_received": sum(t.bytes_received for t in trackers),
+        "parse_ms": round(sum(t.parse_ms for t in trackers), 3),
+        "games": [t.stats() for t in trackers],
+    }
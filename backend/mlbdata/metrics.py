@@ -0,0 +1,18 @@
+from mlbdata import archive, feed, live, projection, season
+from mlbdata.client import get_client
+from mlbdata.schedule import get_schedule_index
+
+
+def snapshot():
+    """
+    Collect the counters of every shared mlbdata component
+    """
+    return {
+        "stats_api": get_client().stats(),
+        "live_games": live.stats(),
+        "streamed_feeds": feed.stats(),
+        "schedule": get_schedule_index().stats(),
+        "season_scans": season.stats(),
+        "archive": archive.stats(),
+        "tool_projection": projection.stats(),
+    }
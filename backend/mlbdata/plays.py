@@ -0,0 +1,166 @@
+import json
+import math
+import sys
+from array import array
+
+_NAN = float("nan")
+
+
+def _number(value):
+    return _NAN if value is None else float(value)
+
+
+def _optional(value):
+    return None if math.isnan(value) else value
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class PitchColumns:
+    """
+    Column store for the final pitch of each play.
+    Speeds and spin rates live in flat float arrays (NaN when missing)
+    instead of one dict per pitch.
+    """
+
+    __slots__ = ("start_speed", "end_speed", "spin_rate", "pitch_type", "has_pitch_data")
+
+    def __init__(self):
+        self.start_speed = array("d")
+        self.end_speed = array("d")
+        self.spin_rate = array("d")
+        self.pitch_type = []
+        self.has_pitch_data = array("b")
+
+    def __len__(self):
+        return len(self.has_pitch_data)
+
+    def append(self, pitch_event):
+        pitch_data = pitch_event.get("pitchData")
+        if pitch_data is None:
+            self.start_speed.append(_NAN)
+            self.end_speed.append(_NAN)
+            self.spin_rate.append(_NAN)
+            self.pitch_type.append(None)
+            self.has_pitch_data.append(0)
+        else:
+            self.start_speed.append(_number(pitch_data.get("startSpeed")))
+            self.end_speed.append(_number(pitch_data.get("endSpeed")))
+            self.spin_rate.append(_number(pitch_data.get("breaks", {}).get("spinRate")))
+            self.pitch_type.append(_intern(pitch_event.get("details", {}).get("type", {}).get("description")))
+            self.has_pitch_data.append(1)
+        return len(self.has_pitch_data) - 1
+
+    def to_wire(self, index):
+        if not self.has_pitch_data[index]:
+            return {}
+        return {
+            "start_speed": _optional(self.start_speed[index]),
+            "end_speed": _optional(self.end_speed[index]),
+            "spin_rate": _optional(self.spin_rate[index]),
+            "pitch_type": self.pitch_type[index],
+        }
+
+
+class Play:
+    """
+    One plate appearance of the clutch pipeline
+    """
+
+    __slots__ = ("play_id", "inning", "is_top_inning", "event", "description",
+                 "is_scoring_play", "batter", "pitcher", "pitch_index", "video_url",
+                 "wpa", "leverage_index", "home_win_probability", "clutch_score")
+
+    def __init__(self, play_id, inning, is_top_inning, event, description,
+                 is_scoring_play, batter, pitcher, pitch_index):
+        self.play_id = play_id
+        self.inning = inning
+        self.is_top_inning = is_top_inning
+        self.event = event
+        self.description = description
+        self.is_scoring_play = is_scoring_play
+        self.batter = batter
+        self.pitcher = pitcher
+        self.pitch_index = pitch_index
+        self.video_url = None
+        self.wpa = None
+        self.leverage_index = None
+        self.home_win_probability = None
+        self.clutch_score = None
+
+    @classmethod
+    def from_feed(cls, play, pitches):
+        """
+        Build a Play from a feed/live allPlays entry (full or projected),
+        appending its last pitch to the pitch columns
+        """
+        result = play["result"]
+        about = play["about"]
+        matchup = play["matchup"]
+        last_event = play["playEvents"][-1]
+
+        return cls(
+            play_id=last_event.get("playId", ""),
+            inning=about["inning"],
+            is_top_inning=about["isTopInning"],
+            event=_intern(result["event"]),
+            description=result["description"],
+            is_scoring_play=about["isScoringPlay"],
+            batter=_intern(matchup["batter"]["fullName"]),
+            pitcher=_intern(matchup["pitcher"]["fullName"]),
+            pitch_index=pitches.append(last_event),
+        )
+
+    def to_wire(self, pitches):
+        wire = {
+            "play_id": self.play_id,
+            "inning": self.inning,
+            "is_top_inning": self.is_top_inning,
+            "event": self.event,
+            "description": self.description,
+            "is_scoring_play": self.is_scoring_play,
+            "batter": self.batter,
+            "pitcher": self.pitcher,
+            "pitch_data": pitches.to_wire(self.pitch_index),
+        }
+        if self.clutch_score is not None:
+            wire["wpa"] = round(self.wpa, 3)
+            wire["leverage_index"] = round(self.leverage_index, 2)
+            wire["home_win_probability"] = round(self.home_win_probability, 3)
+            wire["clutch_score"] = round(self.clutch_score, 4)
+        if self.video_url is not None:
+            wire["video_url"] = self.video_url
+        return wire
+
+
+class PlayLog:
+    """
+    Clutch plays of one game plus the pitch columns they index into
+    """
+
+    __slots__ = ("game_info", "plays", "pitches")
+
+    def __init__(self, game_info):
+        self.game_info = game_info
+        self.plays = []
+        self.pitches = PitchColumns()
+
+    def add(self, play, clutch=None):
+        record = Play.from_feed(play, self.pitches)
+        if clutch is not None:
+            record.wpa = clutch["wpa"]
+            record.leverage_index = clutch["leverage_index"]
+            record.home_win_probability = clutch["home_win_probability"]
+            record.clutch_score = clutch["clutch_score"]
+        self.plays.append(record)
+
+    def to_wire(self):
+        return {
+            "game_info": self.game_info,
+            "key_plays": [play.to_wire(self.pitches) for play in self.plays],
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_wire(), separators=(",", ":"))
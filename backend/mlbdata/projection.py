@@ -0,0 +1,155 @@
+"""
+Per-tool projection of Stats API responses before they reach the model.
+
+Each schema keeps the fields the tool's declaration promises (and the ones
+the frontend reads) and drops links, nested sport references, expected
+records and the rest. A schema is True to keep a value as is, a dict to
+keep some keys of an object, or a one-element list to project every item.
+"""
+import json
+import os
+import threading
+
+VERBOSE = os.environ.get("MLB_TOOL_VERBOSE", "0") == "1"
+
+# Description of the optional boolean "verbose" argument both backends
+# declare on the projected tools
+VERBOSE_DESCRIPTION = (
+    "Set to true only when a field you need is missing from the usual result, "
+    "to get the full Stats API response"
+)
+
+KEEP = True
+
+
+def _keep(*names):
+    return {name: KEEP for name in names}
+
+
+_ID_NAME = _keep("id", "name")
+
+_SEASON_DATES = _keep(
+    "seasonId", "preSeasonStartDate", "preSeasonEndDate", "seasonStartDate", "springStartDate",
+    "springEndDate", "regularSeasonStartDate", "lastDate1stHalf", "allStarDate", "firstDate2ndHalf",
+    "regularSeasonEndDate", "postSeasonStartDate", "postSeasonEndDate", "seasonEndDate",
+    "offseasonStartDate", "offSeasonEndDate", "qualifierPlateAppearances", "qualifierOutsPitched",
+)
+
+SEASONS = {"seasons": [{**_SEASON_DATES, **_keep("hasWildcard", "seasonLevelGamedayType")}]}
+
+LEAGUES = {"leagues": [{
+    **_keep("id", "name", "abbreviation", "nameShort", "seasonState", "hasWildCard", "hasSplitSeason",
+            "numGames", "hasPlayoffPoints", "numTeams", "numWildcardTeams", "season", "conferencesInUse",
+            "divisionsInUse", "active"),
+    "seasonDateInfo": _SEASON_DATES,
+}]}
+
+TEAMS = {"teams": [{
+    **_keep("id", "name", "teamName", "shortName", "franchiseName", "clubName", "abbreviation",
+            "locationName", "firstYearOfPlay", "season", "active", "teamurl"),
+    "venue": _ID_NAME,
+    "springVenue": _ID_NAME,
+    "league": _ID_NAME,
+    "division": _ID_NAME,
+    "springLeague": _ID_NAME,
+}]}
+
+ROSTER = {
+    **_keep("teamId", "rosterType"),
+    "roster": [{
+        **_keep("jerseyNumber", "playerurl"),
+        "person": _keep("id", "fullName"),
+        "position": _keep("name", "abbreviation", "type"),
+        "status": _keep("code", "description"),
+    }],
+}
+
+_RECORD = _keep("wins", "losses", "ties", "pct")
+
+STANDINGS = {"records": [{
+    "standingsType": KEEP,
+    "league": _keep("id"),
+    "division": _keep("id"),
+    "teamRecords": [{
+        **_keep("season", "divisionRank", "leagueRank", "wildCardRank", "gamesPlayed", "gamesBack",
+                "wildCardGamesBack", "divisionGamesBack", "leagueGamesBack", "eliminationNumber",
+                "wins", "losses", "winningPercentage", "runsAllowed", "runsScored", "runDifferential",
+                "divisionChamp", "divisionLeader", "wildCardLeader", "clinched"),
+        "team": _ID_NAME,
+        "streak": _keep("streakCode", "streakType", "streakNumber"),
+        "leagueRecord": _RECORD,
+        "records": {
+            "splitRecords": [{**_RECORD, "type": KEEP}],
+            "divisionRecords": [{**_RECORD, "division": _ID_NAME}],
+            "overallRecords": [{**_RECORD, "type": KEEP}],
+        },
+    }],
+}]}
+
+# Tool name (in either backend) -> schema of its response
+TOOL_SCHEMAS = {
+    "get_mlb_seasons": SEASONS,
+    "get_mlb_leagues": LEAGUES,
+    "get_mlb_teams": TEAMS,
+    "get_mlb_teams_by_season": TEAMS,
+    "get_mlb_teams_by_teamname_season": TEAMS,
+    "get_mlb_roster": ROSTER,
+    "get_roster": ROSTER,
+    "get_team_standings": STANDINGS,
+    "get_standings": STANDINGS,
+}
+
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+def project(value, schema):
+    if schema is KEEP:
+        return value
+    if isinstance(schema, list):
+        return [project(item, schema[0]) for item in value] if isinstance(value, list) else value
+    if isinstance(value, dict):
+        return {key: project(value[key], sub) for key, sub in schema.items() if key in value}
+    return value
+
+
+def _size(value):
+    return len(json.dumps(value, separators=(",", ":")))
+
+
+def project_response(tool, data, verbose=False):
+    """
+    Strip a tool's Stats API response down to its schema and record the
+    bytes saved. Error responses, tools without a schema and verbose
+    calls (or MLB_TOOL_VERBOSE=1) are returned unchanged.
+    """
+    verbose = verbose is True or str(verbose).lower() in ("1", "true", "yes")
+    schema = TOOL_SCHEMAS.get(tool)
+    if schema is None or verbose or VERBOSE or not isinstance(data, dict) or "error" in data:
+        return data
+
+    projected = project(data, schema)
+    raw_bytes, projected_bytes = _size(data), _size(projected)
+    with _stats_lock:
+        entry = _stats.setdefault(tool, {"calls": 0, "raw_bytes": 0, "projected_bytes": 0})
+        entry["calls"] += 1
+        entry["raw_bytes"] += raw_bytes
+        entry["projected_bytes"] += projected_bytes
+    return projected
+
+
+def stats():
+    """
+    Bytes saved per tool. Tokens are estimated at four bytes per token.
+    """
+    with _stats_lock:
+        report = {}
+        for tool, entry in _stats.items():
+            saved = entry["raw_bytes"] - entry["projected_bytes"]
+            report[tool] = {
+                **entry,
+                "saved_bytes": saved,
+                "saved_tokens_est": saved // 4,
+                "saved_ratio": round(saved / entry["raw_bytes"], 3) if entry["raw_bytes"] else 0.0,
+            }
+        return {"verbose": VERBOSE, "tools": report}
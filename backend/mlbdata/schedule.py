@@ -0,0 +1,221 @@
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from mlbdata.archive import get_archive
+from mlbdata.client import STATS_API_BASE, get_client
+
+logger = logging.getLogger(__name__)
+
+WINDOW_REFRESH_SECONDS = float(os.environ.get("MLB_SCHEDULE_REFRESH_SECONDS", 60))
+SEASON_RELOAD_SECONDS = float(os.environ.get("MLB_SCHEDULE_RELOAD_SECONDS", 24 * 60 * 60))
+WINDOW_DAYS = 1
+
+# Regular season and postseason rounds, no spring training or exhibitions
+COMPETITIVE_GAME_TYPES = ("R", "F", "D", "L", "W")
+
+# Ambiguous dates such as 06/02/2024 are read month first, as the Stats API
+# reads them; day-first formats only match when the day is above 12
+DATE_FORMATS = [
+    '%Y-%m-%d',  # YYYY-MM-DD
+    '%m-%d-%Y',  # MM-DD-YYYY
+    '%d-%m-%Y',  # DD-MM-YYYY
+    '%Y/%m/%d',  # YYYY/MM/DD
+    '%m/%d/%Y',  # MM/DD/YYYY
+    '%d/%m/%Y'   # DD/MM/YYYY
+]
+
+
+def normalize_date(gamedate):
+    """
+    Convert a game date in any supported format to YYYY-MM-DD, or None
+    """
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(str(gamedate).strip(), fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return None
+
+
+def _team_ids(game):
+    teams = game.get("teams", {})
+    return [teams.get(side, {}).get("team", {}).get("id") for side in ("away", "home")]
+
+
+class _SeasonIndex:
+    def __init__(self, season):
+        self.season = season
+        # (by_date, by_team_date), replaced as a whole so readers never see
+        # a half-indexed season
+        self.tables = ({}, {})
+        self.loaded_at = None
+        self.refreshed_at = None
+        self.lock = threading.Lock()
+
+    def index_dates(self, dates, reindex=False):
+        """
+        Index dates into fresh tables and swap them in: from scratch, or over
+        a copy of the current tables when reindex is set. Call with lock held.
+        """
+        by_date, by_team_date = (dict(table) for table in self.tables) if reindex else ({}, {})
+        for date_entry in dates:
+            day = date_entry["date"]
+            for game in by_date.get(day, []):
+                for team_id in _team_ids(game):
+                    by_team_date.pop((team_id, day), None)
+
+            games = date_entry.get("games", [])
+            by_date[day] = games
+            for game in games:
+                for team_id in _team_ids(game):
+                    by_team_date.setdefault((team_id, day), []).append(game)
+            for team_id in {t for game in games for t in _team_ids(game)}:
+                by_team_date[(team_id, day)].sort(key=lambda g: g.get("gameNumber", 1))
+        self.tables = (by_date, by_team_date)
+
+
+class ScheduleIndex:
+    """
+    (team_id, date) -> games index built from one season-wide schedule download.
+    Past seasons are loaded once. The current season is reloaded daily and
+    the days around today are refreshed every WINDOW_REFRESH_SECONDS so
+    status and scores stay current. Doubleheaders are returned in
+    gameNumber order.
+    """
+
+    def __init__(self, client=None):
+        self.client = client or get_client()
+        self._seasons = {}
+        self._lock = threading.Lock()
+        self.season_loads = 0
+        self.window_refreshes = 0
+        self.lookups = 0
+
+    def _season(self, season):
+        with self._lock:
+            entry = self._seasons.get(season)
+            if entry is None:
+                entry = self._seasons[season] = _SeasonIndex(season)
+
+        with entry.lock:
+            now = time.monotonic()
+            current = season >= datetime.now().year
+            if entry.loaded_at is None or (current and now - entry.loaded_at > SEASON_RELOAD_SECONDS):
+                self._load(entry)
+            elif current and now - entry.refreshed_at > WINDOW_REFRESH_SECONDS:
+                self._refresh_window(entry)
+        return entry
+
+    def _load(self, entry):
+        # Past seasons are complete, so their schedule comes from the archive once stored
+        archive = get_archive() if entry.season < datetime.now().year else None
+        dates = archive.get_schedule(entry.season) if archive else None
+        if dates is None:
+            data = self.client.fetch_json(f"{STATS_API_BASE}/v1/schedule?sportId=1&season={entry.season}")
+            dates = data.get("dates", [])
+            if archive:
+                archive.put_schedule(entry.season, dates)
+        entry.index_dates(dates)
+        entry.loaded_at = entry.refreshed_at = time.monotonic()
+        self.season_loads += 1
+        logger.info(f"Indexed {sum(len(g) for g in entry.tables[0].values())} games for season {entry.season}")
+
+    def _refresh_window(self, entry):
+        today = date.today()
+        start = (today - timedelta(days=WINDOW_DAYS)).isoformat()
+        end = (today + timedelta(days=WINDOW_DAYS)).isoformat()
+        try:
+            data = self.client.fetch_json(
+                f"{STATS_API_BASE}/v1/schedule?sportId=1&startDate={start}&endDate={end}"
+            )
+        except Exception as e:
+            logger.warning(f"Schedule refresh failed, serving cached index: {e}")
+            return
+
+        dates = data.get("dates", [])
+        returned = {d["date"] for d in dates}
+        for offset in range(-WINDOW_DAYS, WINDOW_DAYS + 1):
+            day = (today + timedelta(days=offset)).isoformat()
+            if day not in returned and day in entry.tables[0]:
+                dates.append({"date": day, "games": []})
+        entry.index_dates((d for d in dates if d["date"].startswith(str(entry.season))), reindex=True)
+        entry.refreshed_at = time.monotonic()
+        self.window_refreshes += 1
+
+    def find_games(self, team_id, gamedate):
+        """
+        Return the schedule entries of a team's games on a date.
+        The entries are shared and must not be modified.
+        """
+        day = normalize_date(gamedate)
+        if day is None:
+            return []
+        try:
+            team_id = int(team_id)
+        except (TypeError, ValueError):
+            return []
+        self.lookups += 1
+        _, by_team_date = self._season(int(day[:4])).tables
+        return list(by_team_date.get((team_id, day), []))
+
+    def find_game(self, team_id, gamedate, game_number=None):
+        """
+        Pick one game: the requested game of a doubleheader, otherwise the
+        game in progress, otherwise the first game of the day
+        """
+        games = self.find_games(team_id, gamedate)
+        if not games:
+            return None
+        if game_number is not None:
+            return next((g for g in games if str(g.get("gameNumber")) == str(game_number)), None)
+        live = [g for g in games if g.get("status", {}).get("abstractGameState") == "Live"]
+        return (live or games)[0]
+
+    def team_games(self, team_id, season, start_date=None, end_date=None, final_only=True):
+        """
+        A team's regular season and postseason games in date order,
+        optionally limited to a YYYY-MM-DD date range
+        """
+        by_date, by_team_date = self._season(int(season)).tables
+        team_id = int(team_id)
+        games = []
+        for day in sorted(by_date):
+            if (start_date and day < start_date) or (end_date and day > end_date):
+                continue
+            for game in by_team_date.get((team_id, day), []):
+                if game.get("gameType") not in COMPETITIVE_GAME_TYPES:
+                    continue
+                if final_only and game.get("status", {}).get("abstractGameState") != "Final":
+                    continue
+                games.append(game)
+        return games
+
+    def game_pks(self, team_id, gamedate):
+        return [g["gamePk"] for g in self.find_games(team_id, gamedate)]
+
+    def stats(self):
+        with self._lock:
+            seasons = list(self._seasons.values())
+        return {
+            "seasons": sorted(s.season for s in seasons if s.loaded_at is not None),
+            "games": sum(len(g) for s in seasons for g in s.tables[0].values()),
+            "season_loads": self.season_loads,
+            "window_refreshes": self.window_refreshes,
+            "lookups": self.lookups,
+        }
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_schedule_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = ScheduleIndex()
+    return _index
@@ -0,0 +1,335 @@
+"""
+Season-wide clutch scan.
+
+Every Final game of a team in a season or date range is read from the
+game archive or streamed with a bounded number of concurrent downloads,
+scored on a process pool and merged into one ranked list. Scored games
+are checkpointed to a JSON file so an interrupted scan picks up where it
+stopped.
+
+A scan runs on a thread of its own. Callers wait for it at most
+SCAN_WAIT_SECONDS and otherwise get its progress and the plays ranked so
+far; a later call for the same range joins the running scan instead of
+starting another one.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from mlbdata.archive import final_game
+from mlbdata.clutch import CLUTCH_TOP_K, init_score_worker, score_game
+from mlbdata.schedule import get_schedule_index, normalize_date
+
+logger = logging.getLogger(__name__)
+
+FETCH_WORKERS = int(os.environ.get("MLB_SCAN_FETCH_WORKERS", 8))
+# 0 scores in the fetching threads instead of a process pool
+SCORE_WORKERS = int(os.environ.get("MLB_SCAN_SCORE_WORKERS", os.cpu_count() or 1))
+CHECKPOINT_DIR = os.environ.get("MLB_SCAN_CHECKPOINT_DIR", os.path.join(tempfile.gettempdir(), "mlb_clutch_scans"))
+CHECKPOINT_EVERY = int(os.environ.get("MLB_SCAN_CHECKPOINT_EVERY", 10))
+# How long a caller waits for a scan before getting its progress instead;
+# below the tool call timeouts so no request thread is held past them
+SCAN_WAIT_SECONDS = float(os.environ.get("MLB_SCAN_WAIT_SECONDS", 15))
+
+_score_pool = None
+_score_pool_lock = threading.Lock()
+
+_scans = {}
+_scans_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {"scans": 0, "games_scored": 0, "games_resumed": 0, "games_failed": 0, "last_scan": None}
+
+
+def _get_score_pool():
+    global _score_pool
+    if _score_pool is None:
+        with _score_pool_lock:
+            if _score_pool is None:
+                # Forking a process with gRPC and HTTP pool threads running is unsafe.
+                # Spawned workers also import the parent's __main__, which is the
+                # server launcher in the images and a side-effect free main.py
+                # otherwise; the tasks and initializer only need mlbdata.clutch
+                _score_pool = ProcessPoolExecutor(max_workers=SCORE_WORKERS,
+                                                  mp_context=multiprocessing.get_context("spawn"),
+                                                  initializer=init_score_worker)
+    return _score_pool
+
+
+def _game_info(game):
+    teams = game["teams"]
+    return {
+        "gamePk": game["gamePk"],
+        "game_date": game.get("officialDate") or game.get("gameDate", "")[:10],
+        "home_team": teams["home"]["team"]["name"],
+        "away_team": teams["away"]["team"]["name"],
+        "home_score": teams["home"].get("score"),
+        "away_score": teams["away"].get("score"),
+    }
+
+
+def _scan_range(season=None, start_date=None, end_date=None):
+    """
+    Normalize the request to (first date, last date, seasons to load)
+    """
+    start = normalize_date(start_date) if start_date else None
+    end = normalize_date(end_date) if end_date else None
+    if (start_date and start is None) or (end_date and end is None):
+        raise ValueError("Dates must be in a supported format such as YYYY-MM-DD")
+    if start is None and end is None:
+        season = int(season or datetime.now().year)
+        return f"{season}-01-01", f"{season}-12-31", [season]
+    start = start or f"{end[:4]}-01-01"
+    end = end or f"{start[:4]}-12-31"
+    if start > end:
+        raise ValueError("start_date must not be after end_date")
+    return start, end, list(range(int(start[:4]), int(end[:4]) + 1))
+
+
+def _checkpoint_path(team_id, start, end):
+    return os.path.join(CHECKPOINT_DIR, f"clutch_{team_id}_{start}_{end}.json")
+
+
+def _load_checkpoint(path, limit):
+    try:
+        with open(path) as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable scan checkpoint {path}: {e}")
+        return {}
+    # Games scored with a smaller per-game limit may be missing plays
+    return {int(pk): game for pk, game in checkpoint.get("games", {}).items() if game.get("limit", 0) >= limit}
+
+
+def _save_checkpoint(path, team_id, start, end, games):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"team_id": team_id, "start_date": start, "end_date": end,
+                   "games": {str(pk): game for pk, game in games.items()}}, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def _timing(values):
+    if not values:
+        return {"total": 0.0, "mean": 0.0, "max": 0.0}
+    return {"total": round(sum(values), 1), "mean": round(sum(values) / len(values), 1), "max": round(max(values), 1)}
+
+
+def _rank(scored, limit):
+    return sorted(
+        ({**play, "game_info": game["game_info"]} for game in scored for play in game["key_plays"]),
+        key=lambda play: play.get("clutch_score", 0.0),
+        reverse=True,
+    )[:limit]
+
+
+class _Scan:
+    """
+    One season scan running on its own thread
+    """
+
+    def __init__(self, team_id, start, end, seasons, limit, fetch_workers):
+        self.team_id = team_id
+        self.start = start
+        self.end = end
+        self.seasons = seasons
+        self.limit = limit
+        self.fetch_workers = fetch_workers
+        self.path = _checkpoint_path(team_id, start, end)
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.games = None
+        self.scored = {}
+        self.closed = False
+        self.result = None
+        self.error = None
+
+    def run(self):
+        try:
+            self.result = self._scan()
+        except Exception as e:
+            logger.warning(f"Season scan {self.team_id} {self.start}..{self.end} failed: {e}")
+            self.error = e
+        finally:
+            with _scans_lock:
+                if _scans.get(self.path) is self:
+                    del _scans[self.path]
+            self.done.set()
+
+    def _scan(self):
+        team_id, start, end = self.team_id, self.start, self.end
+        index = get_schedule_index()
+        games = [g for s in self.seasons for g in index.team_games(team_id, s, start, end)]
+
+        game_pks = {g["gamePk"] for g in games}
+        with self.lock:
+            self.games = len(games)
+            self.scored = {pk: game for pk, game in _load_checkpoint(self.path, self.limit).items() if pk in game_pks}
+            resumed = len(self.scored)
+        failed = []
+        scored_now = set()
+        pool = _get_score_pool() if SCORE_WORKERS > 0 else None
+
+        def fetch_and_score(game):
+            info = _game_info(game)
+            fetch_started = time.perf_counter()
+            plays = final_game(game)["plays"]
+            fetch_ms = (time.perf_counter() - fetch_started) * 1000
+            # Read after the fetch, so a larger limit asked for meanwhile applies
+            with self.lock:
+                limit = self.limit
+            if pool is None:
+                key_plays, score_ms = score_game(info, plays, limit)
+            else:
+                key_plays, score_ms = pool.submit(score_game, info, plays, limit).result()
+            return {"game_info": info, "key_plays": key_plays, "limit": limit,
+                    "fetch_ms": round(fetch_ms, 1), "score_ms": round(score_ms, 1)}
+
+        try:
+            # Games scored before a caller raised the limit are scored again
+            # in another round, until every game has the plays the limit needs
+            while True:
+                with self.lock:
+                    pending = [g for g in games if g["gamePk"] not in failed
+                               and self.scored.get(g["gamePk"], {}).get("limit", 0) < self.limit]
+                    if not pending:
+                        self.closed = True
+                        break
+                with ThreadPoolExecutor(max_workers=max(int(self.fetch_workers), 1),
+                                        thread_name_prefix="mlb-scan") as fetchers:
+                    futures = {fetchers.submit(fetch_and_score, g): g["gamePk"] for g in pending}
+                    for done, future in enumerate(as_completed(futures), 1):
+                        game_pk = futures[future]
+                        try:
+                            game = future.result()
+                            with self.lock:
+                                self.scored[game_pk] = game
+                            scored_now.add(game_pk)
+                        except Exception as e:
+                            logger.warning(f"Season scan: game {game_pk} failed: {e}")
+                            failed.append(game_pk)
+                        if done % CHECKPOINT_EVERY == 0:
+                            self._checkpoint()
+        finally:
+            self._checkpoint()
+
+        scored = self.scored
+        new_games = [scored[g["gamePk"]] for g in games if g["gamePk"] in scored_now]
+        summary = {
+            "status": "done",
+            "team_id": team_id,
+            "start_date": start,
+            "end_date": end,
+            "games": len(games),
+            "scored": len(new_games),
+            "resumed": resumed,
+            "failed": failed,
+            "fetch_workers": self.fetch_workers,
+            "score_workers": SCORE_WORKERS,
+            "wall_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "fetch_ms": _timing([g["fetch_ms"] for g in new_games]),
+            "score_ms": _timing([g["score_ms"] for g in new_games]),
+        }
+        logger.info(f"Season scan {team_id} {start}..{end}: {summary}")
+
+        with _stats_lock:
+            _stats["scans"] += 1
+            _stats["games_scored"] += len(new_games)
+            _stats["games_resumed"] += resumed
+            _stats["games_failed"] += len(failed)
+            _stats["last_scan"] = summary
+
+        return {
+            "summary": summary,
+            "games": [{"gamePk": g["game_info"]["gamePk"], "fetch_ms": g["fetch_ms"], "score_ms": g["score_ms"]}
+                      for g in new_games],
+            "clutch_plays": _rank(scored.values(), self.limit),
+        }
+
+    def join(self, limit):
+        """
+        Raise the scan's limit for a caller that wants more plays. False when
+        the scan has already scored its last round with a smaller limit.
+        """
+        with self.lock:
+            if limit <= self.limit:
+                return True
+            if self.closed:
+                return False
+            self.limit = limit
+            return True
+
+    def _checkpoint(self):
+        with self.lock:
+            scored = dict(self.scored)
+        _save_checkpoint(self.path, self.team_id, self.start, self.end, scored)
+
+    def progress(self, limit):
+        """
+        Report of a scan that is still running: how far it got and the
+        plays ranked so far
+        """
+        with self.lock:
+            scored = list(self.scored.values())
+            games = self.games
+        return {
+            "summary": {
+                "status": "running",
+                "team_id": self.team_id,
+                "start_date": self.start,
+                "end_date": self.end,
+                "games": games,
+                "scored": len(scored),
+                "wall_ms": round((time.perf_counter() - self.started) * 1000, 1),
+                "note": "The scan is still running; ask again shortly for the complete ranking",
+            },
+            "games": [],
+            "clutch_plays": _rank(scored, limit),
+        }
+
+
+def scan_season(team_id, season=None, start_date=None, end_date=None, limit=CLUTCH_TOP_K,
+                fetch_workers=FETCH_WORKERS, wait=SCAN_WAIT_SECONDS):
+    """
+    Rank the clutch plays of every Final game of a team in a season or date range.
+    Returns {"summary", "games", "clutch_plays"}: scan totals, per-game
+    fetch/score timings and the merged top plays, best first. If the scan
+    takes longer than wait seconds, summary["status"] is "running" and the
+    plays are those ranked so far; the scan carries on in the background.
+    """
+    team_id = int(team_id)
+    limit = max(int(limit), 1)
+    start, end, seasons = _scan_range(season, start_date, end_date)
+    path = _checkpoint_path(team_id, start, end)
+
+    # One scan per range: concurrent scans would overwrite each other's checkpoint.
+    # A caller joining a running scan raises its limit, and gets its own slice
+    with _scans_lock:
+        scan = _scans.get(path)
+        if scan is None or not scan.join(limit):
+            scan = _scans[path] = _Scan(team_id, start, end, seasons, limit, fetch_workers)
+            threading.Thread(target=scan.run, name=f"mlb-scan-{team_id}", daemon=True).start()
+
+    if not scan.done.wait(wait):
+        return scan.progress(limit)
+    if scan.error is not None:
+        raise scan.error
+    return {**scan.result, "clutch_plays": scan.result["clutch_plays"][:limit]}
+
+
+def stats():
+    with _stats_lock:
+        report = dict(_stats)
+    with _scans_lock:
+        report["running"] = len(_scans)
+    return report
@@ -0,0 +1,123 @@
+import asyncio
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+def normalize_url(url):
+    """
+    Canonical form of a url so equivalent requests share one key:
+    lower-cased scheme and host, no trailing slash, sorted query parameters
+    """
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one execution.
+    The first caller runs the function, later callers block until it
+    finishes and receive the same result (or exception).
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+            }
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight for coroutines on one event loop. The first caller starts
+    fn() as a task of its own and every caller awaits it shielded, so a
+    caller that is cancelled or times out stops waiting without cancelling
+    the call for the others.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    def _finished(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved when every caller has gone
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key, fn):
+        self.calls += 1
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = self._calls[key] = asyncio.get_running_loop().create_task(fn())
+            task.add_done_callback(lambda done: self._finished(key, done))
+            self.executions += 1
+
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if task.cancelled():
+                # The shared call itself was cancelled (event loop shutdown), not just this caller
+                raise RuntimeError(f"Shared call for {key} was cancelled")
+            raise
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
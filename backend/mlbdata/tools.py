@@ -0,0 +1,104 @@
+"""
+Stats API tools shared by the audio and web backends.
+
+Tools that are a single Stats API GET are declared here as url builders,
+so the blocking path (Flask, tool threads) and the asyncio path (ASGI) send
+the same request and return the same response. Tools with more logic stay
+plain functions in the backends and run on an executor from async code.
+"""
+import asyncio
+import json
+import logging
+from collections import namedtuple
+
+import httpx
+import requests
+
+from mlbdata.aio import get_async_client
+from mlbdata.client import STATS_API_BASE, get_client
+
+logger = logging.getLogger(__name__)
+
+UrlTool = namedtuple("UrlTool", ["path", "decorate"])
+
+
+def _team_logos(data):
+    for team in data.get("teams", []):
+        team["teamurl"] = f"https://www.mlbstatic.com/team-logos/{team['id']}.svg"
+    return data
+
+
+def _player_headshots(data):
+    for player in data.get("roster", []):
+        player["playerurl"] = f"https://securea.mlb.com/mlb/images/players/head_shot/{player['person']['id']}.jpg"
+    return data
+
+
+def _teams_path(params):
+    season = params.get("season")
+    return f"/v1/teams?sportId=1&season={season}" if season else "/v1/teams?sportId=1"
+
+
+def _roster_path(params):
+    return f"/v1/teams/{params['team_id']}/roster/active?season={params['season']}"
+
+
+def _standings_path(params):
+    league_id = params.get("league_id") or params.get("leagueId")
+    return f"/v1/standings?leagueId={league_id}&season={params['season']}"
+
+
+# Tool name (as declared by either backend) -> url builder and response decorator
+URL_TOOLS = {
+    "get_mlb_seasons": UrlTool(lambda params: f"/v1/seasons/{params['season']}?sportId=1", None),
+    "get_mlb_leagues": UrlTool(lambda params: f"/v1/league?sportId=1&season={params['season']}", None),
+    "get_mlb_teams": UrlTool(_teams_path, _team_logos),
+    "get_mlb_teams_by_season": UrlTool(_teams_path, _team_logos),
+    "get_mlb_teams_by_teamname_season": UrlTool(
+        lambda params: f"/v1/teams/{params['team_id']}?sportId=1&season={params['season']}", _team_logos),
+    "get_mlb_roster": UrlTool(_roster_path, _player_headshots),
+    "get_roster": UrlTool(_roster_path, _player_headshots),
+    "get_team_standings": UrlTool(_standings_path, None),
+    "get_standings": UrlTool(_standings_path, None),
+}
+
+
+def _finish(tool, text):
+    # Parsed per call, so decorators may modify the document
+    data = json.loads(text)
+    return tool.decorate(data) if tool.decorate else data
+
+
+def call_url_tool(name, params):
+    """
+    Run a url tool with the blocking client. Failed requests return {"error"}.
+    """
+    tool = URL_TOOLS[name]
+    try:
+        return _finish(tool, get_client().fetch_text(STATS_API_BASE + tool.path(params)))
+    except requests.RequestException as e:
+        logger.error(f"API request failed: {str(e)}")
+        return {"error": str(e)}
+
+
+async def call_url_tool_async(name, params):
+    """
+    Run a url tool on the event loop with the async client
+    """
+    tool = URL_TOOLS[name]
+    try:
+        return _finish(tool, await get_async_client().fetch_text(STATS_API_BASE + tool.path(params)))
+    except httpx.HTTPError as e:
+        logger.error(f"API request failed: {str(e)}")
+        return {"error": str(e)}
+
+
+async def run_function(name, params, functions, executor=None):
+    """
+    Run any tool from async code: url tools without a thread, the backend's
+    other functions on the executor
+    """
+    if name in URL_TOOLS:
+        return await call_url_tool_async(name, params)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functions[name], params)
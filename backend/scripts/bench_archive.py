@@ -0,0 +1,136 @@
+"""
+Benchmark of clutch plays of past games served cold and from the archive.
+
+A local stub of the Stats API answers feed/live, linescore and content
+requests after a fixed delay and counts them. Each simulated Final game
+goes through what get_mlb_clutch_plays does once the game is found: its
+plays and linescore (final_game), clutch scoring and its highlight videos
+(game_highlights), first against an empty archive, which streams and
+archives the game, then again from the archive. Reports latency and
+upstream requests per lookup for both.
+
+    python scripts/bench_archive.py --games 20 --delay-ms 80
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_feed_parse import padded_feed  # noqa: E402
+from mlbdata import archive, feed  # noqa: E402
+from mlbdata.clutch import top_clutch_plays  # noqa: E402
+
+GAME_DATE = "2024-06-02"
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, delay, players):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.delay = delay
+        self.players = players
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def body(self, path):
+        game_pk = int(path.split("/game/")[1].split("/")[0])
+        if path.endswith("/feed/live"):
+            return padded_feed(game_pk, self.players)
+        if path.endswith("/linescore"):
+            return {"currentInning": 9, "teams": {"home": {"runs": 4}, "away": {"runs": 3}}}
+        return {"highlights": {"highlights": {"items": [
+            {"headline": f"Highlight {n}", "id": f"{game_pk}-{n}", "guid": f"{game_pk}-{n * 7}",
+             "playbacks": [{"name": "mp4Avc", "url": f"https://example.com/{game_pk}/{n}.mp4"}]}
+            for n in range(12)]}}}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    wbufsize = -1
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests += 1
+        time.sleep(self.server.delay)
+        data = json.dumps(self.server.body(self.path.split("?")[0])).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def clutch_plays(game):
+    """
+    The get_mlb_clutch_plays work for a game the schedule index has found
+    """
+    record = archive.final_game(game)
+    plays = top_clutch_plays(record["plays"], True, 5)
+    video_urls = archive.video_urls_by_play(archive.game_highlights(game["gamePk"], game))
+    return plays, video_urls
+
+
+def timed(games, server):
+    latencies, requests = [], []
+    for game in games:
+        before = server.requests
+        started = time.perf_counter()
+        clutch_plays(game)
+        latencies.append((time.perf_counter() - started) * 1000)
+        requests.append(server.requests - before)
+    return np.array(latencies), np.array(requests)
+
+
+def report(label, latencies, requests):
+    print(f"  {label:<9} {np.percentile(latencies, 50):8.2f} ms p50 {np.percentile(latencies, 99):8.2f} ms p99 "
+          f"{requests.mean():5.1f} upstream requests per lookup")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5, help="archived lookups of each game")
+    parser.add_argument("--delay-ms", type=float, default=80, help="stub Stats API response time")
+    parser.add_argument("--players", type=int, default=300, help="gameData.players entries of a simulated feed")
+    args = parser.parse_args()
+
+    server = StubServer(args.delay_ms / 1000, args.players)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}/api"
+    archive.STATS_API_BASE = feed.STATS_API_BASE = base
+
+    games = [{"gamePk": game_pk, "officialDate": GAME_DATE, "status": {"abstractGameState": "Final"}}
+             for game_pk in range(1, args.games + 1)]
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, "archive.sqlite3")
+        archive._archive = archive.GameArchive(path)
+        try:
+            cold = timed(games, server)
+            archived = timed(games * args.repeat, server)
+        finally:
+            server.shutdown()
+        stats = archive._archive.stats()
+        # Until a checkpoint the rows are in the write-ahead log
+        size = sum(os.path.getsize(name) for name in (path, path + "-wal") if os.path.exists(name))
+
+    print(f"{args.games} Final games, {args.delay_ms:.0f} ms stub Stats API, "
+          f"{size / args.games / 1024:.0f} KiB archived per game")
+    report("cold", *cold)
+    report("archived", *archived)
+    print(f"  archive: {stats['hits']} hits, {stats['misses']} misses, {stats['mean_read_ms']:.2f} ms mean read")
+
+
+if __name__ == "__main__":
+    main()
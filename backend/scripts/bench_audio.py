@@ -0,0 +1,190 @@
+"""
+Benchmark of the /ws audio path on synthetic audio.
+
+Three parts, each on the module the audio backend uses:
+
+  wire   model audio sent and microphone audio received through AudioWire
+         with base64 JSON frames and with binary frames: wire bytes and
+         encode/decode time per audio second
+  vad    a conversation of speech bursts and noisy silence through
+         VoiceGate: bytes, audio seconds and estimated tokens not sent to
+         Gemini, and VAD time per audio second
+  queue  model audio produced in real time for a client that reads slower:
+         peak depth and bytes held by an unbounded asyncio.Queue (as before
+         the session queues) against the downstream MediaQueue
+
+    python scripts/bench_audio.py --seconds 60 --client-speed 0.5
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+
+import numpy as np
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [BACKEND, os.path.join(BACKEND, "audio")]
+
+from frames import KIND_PCM, AudioWire, pack, wire_stats  # noqa: E402
+from queues import DOWNSTREAM_MAX_MEDIA, MediaQueue  # noqa: E402
+from vad import VoiceGate  # noqa: E402
+
+# Gemini answers with 24 kHz PCM, the browser records 16 kHz
+MODEL_RATE = 24000
+MIC_RATE = 16000
+
+
+class Socket:
+    """
+    WebSocket stand-in that replays client frames and discards what is sent
+    """
+
+    def __init__(self, incoming=()):
+        self.incoming = list(incoming)
+
+    async def receive(self):
+        return self.incoming.pop(0)
+
+    async def send_text(self, text):
+        pass
+
+    async def send_bytes(self, data):
+        pass
+
+
+def pcm_chunks(rng, rate, seconds, chunk_ms):
+    samples = rate * chunk_ms // 1000
+    for _ in range(int(seconds * 1000 // chunk_ms)):
+        yield (rng.normal(0, 3000, samples)).astype("<i2").tobytes()
+
+
+async def run_wire(binary, model_audio, mic_audio):
+    if binary:
+        frames = [{"type": "websocket.receive", "bytes": pack(KIND_PCM, n, chunk)}
+                  for n, chunk in enumerate(mic_audio)]
+    else:
+        frames = [{"type": "websocket.receive", "text": json.dumps({"realtime_input": {"media_chunks": [
+            {"mime_type": "audio/pcm", "data": base64.b64encode(chunk).decode()}]}})} for chunk in mic_audio]
+    wire = AudioWire(Socket(frames), binary=binary)
+    for chunk in model_audio:
+        await wire.send_media("audio/pcm", chunk)
+    for _ in mic_audio:
+        message = await wire.receive()
+        data = message["realtime_input"]["media_chunks"][0]["data"]
+        if isinstance(data, str):
+            base64.b64decode(data)
+
+
+def bench_wire(rng, seconds, chunk_ms):
+    model_audio = list(pcm_chunks(rng, MODEL_RATE, seconds, chunk_ms))
+    mic_audio = list(pcm_chunks(rng, MIC_RATE, seconds, chunk_ms))
+    for binary in (False, True):
+        asyncio.run(run_wire(binary, model_audio, mic_audio))
+    print(f"wire: {seconds} s of model audio out and microphone audio in, {chunk_ms} ms chunks")
+    for protocol, entry in wire_stats.snapshot().items():
+        payload = entry["payload_bytes_in"] + entry["payload_bytes_out"]
+        wire = entry["wire_bytes_in"] + entry["wire_bytes_out"]
+        print(f"  {protocol:<7} {wire / seconds / 1024:7.1f} KiB/s on the wire for {payload / seconds / 1024:5.1f} KiB/s "
+              f"of audio ({entry['wire_overhead_ratio']:+.1%}), codec {entry['codec_ms'] / seconds * 1000:6.1f} us "
+              f"per audio second")
+
+
+def conversation(rng, seconds, talk_fraction, noise_dbfs):
+    """
+    Microphone noise at noise_dbfs with speech-like bursts (a few harmonics
+    under an envelope) covering about talk_fraction of the time
+    """
+    samples = MIC_RATE * seconds
+    audio = rng.normal(0, 32768 * 10 ** (noise_dbfs / 20), samples)
+    position = 0
+    while position < samples:
+        # Bursts and pauses of 1-4 s, pauses scaled to the talk fraction
+        silence = int(rng.uniform(1, 4) * MIC_RATE * (1 - talk_fraction) / talk_fraction)
+        burst = int(rng.uniform(1, 4) * MIC_RATE)
+        start, end = position + silence, min(position + silence + burst, samples)
+        if start >= samples:
+            break
+        t = np.arange(end - start) / MIC_RATE
+        pitch = rng.uniform(100, 220)
+        voice = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 6))
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t) ** 2
+        audio[start:end] += 4000 * voice * envelope
+        position = end
+    return np.clip(audio, -32768, 32767).astype("<i2").tobytes()
+
+
+def bench_vad(rng, seconds, chunk_ms, talk_fraction, noise_dbfs):
+    audio = conversation(rng, seconds, talk_fraction, noise_dbfs)
+    gate = VoiceGate(sample_rate=MIC_RATE)
+    chunk_bytes = MIC_RATE * chunk_ms // 1000 * 2
+    for offset in range(0, len(audio), chunk_bytes):
+        gate.filter(audio[offset:offset + chunk_bytes])
+    stats = gate.stats()
+    print(f"vad: {seconds} s of microphone audio, about {talk_fraction:.0%} speech over {noise_dbfs:.0f} dBFS "
+          f"noise, {chunk_ms} ms chunks")
+    print(f"  {stats['frames_out']}/{stats['frames_in']} frames sent ({stats['voiced_frames']} voiced), "
+          f"{stats['bytes_saved'] / stats['bytes_in']:.0%} of bytes saved, {stats['audio_seconds_saved']} s "
+          f"and ~{stats['tokens_saved_est']} input tokens not sent, {stats['vad_ms'] / seconds * 1000:.0f} us "
+          f"per audio second")
+
+
+async def run_queue(queue, put, chunks, client_speed):
+    """
+    One chunk produced per tick, client_speed chunks consumed per tick.
+    Returns the peak depth.
+    """
+    credit, peak = 0.0, 0
+    for chunk in chunks:
+        await put(queue, chunk)
+        peak = max(peak, queue.qsize() if isinstance(queue, asyncio.Queue) else len(queue))
+        credit += client_speed
+        while credit >= 1 and (queue.qsize() if isinstance(queue, asyncio.Queue) else len(queue)):
+            await queue.get()
+            credit -= 1
+    return peak
+
+
+def bench_queue(rng, seconds, chunk_ms, client_speed):
+    chunks = list(pcm_chunks(rng, MODEL_RATE, seconds, chunk_ms))
+    chunk_bytes = len(chunks[0])
+
+    async def unbounded_put(queue, chunk):
+        await queue.put(chunk)
+
+    async def media_put(queue, chunk):
+        await queue.put(chunk, media=True)
+
+    async def both():
+        unbounded = await run_queue(asyncio.Queue(), unbounded_put, chunks, client_speed)
+        bounded_queue = MediaQueue(DOWNSTREAM_MAX_MEDIA)
+        bounded = await run_queue(bounded_queue, media_put, chunks, client_speed)
+        return unbounded, bounded, bounded_queue.stats()
+
+    unbounded, bounded, stats = asyncio.run(both())
+    print(f"queue: {seconds} s of model audio, client reading at {client_speed:.0%} of real time")
+    print(f"  unbounded   peak {unbounded:6} chunks {unbounded * chunk_bytes / 1024:8.0f} KiB, "
+          f"{unbounded * chunk_ms / 1000:6.1f} s behind")
+    print(f"  MediaQueue  peak {bounded:6} chunks {bounded * chunk_bytes / 1024:8.0f} KiB, "
+          f"{bounded * chunk_ms / 1000:6.1f} s behind, {stats['dropped']} dropped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=int, default=60)
+    parser.add_argument("--chunk-ms", type=int, default=40)
+    parser.add_argument("--talk", type=float, default=0.3, help="fraction of the microphone audio that is speech")
+    parser.add_argument("--noise-dbfs", type=float, default=-65, help="microphone noise level between speech")
+    parser.add_argument("--client-speed", type=float, default=0.5, help="client read rate, 1 is real time")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    bench_wire(rng, args.seconds, args.chunk_ms)
+    bench_vad(rng, args.seconds, args.chunk_ms, args.talk, args.noise_dbfs)
+    bench_queue(rng, args.seconds, args.chunk_ms, args.client_speed)
+
+
+if __name__ == "__main__":
+    main()
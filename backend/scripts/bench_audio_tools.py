@@ -0,0 +1,86 @@
+"""
+Benchmark of audio frame forwarding while sessions run tool calls.
+
+Each simulated /ws session forwards a 20 ms audio frame on schedule and
+keeps calling a tool whose blocking Stats API request is a fixed sleep.
+Tools run either inline on the event loop (as before tool calls moved off
+it) or through execute_function_call, on the tool executor with the
+per-session slots. Reports how late frames are forwarded against their
+schedule, for a growing number of sessions.
+
+    python scripts/bench_audio_tools.py --sessions 1 8 32 --tool-ms 200
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [BACKEND, os.path.join(BACKEND, "audio")]
+
+import main as audio  # noqa: E402
+
+FRAME_MS = 20
+TOOL = "get_game_data"
+
+
+async def forward_frames(seconds, lateness):
+    """
+    Forward one frame every FRAME_MS, recording how late each one went out
+    """
+    started = time.perf_counter()
+    for n in range(int(seconds * 1000 / FRAME_MS)):
+        due = started + n * FRAME_MS / 1000
+        await asyncio.sleep(max(due - time.perf_counter(), 0))
+        lateness.append((time.perf_counter() - due) * 1000)
+
+
+async def call_tools(seconds, offloaded, calls):
+    slots = asyncio.Semaphore(audio.TOOL_CALLS_PER_SESSION)
+    call = SimpleNamespace(name=TOOL, args={"team_id": "147", "gamedate": "2024-06-02"}, id="1")
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        if offloaded:
+            await audio.execute_function_call(call, slots)
+        else:
+            audio.function_handler[TOOL](call.args)
+            # The old handler still yielded between calls
+            await asyncio.sleep(0)
+        calls[0] += 1
+
+
+async def run(sessions, seconds, offloaded):
+    lateness, calls = [], [0]
+    # execute_function_call prints each call's arguments
+    with contextlib.redirect_stdout(io.StringIO()):
+        await asyncio.gather(*(forward_frames(seconds, lateness) for _ in range(sessions)),
+                             *(call_tools(seconds, offloaded, calls) for _ in range(sessions)))
+    return np.array(lateness), calls[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--tool-ms", type=float, default=200, help="blocking time of one tool call")
+    parser.add_argument("--seconds", type=float, default=3)
+    args = parser.parse_args()
+
+    audio.function_handler[TOOL] = lambda params: time.sleep(args.tool_ms / 1000) or "{}"
+    print(f"{args.tool_ms:.0f} ms blocking tool calls, {FRAME_MS} ms frames, {args.seconds:.0f} s per run, "
+          f"{audio.TOOL_WORKERS} tool workers")
+    print(f"{'sessions':>8} {'tools':<9} {'late p50':>9} {'late p99':>9} {'late max':>9} {'tool calls':>11}")
+    for sessions in args.sessions:
+        for offloaded in (False, True):
+            lateness, calls = asyncio.run(run(sessions, args.seconds, offloaded))
+            print(f"{sessions:>8} {'executor' if offloaded else 'inline':<9} {np.percentile(lateness, 50):6.1f} ms "
+                  f"{np.percentile(lateness, 99):6.1f} ms {lateness.max():6.1f} ms {calls:>11}")
+
+
+if __name__ == "__main__":
+    main()
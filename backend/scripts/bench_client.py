@@ -0,0 +1,167 @@
+"""
+Benchmark of the pooled Stats API client against a local stub server.
+
+The stub answers every GET with a Stats API sized JSON body after a fixed
+delay and counts the connections it accepts. Reports latency and
+connections opened for fresh-connection requests (requests.get, as before
+the shared client) against the pooled StatsApiClient, then how many
+upstream calls a burst of identical concurrent requests costs with
+coalescing and with the reference data cache. The stub is plain HTTP on
+loopback, so the connection cost measured leaves out TLS and network
+round trips; with --url the fresh/pooled comparison runs against a real
+endpoint instead.
+
+    python scripts/bench_client.py --requests 200 --delay-ms 20
+    python scripts/bench_client.py --url https://statsapi.mlb.com/api/v1/seasons/2024?sportId=1
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mlbdata.client import StatsApiClient  # noqa: E402
+
+BODY = json.dumps({"teams": [{"id": n, "name": f"Team {n}", "link": f"/api/v1/teams/{n}"} for n in range(30)]}).encode()
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, delay):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+
+    def count(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def reset(self):
+        with self.lock:
+            self.connections = self.requests = 0
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # One write per response: separate header and body writes on a kept-alive
+    # connection stall on delayed ACKs and would hide the pooling gain
+    wbufsize = -1
+
+    def setup(self):
+        super().setup()
+        self.server.count("connections")
+
+    def do_GET(self):
+        self.server.count("requests")
+        time.sleep(self.server.delay)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def timed(get, urls, concurrency):
+    def one(url):
+        started = time.perf_counter()
+        get(url)
+        return (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = np.array(list(pool.map(one, urls)))
+    return latencies, time.perf_counter() - started
+
+
+def report(label, latencies, elapsed, server=None):
+    line = (f"  {label:<8} {np.percentile(latencies, 50):7.2f} ms p50 {np.percentile(latencies, 99):7.2f} ms p99 "
+            f"{len(latencies) / elapsed:8.0f} req/s")
+    if server is not None:
+        line += f"  {server.connections} connections"
+    print(line)
+
+
+def bench_pooling(url, requests_count, concurrency, server):
+    client = StatsApiClient()
+
+    def fresh(target):
+        response = requests.get(target, timeout=client.timeout, headers={"Accept-Encoding": "gzip, deflate"})
+        response.raise_for_status()
+        return response.text
+
+    def pooled(target):
+        response = client.get(target)
+        response.raise_for_status()
+        return response.text
+
+    urls = [url] * requests_count
+    print(f"pooling: {requests_count} GETs, {concurrency} at a time")
+    for label, get in (("fresh", fresh), ("pooled", pooled)):
+        get(url)  # warm up DNS and, for the pooled client, one connection
+        if server is not None:
+            server.reset()
+        latencies, elapsed = timed(get, urls, concurrency)
+        report(label, latencies, elapsed, server)
+    client.close()
+
+
+def bench_coalescing(base, callers, server):
+    print(f"coalescing: {callers} identical requests at once")
+    for label, path in (("live", "/api/v1/game/1/feed/live"), ("teams", "/api/v1/teams")):
+        client = StatsApiClient()
+        server.reset()
+        start = threading.Barrier(callers)
+
+        def call(_):
+            start.wait()
+            return client.fetch_text(base + path)
+
+        with ThreadPoolExecutor(max_workers=callers) as pool:
+            list(pool.map(call, range(callers)))
+        # A second burst after the first finished: only cached reference data avoids the upstream
+        with ThreadPoolExecutor(max_workers=callers) as pool:
+            list(pool.map(call, range(callers)))
+        flights = client.text_flights.stats()
+        print(f"  {label:<8} {2 * callers} calls, {server.requests} upstream requests, "
+              f"{flights['coalesced']} coalesced, {client.cache.stats()['hits']} cache hits")
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--callers", type=int, default=32, help="identical concurrent requests for coalescing")
+    parser.add_argument("--delay-ms", type=float, default=20, help="stub server response time")
+    parser.add_argument("--url", help="benchmark pooling against this url instead of the stub")
+    args = parser.parse_args()
+
+    server = StubServer(args.delay_ms / 1000)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        if args.url:
+            bench_pooling(args.url, args.requests, args.concurrency, None)
+        else:
+            bench_pooling(base + "/api/v1/game/1/feed/live", args.requests, args.concurrency, server)
+        bench_coalescing(base, args.callers, server)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
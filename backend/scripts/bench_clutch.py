@@ -0,0 +1,178 @@
+"""
+Benchmark of the clutch pipeline on simulated games.
+
+Games are played out with the same plate-appearance model the clutch
+tables are built from and shaped like feed/live allPlays entries. Reports
+the table build time, the cost of scoring one game, and the memory and
+serialization cost of a season of plays kept as per-play dicts (the old
+extract_play_data) against PlayLog records.
+
+    python scripts/bench_clutch.py --games 162
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mlbdata import clutch  # noqa: E402
+from mlbdata.plays import PlayLog  # noqa: E402
+
+EVENTS = ["Groundout", "Walk", "Single", "Double", "Triple", "Home Run"]
+PITCH_TYPES = ["Four-Seam Fastball", "Slider", "Changeup", "Curveball", "Sinker"]
+
+
+def simulate_game(rng, game_pk):
+    """
+    allPlays of one game, with the fields the clutch scorer and PlayLog read
+    """
+    plays = []
+    score = {"home": 0, "away": 0}
+    inning = 0
+    while True:
+        inning += 1
+        for top in (True, False):
+            if not top and inning >= clutch.REGULATION and score["home"] > score["away"]:
+                return plays
+            side = "away" if top else "home"
+            outs = 0
+            bases = clutch.SECOND if inning > clutch.REGULATION else 0
+            while outs < 3:
+                event = int(rng.choice(6, p=clutch.EVENT_PROBABILITIES))
+                men_on = "Empty" if not bases else "RISP" if bases & (clutch.SECOND | clutch.THIRD) else "Men_On"
+                outs, bases, runs = clutch._advance(outs, bases, event)
+                score[side] += runs
+                bases = bases if outs < 3 else 0
+                number = len(plays)
+                plays.append({
+                    "result": {"event": EVENTS[event], "description": f"Batter {number % 9} {EVENTS[event].lower()}.",
+                               "homeScore": score["home"], "awayScore": score["away"]},
+                    "about": {"inning": inning, "isTopInning": top, "isComplete": True, "isScoringPlay": runs > 0},
+                    "count": {"outs": outs},
+                    "matchup": {
+                        "batter": {"id": 600000 + number % 9, "fullName": f"Batter {number % 9}"},
+                        "pitcher": {"id": 500000 + inning, "fullName": f"Pitcher {inning % 4}"},
+                        "postOnFirst": {"id": 1} if bases & clutch.FIRST else None,
+                        "postOnSecond": {"id": 2} if bases & clutch.SECOND else None,
+                        "postOnThird": {"id": 3} if bases & clutch.THIRD else None,
+                        "splits": {"menOnBase": men_on},
+                    },
+                    "playEvents": [{"playId": f"{game_pk}-{number}-{pitch}"} for pitch in range(3)] + [{
+                        "playId": f"{game_pk}-{number}",
+                        "pitchData": {"startSpeed": float(rng.normal(93, 3)), "endSpeed": float(rng.normal(85, 3)),
+                                      "breaks": {"spinRate": int(rng.normal(2300, 200))}},
+                        "details": {"type": {"description": PITCH_TYPES[number % 5]}},
+                    }],
+                })
+                if not top and inning >= clutch.REGULATION and score["home"] > score["away"]:
+                    return plays
+        if inning >= clutch.REGULATION and score["home"] != score["away"]:
+            return plays
+
+
+def extract_play_data(play):
+    """
+    The per-play dict the clutch tool built before PlayLog
+    """
+    last = play["playEvents"][-1]
+    pitch = last.get("pitchData")
+    return {
+        "play_id": last.get("playId", ""),
+        "inning": play["about"]["inning"],
+        "is_top_inning": play["about"]["isTopInning"],
+        "event": play["result"]["event"],
+        "description": play["result"]["description"],
+        "is_scoring_play": play["about"]["isScoringPlay"],
+        "batter": play["matchup"]["batter"]["fullName"],
+        "pitcher": play["matchup"]["pitcher"]["fullName"],
+        "pitch_data": {} if pitch is None else {
+            "start_speed": pitch.get("startSpeed"),
+            "end_speed": pitch.get("endSpeed"),
+            "spin_rate": pitch.get("breaks", {}).get("spinRate"),
+            "pitch_type": last.get("details", {}).get("type", {}).get("description"),
+        },
+    }
+
+
+def measure(build):
+    """
+    Bytes still allocated after build() returns, and its result
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return retained, result
+
+
+def bench_tables(repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        clutch._build_tables()
+        timings.append((time.perf_counter() - started) * 1000)
+    print(f"tables: built in {min(timings):.1f} ms (best of {repeat})")
+
+
+def bench_scoring(games):
+    timings = []
+    for plays in games:
+        started = time.perf_counter()
+        clutch.top_clutch_plays(plays, final=True)
+        timings.append((time.perf_counter() - started) * 1e6)
+    timings = np.array(timings)
+    plays = sum(len(g) for g in games)
+    print(f"scoring: {len(games)} games, {plays} plate appearances, "
+          f"{timings.mean():.0f} us mean / {np.percentile(timings, 95):.0f} us p95 per game, "
+          f"{plays / (timings.sum() / 1e6):,.0f} plate appearances/s")
+
+
+def bench_records(games):
+    dict_bytes, dict_plays = measure(lambda: [[extract_play_data(p) for p in plays] for plays in games])
+    log_bytes, logs = measure(lambda: [_play_log(plays, number) for number, plays in enumerate(games)])
+
+    started = time.perf_counter()
+    dict_json = [json.dumps({"game_info": {"gamePk": n}, "key_plays": plays}, indent=2)
+                 for n, plays in enumerate(dict_plays)]
+    dict_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    log_json = [log.to_json() for log in logs]
+    log_ms = (time.perf_counter() - started) * 1000
+
+    plays = sum(len(g) for g in games)
+    print(f"records: {plays} plays kept")
+    print(f"  dicts   {dict_bytes / 1024:9.0f} KiB  {dict_bytes / plays:6.0f} B/play  "
+          f"json {sum(map(len, dict_json)) / 1024:7.0f} KiB in {dict_ms:6.1f} ms")
+    print(f"  PlayLog {log_bytes / 1024:9.0f} KiB  {log_bytes / plays:6.0f} B/play  "
+          f"json {sum(map(len, log_json)) / 1024:7.0f} KiB in {log_ms:6.1f} ms")
+
+
+def _play_log(plays, game_pk):
+    log = PlayLog({"gamePk": game_pk})
+    for play in plays:
+        log.add(play)
+    return log
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--games", type=int, default=162)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    games = [simulate_game(rng, n) for n in range(args.games)]
+    bench_tables(args.repeat)
+    bench_scoring(games)
+    bench_records(games)
+
+
+if __name__ == "__main__":
+    main()
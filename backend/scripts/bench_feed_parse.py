@@ -0,0 +1,136 @@
+"""
+Benchmark of streaming feed/live parsing against a full json parse.
+
+Each archived feed/live document is parsed in a fresh interpreter, once
+with json.load and projecting allPlays afterwards (the old response.json()
+path and MLB_FEED_STREAMING=0) and once with mlbdata.feed's streaming
+iter_projected_plays, so peak RSS is not shared between the two. Reports
+parse time and peak RSS growth (VmHWM, so Linux only) over the
+interpreter with its imports loaded. Without recorded feeds, simulated
+games are padded with pitch data, players and a boxscore to the size of a
+real final feed.
+
+    python scripts/bench_feed_parse.py
+    python scripts/bench_feed_parse.py --recorded feed_745927.json feed_745928.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mlbdata import feed  # noqa: E402
+
+
+def padded_feed(seed, players):
+    """
+    A simulated final game in the shape and about the size of feed/live
+    """
+    import numpy as np
+    from bench_clutch import simulate_game
+
+    rng = np.random.default_rng(seed)
+    plays = simulate_game(rng, seed)
+    for play in plays:
+        for event in play["playEvents"]:
+            event.setdefault("pitchData", {}).update(
+                {"coordinates": {f"p{axis}": float(rng.normal()) for axis in "xyz"} | {
+                    f"{name}{axis}": float(rng.normal()) for name in ("a", "v", "x", "pfx") for axis in "xyz"},
+                 "strikeZoneTop": 3.4, "strikeZoneBottom": 1.6, "zone": int(rng.integers(1, 15))})
+            event.update({"details": {**event.get("details", {}), "call": {"code": "B", "description": "Ball"},
+                                      "description": "Ball", "isInPlay": False, "isStrike": False},
+                          "count": {"balls": 1, "strikes": 0, "outs": play["count"]["outs"]},
+                          "startTime": "2024-06-02T17:10:00.000Z", "endTime": "2024-06-02T17:10:20.000Z",
+                          "isPitch": True, "type": "pitch"})
+        play["runners"] = [{"movement": {"start": None, "end": "1B", "isOut": False},
+                            "details": {"event": play["result"]["event"], "runner": play["matchup"]["batter"]},
+                            "credits": [{"player": {"id": 1}, "position": {"code": "6"}, "credit": "f_fielded_ball"}]}]
+    stats = {group: {f"stat{k}": k for k in range(40)} for group in ("batting", "pitching", "fielding")}
+    roster = {f"ID{600000 + n}": {"id": 600000 + n, "fullName": f"Player {n}", "birthCity": "Somewhere",
+                                  "primaryPosition": {"code": "6", "name": "Shortstop"}, "height": "6' 1\"",
+                                  "weight": 200, "mlbDebutDate": "2019-04-01", "batSide": {"code": "R"}}
+              for n in range(players)}
+    boxscore = {side: {"players": {key: {"person": value, "stats": stats, "seasonStats": stats}
+                                   for key, value in list(roster.items())[:players // 2]}}
+                for side in ("away", "home")}
+    return {"metaData": {"timeStamp": "final"},
+            "gameData": {"status": {"abstractGameState": "Final"}, "players": roster},
+            "liveData": {"plays": {"allPlays": plays, "currentPlay": plays[-1]}, "boxscore": boxscore}}
+
+
+def peak_rss_kib():
+    # ru_maxrss survives exec and would report the parent's peak
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+
+
+def parse(mode, path):
+    """
+    Runs in the child: parse one document and report time and peak RSS
+    """
+    baseline = peak_rss_kib()
+    started = time.perf_counter()
+    with open(path, "rb") as f:
+        if mode == "stream":
+            plays = list(feed.iter_projected_plays(f))
+        else:
+            plays = [feed.project_play(play) for play in json.load(f)["liveData"]["plays"]["allPlays"]]
+    elapsed = (time.perf_counter() - started) * 1000
+    peak = peak_rss_kib()
+    print(json.dumps({"ms": elapsed, "rss_kib": peak - baseline, "plays": len(plays)}))
+
+
+def measure(mode, path):
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, path],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def main():
+    # numpy is only imported by the parent, so a child's RSS before parsing
+    # is the interpreter and mlbdata.feed
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recorded", nargs="+", help="archived feed/live JSON documents")
+    parser.add_argument("--games", type=int, default=5, help="simulated games without --recorded")
+    parser.add_argument("--players", type=int, default=300, help="gameData.players entries of a simulated game")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        parse(*args.child)
+        return
+    if feed.ijson is None:
+        print("ijson is not installed, the streaming path would fall back to json.load")
+        return
+
+    import numpy as np
+
+    with tempfile.TemporaryDirectory() as scratch:
+        paths = list(args.recorded or [])
+        for seed in range(0 if paths else args.games):
+            path = os.path.join(scratch, f"feed_{seed}.json")
+            with open(path, "w") as f:
+                json.dump(padded_feed(seed, args.players), f)
+            paths.append(path)
+
+        print(f"{len(paths)} feeds, {feed.ijson.backend} ijson backend")
+        print(f"{'feed':>6} {'size':>9} {'plays':>6} {'json ms':>8} {'stream ms':>10} {'json RSS':>10} {'stream RSS':>11}")
+        results = {"json": [], "stream": []}
+        for number, path in enumerate(paths):
+            full, streamed = measure("json", path), measure("stream", path)
+            results["json"].append(full)
+            results["stream"].append(streamed)
+            print(f"{number:>6} {os.path.getsize(path) / 1024 / 1024:7.2f} MiB {streamed['plays']:>6} "
+                  f"{full['ms']:8.1f} {streamed['ms']:10.1f} {full['rss_kib'] / 1024:6.1f} MiB "
+                  f"{streamed['rss_kib'] / 1024:7.1f} MiB")
+        for mode, runs in results.items():
+            print(f"  {mode:<6} {np.median([r['ms'] for r in runs]):7.1f} ms median parse "
+                  f"{np.median([r['rss_kib'] for r in runs]) / 1024:7.1f} MiB median peak RSS growth")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark of the /ws camera frame policy on a recorded or synthetic session.
+
+Frames go through images.FramePolicy with their capture timestamps, once
+per policy stage: forwarding everything (as before the policy), the
+MAX_FPS limit alone, the limit with dHash duplicate suppression, and the
+full policy that also downscales and recompresses. Reports frames and
+bytes per minute sent to Gemini and the policy's time per input frame.
+The synthetic session is a mostly static scene with sensor noise and a
+moving object part of the time, captured as 1280x720 JPEGs.
+
+    python scripts/bench_images.py --seconds 60 --fps 5
+    python scripts/bench_images.py --recorded session_frames/ --fps 5
+"""
+import argparse
+import io
+import os
+import sys
+
+import numpy as np
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [BACKEND, os.path.join(BACKEND, "audio")]
+
+import images  # noqa: E402
+from images import FramePolicy  # noqa: E402
+
+
+def synthetic_session(rng, seconds, fps, width=1280, height=720, motion=0.25, quality=85):
+    """
+    JPEG frames of a static scene (a gradient wall and a few panels) with
+    sensor noise, and an object moving across it for about motion of the time
+    """
+    y, x = np.mgrid[0:height, 0:width]
+    scene = np.stack([80 + 60 * x / width, 90 + 50 * y / height, np.full((height, width), 110.0)], axis=-1)
+    for _ in range(6):
+        top, left = rng.integers(0, height - 150), rng.integers(0, width - 250)
+        scene[top:top + 150, left:left + 250] = rng.uniform(20, 230, 3)
+    moving_until = 0
+    frames = []
+    for n in range(int(seconds * fps)):
+        frame = scene + rng.normal(0, 3, scene.shape)
+        if n >= moving_until and rng.random() < motion / (2 * fps):
+            # Moves for about two seconds
+            moving_until = n + 2 * fps
+        if n < moving_until:
+            left = int((n % (2 * fps)) / (2 * fps) * (width - 200))
+            frame[height // 3:height // 3 + 200, left:left + 200] = (200, 40, 40)
+        output = io.BytesIO()
+        images.Image.fromarray(np.clip(frame, 0, 255).astype(np.uint8)).save(output, format="JPEG", quality=quality)
+        frames.append(output.getvalue())
+    return frames
+
+
+def recorded_session(directory):
+    names = sorted(name for name in os.listdir(directory) if name.lower().endswith((".jpg", ".jpeg")))
+    frames = []
+    for name in names:
+        with open(os.path.join(directory, name), "rb") as f:
+            frames.append(f.read())
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recorded", help="directory of a session's JPEG frames, in capture order")
+    parser.add_argument("--seconds", type=float, default=60, help="length of the synthetic session")
+    parser.add_argument("--fps", type=float, default=5, help="capture rate of the session")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if images.Image is None:
+        print("Pillow is not installed, the policy would only drop byte-identical frames")
+        return
+    frames = recorded_session(args.recorded) if args.recorded else synthetic_session(
+        np.random.default_rng(args.seed), args.seconds, args.fps)
+    width, height = images.Image.open(io.BytesIO(frames[0])).size
+    minutes = len(frames) / args.fps / 60
+    print(f"{len(frames)} frames of {width}x{height} at {args.fps:g} fps, "
+          f"{sum(map(len, frames)) / len(frames) / 1024:.0f} KiB each")
+
+    stages = (
+        ("everything", None),
+        ("max fps", FramePolicy(duplicate_bits=-1, max_side=0)),
+        ("+ dedup", FramePolicy(max_side=0)),
+        ("+ downscale", FramePolicy()),
+    )
+    print(f"  {'policy':<12} {'frames/min':>10} {'KiB/min':>9} {'ms/frame':>9}")
+    for label, policy in stages:
+        if policy is None:
+            sent = frames
+            policy_ms = 0.0
+        else:
+            sent = [out for n, data in enumerate(frames) if (out := policy.filter(data, now=n / args.fps)) is not None]
+            policy_ms = policy.policy_ms
+        sent_bytes = sum(map(len, sent))
+        print(f"  {label:<12} {len(sent) / minutes:10.1f} {sent_bytes / minutes / 1024:9.0f} "
+              f"{policy_ms / len(frames):9.2f}")
+
+
+if __name__ == "__main__":
+    main()
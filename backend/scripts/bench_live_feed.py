@@ -0,0 +1,158 @@
+"""
+Benchmark of the live feed tracker's diffPatch updates against full refetches.
+
+A local stub of the Stats API replays a game one plate appearance per
+update: feed/live answers with the game so far and feed/live/diffPatch
+with the operations since the caller's timecode. One LiveGameTracker
+follows the game with diffPatch, another downloads the full feed on every
+update as the tools did before. Reports bytes received and parse (plus
+patch) time per update, over the whole game and its last quarter, and
+checks the patched feed ends up equal to the full one. The game is a
+recorded feed/live file, or simulated plays with --players padding
+standing in for gameData.players. Bytes are uncompressed; the Stats API
+gzips both endpoints.
+
+    python scripts/bench_live_feed.py
+    python scripts/bench_live_feed.py --recorded feed_745927.json
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_clutch import simulate_game  # noqa: E402
+from mlbdata import live  # noqa: E402
+from mlbdata.client import StatsApiClient  # noqa: E402
+
+
+def simulated_feed(players, seed=7):
+    plays = simulate_game(np.random.default_rng(seed), 1)
+    roster = {f"ID{600000 + n}": {"id": 600000 + n, "fullName": f"Player {n}", "stats": {
+        "batting": {f"stat{k}": k * n for k in range(60)}, "pitching": {f"stat{k}": k + n for k in range(60)}}}
+        for n in range(players)}
+    return {"metaData": {"timeStamp": "final"},
+            "gameData": {"status": {"abstractGameState": "Final", "detailedState": "Final"}, "players": roster},
+            "liveData": {"plays": {"allPlays": plays, "currentPlay": plays[-1]}, "linescore": {}}}
+
+
+class Replay:
+    """
+    The recorded game as it stood after each plate appearance
+    """
+
+    def __init__(self, feed):
+        self.feed = feed
+        self.plays = feed["liveData"]["plays"]["allPlays"]
+        self.step = 1
+
+    def timecode(self, step):
+        return f"{step:08d}"
+
+    def document(self):
+        feed = copy.copy(self.feed)
+        final = self.step >= len(self.plays)
+        status = self.feed["gameData"]["status"] if final else {"abstractGameState": "Live",
+                                                                "detailedState": "In Progress"}
+        feed["metaData"] = {**self.feed.get("metaData", {}), "timeStamp": self.timecode(self.step)}
+        feed["gameData"] = {**self.feed["gameData"], "status": status}
+        plays = self.plays[:self.step]
+        feed["liveData"] = {**self.feed["liveData"], "plays": {"allPlays": plays, "currentPlay": plays[-1]}}
+        return feed
+
+    def diff_patch(self, timecode):
+        start = int(timecode)
+        patches = []
+        for step in range(start + 1, self.step + 1):
+            play = self.plays[step - 1]
+            diff = [{"op": "add", "path": "/liveData/plays/allPlays/-", "value": play},
+                    {"op": "replace", "path": "/liveData/plays/currentPlay", "value": play},
+                    {"op": "replace", "path": "/metaData/timeStamp", "value": self.timecode(step)}]
+            if step == len(self.plays):
+                diff.append({"op": "replace", "path": "/gameData/status", "value": self.feed["gameData"]["status"]})
+            patches.append({"diff": diff})
+        return patches
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    wbufsize = -1
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        replay = self.server.replay
+        if url.path.endswith("/diffPatch"):
+            body = replay.diff_patch(parse_qs(url.query)["startTimecode"][0])
+        else:
+            body = replay.document()
+        data = json.dumps(body, separators=(",", ":")).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def summarize(label, updates):
+    data = np.array([u["bytes"] for u in updates])
+    parse = np.array([u["parse_ms"] for u in updates])
+    late = slice(len(updates) * 3 // 4, None)
+    print(f"  {label:<6} {data.sum() / 1024 / 1024:8.1f} MiB total {data.mean() / 1024:9.1f} KiB/update "
+          f"{data[late].mean() / 1024:9.1f} KiB/update late   {parse.mean():7.2f} ms/update "
+          f"{parse[late].mean():7.2f} ms late")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recorded", help="feed/live JSON of a game to replay")
+    parser.add_argument("--players", type=int, default=60, help="simulated gameData.players entries")
+    args = parser.parse_args()
+
+    if args.recorded:
+        with open(args.recorded) as f:
+            feed = json.load(f)
+    else:
+        feed = simulated_feed(args.players)
+    replay = Replay(feed)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.replay = replay
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    live.STATS_API_BASE = f"http://127.0.0.1:{server.server_address[1]}/api"
+
+    client = StatsApiClient()
+    patched = live.LiveGameTracker(1, client)
+    full = live.LiveGameTracker(1, client)
+    patch_updates, full_updates = [], []
+    try:
+        patched.refresh(force=True)
+        for step in range(2, len(replay.plays) + 1):
+            replay.step = step
+            patched.refresh(force=True)
+            patch_updates.append(patched.last_update)
+            full._full_fetch()
+            full_updates.append(full.last_update)
+    finally:
+        server.shutdown()
+        client.close()
+
+    print(f"{len(replay.plays)} plate appearances, full feed {full_updates[-1]['bytes'] / 1024:.0f} KiB at the end")
+    summarize("full", full_updates)
+    summarize("patch", patch_updates)
+    print(f"  patched feed {'matches' if patched.feed == full.feed else 'DIFFERS from'} the full feed, "
+          f"{patched.full_fetches} full fetches by the patching tracker")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Load test of the audio backend's live game subscriptions.
+
+Thousands of subscribers, each a session downstream MediaQueue drained by
+its own task as on /ws, follow a recorded game through GameSubscriptions.
+The game is replayed one plate appearance per poll from a feed/live JSON
+file (or a synthetic game when none is given), so the run takes seconds.
+Reports upstream feed reads against the reads one poller per subscriber
+would make, messages delivered, fan-out latency from broadcast to each
+subscriber's queue read, and the worst event loop stall.
+
+    python scripts/bench_live_subscriptions.py --subscribers 5000
+    python scripts/bench_live_subscriptions.py --recorded feed_745927.json --subscribers 5000 --games 4
+    python scripts/bench_live_subscriptions.py --subscribers 2000 --stalled 0.01 --send-timeout 0.5
+"""
+import argparse
+import asyncio
+import contextlib
+import copy
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [BACKEND, os.path.join(BACKEND, "audio")]
+
+import main as audio  # noqa: E402
+from queues import DOWNSTREAM_MAX_MEDIA, MediaQueue  # noqa: E402
+
+EVENTS = ("Strikeout", "Groundout", "Flyout", "Single", "Walk", "Double", "Lineout", "Home Run", "Pop Out")
+
+
+def synthetic_feed(seed=7):
+    """
+    A nine inning game in the shape of feed/live, with the fields the
+    subscription snapshot reads
+    """
+    rng = np.random.default_rng(seed)
+    plays, home, away = [], 0, 0
+    for inning in range(1, 10):
+        for top in (True, False):
+            outs = 0
+            while outs < 3:
+                event = EVENTS[rng.integers(len(EVENTS))]
+                outs += event in ("Strikeout", "Groundout", "Flyout", "Lineout", "Pop Out")
+                runs = int(event == "Home Run") + int(event == "Double" and rng.random() < 0.3)
+                if top:
+                    away += runs
+                else:
+                    home += runs
+                plays.append({
+                    "about": {"atBatIndex": len(plays), "inning": inning, "isTopInning": top,
+                              "isComplete": True, "isScoringPlay": runs > 0},
+                    "result": {"event": event, "description": f"{event} in the {inning}th",
+                               "awayScore": away, "homeScore": home},
+                    "matchup": {"batter": {"fullName": f"Batter {len(plays) % 9 + 1}"},
+                                "pitcher": {"fullName": "Pitcher"}},
+                    "playEvents": [{"index": n} for n in range(int(rng.integers(1, 7)))],
+                })
+    return {"gameData": {"status": {"abstractGameState": "Final", "detailedState": "Final"}},
+            "liveData": {"plays": {"allPlays": plays, "currentPlay": plays[-1]},
+                         "linescore": {"inningState": "End"}}}
+
+
+class ReplayTracker:
+    """
+    Stands in for mlbdata.live's tracker: every read is one upstream poll and
+    moves the game on by one plate appearance
+    """
+
+    def __init__(self, feed):
+        self.feed = feed
+        self.plays = feed["liveData"]["plays"]["allPlays"]
+        self.step = 0
+        self.reads = 0
+
+    def state(self):
+        if self.step >= len(self.plays):
+            return self.feed
+        plays = copy.deepcopy(self.plays[:self.step + 1])
+        plays[-1]["about"]["isComplete"] = False
+        return {"gameData": {"status": {"abstractGameState": "Live", "detailedState": "In Progress"}},
+                "liveData": {"plays": {"allPlays": plays, "currentPlay": plays[-1]},
+                             "linescore": {"inningState": "Top" if plays[-1]["about"]["isTopInning"] else "Bottom"}}}
+
+    def read(self, reader):
+        self.reads += 1
+        result = reader(self.state())
+        self.step += 1
+        return result
+
+
+async def run(feed, games, subscribers, stalled, interval):
+    trackers = {game_pk: ReplayTracker(feed) for game_pk in range(1, games + 1)}
+    audio.get_tracker = trackers.__getitem__
+    audio.next_poll_interval = lambda snapshot: interval
+    subscriptions = audio.GameSubscriptions()
+
+    sent_at = {}
+    broadcast = subscriptions._broadcast
+
+    async def timed_broadcast(game_pk, message):
+        sent_at[message] = time.perf_counter()
+        await broadcast(game_pk, message)
+
+    subscriptions._broadcast = timed_broadcast
+
+    latencies, received = [], [0]
+
+    async def drain(queue):
+        while True:
+            message = await queue.get()
+            latencies.append(time.perf_counter() - sent_at[message])
+            received[0] += 1
+
+    lag = [0.0]
+
+    async def watch_loop():
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lag[0] = max(lag[0], time.perf_counter() - started - 0.005)
+
+    queues = [MediaQueue(DOWNSTREAM_MAX_MEDIA) for _ in range(subscribers)]
+    stalled_count = int(subscribers * stalled)
+    readers = [asyncio.create_task(drain(queue)) for queue in queues[stalled_count:]]
+    watcher = asyncio.create_task(watch_loop())
+
+    started = time.perf_counter()
+    # subscribe() prints one line per subscriber
+    with contextlib.redirect_stdout(io.StringIO()):
+        for number, queue in enumerate(queues):
+            await subscriptions.subscribe(number % games + 1, queue)
+        while subscriptions.pollers:
+            await asyncio.gather(*subscriptions.pollers.values(), return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    # Let the readers catch up with the last broadcast
+    await asyncio.sleep(0.05)
+    for task in readers + [watcher]:
+        task.cancel()
+    return trackers, subscriptions.stats(), np.array(latencies) * 1000, received[0], elapsed, lag[0] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recorded", help="feed/live JSON of a game to replay")
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--games", type=int, default=1, help="recorded game replayed as this many live games")
+    parser.add_argument("--stalled", type=float, default=0.0, help="fraction of subscribers that never read")
+    parser.add_argument("--send-timeout", type=float, help="override LIVE_SEND_TIMEOUT for stalled subscribers")
+    parser.add_argument("--interval", type=float, default=0.001, help="seconds between replayed polls")
+    args = parser.parse_args()
+
+    if args.recorded:
+        with open(args.recorded) as f:
+            feed = json.load(f)
+    else:
+        feed = synthetic_feed()
+    if args.send_timeout is not None:
+        audio.LIVE_SEND_TIMEOUT = args.send_timeout
+
+    trackers, stats, latencies, received, elapsed, lag_ms = asyncio.run(
+        run(feed, args.games, args.subscribers, args.stalled, args.interval))
+
+    reads = sum(t.reads for t in trackers.values())
+    plays = len(feed["liveData"]["plays"]["allPlays"])
+    print(f"replay: {plays} plate appearances, {args.games} game(s), {args.subscribers} subscribers "
+          f"({args.stalled:.0%} stalled), {elapsed:.2f} s")
+    print(f"upstream: {reads} feed reads, {reads * args.subscribers // args.games} with one poller per subscriber")
+    print(f"delivered: {received} messages read, {stats['messages_sent']} queued, "
+          f"{stats['send_failures']} send timeouts")
+    if len(latencies):
+        print(f"fan-out: {np.percentile(latencies, 50):.2f} ms p50 / {np.percentile(latencies, 99):.2f} ms p99 / "
+              f"{latencies.max():.2f} ms max from broadcast to subscriber read")
+    print(f"event loop: {lag_ms:.1f} ms worst stall")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark of the tool response projection on Stats API responses.
+
+Responses are read from a directory of recorded <tool>.json files, or
+fetched from the Stats API with the url tools when no directory is given.
+Reports raw and projected bytes, estimated tokens saved (four bytes per
+token, as in /metrics) and the time spent projecting per tool.
+
+    python scripts/bench_projection.py --season 2024 --team-id 147 --save recorded_responses/
+    python scripts/bench_projection.py --recorded recorded_responses/
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mlbdata import projection  # noqa: E402
+
+# One name per schema, the aliases project the same way
+TOOLS = ("get_mlb_seasons", "get_mlb_leagues", "get_mlb_teams", "get_roster", "get_standings")
+
+
+def recorded(directory):
+    responses = {}
+    for tool in TOOLS:
+        path = os.path.join(directory, f"{tool}.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                responses[tool] = json.load(f)
+    return responses
+
+
+def fetched(season, team_id, league_id):
+    from mlbdata.tools import call_url_tool
+
+    params = {"season": season, "team_id": team_id, "league_id": league_id}
+    return {tool: call_url_tool(tool, params) for tool in TOOLS}
+
+
+def save(responses, directory):
+    os.makedirs(directory, exist_ok=True)
+    for tool, data in responses.items():
+        if "error" not in data:
+            with open(os.path.join(directory, f"{tool}.json"), "w") as f:
+                json.dump(data, f)
+
+
+def size(value):
+    return len(json.dumps(value, separators=(",", ":")))
+
+
+def bench(responses, repeat):
+    print(f"{'tool':<18} {'raw':>10} {'projected':>10} {'saved':>7} {'tokens saved':>13} {'project':>10}")
+    raw_total = projected_total = 0
+    for tool, data in responses.items():
+        if "error" in data:
+            print(f"{tool:<18} skipped: {data['error']}")
+            continue
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            projected = projection.project_response(tool, data)
+            timings.append((time.perf_counter() - started) * 1000)
+        raw, kept = size(data), size(projected)
+        raw_total += raw
+        projected_total += kept
+        print(f"{tool:<18} {raw:>10,} {kept:>10,} {1 - kept / raw:>7.0%} {(raw - kept) // 4:>13,} "
+              f"{min(timings):>7.2f} ms")
+    if raw_total:
+        print(f"{'total':<18} {raw_total:>10,} {projected_total:>10,} {1 - projected_total / raw_total:>7.0%} "
+              f"{(raw_total - projected_total) // 4:>13,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recorded", help="directory of recorded <tool>.json responses")
+    parser.add_argument("--season", default="2024")
+    parser.add_argument("--team-id", default="147")
+    parser.add_argument("--league-id", default="103")
+    parser.add_argument("--save", help="write fetched responses to this directory for later runs")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.recorded:
+        responses = recorded(args.recorded)
+    else:
+        responses = fetched(args.season, args.team_id, args.league_id)
+        if args.save:
+            save(responses, args.save)
+    if not responses:
+        sys.exit("no responses to project")
+    bench(responses, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Burst load test of the video summary job queue.
+
+Submits a burst of summary jobs from many threads to SummaryJobs, with a
+simulated model call of fixed latency instead of Gemini, and reports submit
+latency, rejections, deduplication, queue wait and the time to drain the
+queue. Run it with and without --store to see the cost of writing job
+records through to SQLite.
+
+    python scripts/bench_summary_jobs.py --requests 200 --clips 60 --model-ms 500
+    python scripts/bench_summary_jobs.py --requests 200 --clips 60 --store /tmp/jobs.sqlite3
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [BACKEND, os.path.join(BACKEND, "video")]
+
+from jobs import QueueFull, SummaryJobs  # noqa: E402
+from summary_cache import SummaryCache  # noqa: E402
+
+
+def burst(jobs, requests, clips, threads):
+    """
+    Submit requests jobs over clips distinct urls from threads threads at once.
+    Returns submit latencies in ms, the ids accepted and the rejection count.
+    """
+    latencies, job_ids, rejected = [], set(), [0]
+    lock = threading.Lock()
+    start = threading.Barrier(threads)
+
+    def client(number):
+        start.wait()
+        for n in range(number, requests, threads):
+            started = time.perf_counter()
+            try:
+                job = jobs.submit(f"https://clips.example.com/{n % clips}.mp4")
+            except QueueFull:
+                job = None
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(elapsed)
+                if job is None:
+                    rejected[0] += 1
+                else:
+                    job_ids.add(job.id)
+
+    workers = [threading.Thread(target=client, args=(number,)) for number in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return np.array(latencies), job_ids, rejected[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--clips", type=int, default=60, help="distinct clip urls in the burst")
+    parser.add_argument("--threads", type=int, default=32, help="concurrent submitting clients")
+    parser.add_argument("--model-ms", type=float, default=500, help="simulated summary latency")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queue-size", type=int, default=100)
+    parser.add_argument("--store", help="SQLite file to write job records to (removed first)")
+    args = parser.parse_args()
+
+    store = None
+    if args.store:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.store + suffix):
+                os.remove(args.store + suffix)
+        store = SummaryCache(args.store)
+
+    def summarize(url):
+        time.sleep(args.model_ms / 1000)
+        return f"summary of {url}"
+
+    jobs = SummaryJobs(summarize, store=store, workers=args.workers, queue_size=args.queue_size)
+    started = time.perf_counter()
+    latencies, job_ids, rejected = burst(jobs, args.requests, args.clips, args.threads)
+    submitted_ms = (time.perf_counter() - started) * 1000
+    for job_id in job_ids:
+        jobs.get(job_id, wait=600)
+    drained_s = time.perf_counter() - started
+
+    stats = jobs.stats()
+    print(f"burst: {args.requests} submissions of {args.clips} clips from {args.threads} threads "
+          f"in {submitted_ms:.0f} ms ({'SQLite store' if store else 'memory only'})")
+    print(f"submit: {np.percentile(latencies, 50):.2f} ms p50 / {np.percentile(latencies, 99):.2f} ms p99 / "
+          f"{latencies.max():.2f} ms max")
+    print(f"jobs: {len(job_ids)} run, {stats['deduplicated']} deduplicated, {rejected} rejected, "
+          f"{stats['failed']} failed, {stats['store_errors']} store errors")
+    print(f"queue wait: {stats['wait_ms']['p50']} ms p50 / {stats['wait_ms']['p95']} ms p95, "
+          f"drained in {drained_s:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
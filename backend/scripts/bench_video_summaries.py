@@ -0,0 +1,139 @@
+"""
+Benchmark of duplicate model calls in the video /generateVideoSummary endpoint.
+
+The Flask app runs on a local threaded server with a stub Gemini model that
+takes a fixed time per summary and counts its calls per clip. Fans ask for
+clips drawn from a Zipf popularity, many at once, so the same popular clips
+are requested both concurrently and again after they were summarized. The
+endpoint runs as it did before the change (every request calls the model),
+with the summary cache alone, and with the cache and the single flight.
+Reports model calls, the duplicate-summary rate (calls for a clip already
+summarized or being summarized) and request latency.
+
+    python scripts/bench_video_summaries.py --fans 32 --requests 10 --clips 50 --model-ms 500
+"""
+import argparse
+import contextlib
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+import requests
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [BACKEND, os.path.join(BACKEND, "video")]
+# Keep the cache the app opens at import out of the working directory
+os.environ.setdefault("VIDEO_SUMMARY_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "import.sqlite3"))
+
+from google.cloud import aiplatform  # noqa: E402
+
+# The app builds its GenerativeModel at import, which needs a project; the stub model replaces it
+aiplatform.init(project="bench", location="us-central1")
+
+import main as video  # noqa: E402
+import summary_cache  # noqa: E402
+from mlbdata.singleflight import SingleFlight  # noqa: E402
+from werkzeug.serving import make_server  # noqa: E402
+
+
+class StubModel:
+    """
+    Stands in for the GenerativeModel: every summary takes model_ms, and
+    the calls are counted per clip url
+    """
+
+    def __init__(self, model_ms):
+        self.model_ms = model_ms
+        self.calls = Counter()
+        self.lock = threading.Lock()
+
+    def generate_content(self, contents):
+        url = contents[0].file_data.file_uri
+        with self.lock:
+            self.calls[url] += 1
+        time.sleep(self.model_ms / 1000)
+        return SimpleNamespace(text=f"<ul><li>Summary of {url}</li></ul>")
+
+
+class NoFlight:
+    """
+    SingleFlight that runs every call, as the endpoint did before
+    """
+
+    def do(self, key, fn):
+        return fn()
+
+
+def run(base, fans, requests_per_fan, clips, zipf, seed):
+    """
+    fans clients sending requests_per_fan summary requests each, one at a
+    time, for clips drawn from a Zipf popularity. Returns latencies in ms.
+    """
+    rng = np.random.default_rng(seed)
+    # Ranks beyond clips are folded back, keeping the head popular
+    picks = (rng.zipf(zipf, size=(fans, requests_per_fan)) - 1) % clips
+
+    def fan(number):
+        latencies = []
+        with requests.Session() as http:
+            for clip in picks[number]:
+                started = time.perf_counter()
+                response = http.get(f"{base}/generateVideoSummary",
+                                    params={"query": f"https://clips.example.com/{clip}.mp4"})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+        return latencies
+
+    with ThreadPoolExecutor(max_workers=fans) as pool:
+        latencies = [latency for fan_latencies in pool.map(fan, range(fans)) for latency in fan_latencies]
+    return np.array(latencies) * 1000, len(set(picks.flat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--fans", type=int, default=32, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=10, help="requests sent by each fan, one at a time")
+    parser.add_argument("--clips", type=int, default=50, help="distinct highlight clips")
+    parser.add_argument("--zipf", type=float, default=1.5, help="Zipf exponent of clip popularity")
+    parser.add_argument("--model-ms", type=float, default=500, help="stub model time per summary")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    server = make_server("127.0.0.1", 0, video.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    directory = tempfile.mkdtemp()
+
+    print(f"{args.fans} fans x {args.requests} requests over {args.clips} clips (Zipf {args.zipf:g}), "
+          f"stub model {args.model_ms:.0f} ms")
+    print(f"  {'endpoint':<20} {'model calls':>11} {'duplicates':>11} {'p50':>9} {'p99':>9}")
+    try:
+        for number, (label, cached, flight) in enumerate((("every request", False, NoFlight()),
+                                                          ("cache", True, NoFlight()),
+                                                          ("cache + flight", True, SingleFlight()))):
+            model = video.model = StubModel(args.model_ms)
+            video.summary_flights = flight
+            summary_cache.SUMMARY_CACHE_PATH = os.path.join(directory, f"{number}.sqlite3") if cached else ""
+            summary_cache._cache = None
+            # The endpoint prints every query
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                latencies, distinct = run(base, args.fans, args.requests, args.clips, args.zipf, args.seed)
+            calls = sum(model.calls.values())
+            duplicates = calls - len(model.calls)
+            print(f"  {label:<20} {calls:>11} {duplicates:>5} ({duplicates / calls:4.0%}) "
+                  f"{np.percentile(latencies, 50):6.0f} ms {np.percentile(latencies, 99):6.0f} ms")
+        print(f"  {distinct} distinct clips requested")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Load test of the web backend's ASGI app against the Flask app.
+
+Both apps serve /generate with the stub model of bench_web_sessions.py and
+the real get_mlb_teams_by_season url tool, pointed at a local stub Stats
+API that answers after a fixed delay. Each app runs in its own process so
+it does not share a GIL with the load: Flask on a fixed pool of threads,
+as one gunicorn gthread worker does, the ASGI app on one uvicorn event
+loop, as the web image does. The stub Stats API and the clients are
+asyncio in this process. Every query names a different season, so neither
+the reference data cache nor request coalescing hides upstream calls.
+Reports latency and throughput for a growing number of concurrent clients.
+
+    python scripts/bench_web_asgi.py --concurrency 32 256 1024 --threads 32
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_web_sessions import TEAMS, TOOL, StubModel, web  # noqa: E402
+from mlbdata import aio, tools  # noqa: E402
+
+BODY = json.dumps(TEAMS).encode()
+
+
+async def stub_stats_api(reader, writer, delay):
+    """
+    One keep-alive connection to the stub Stats API: every GET is answered
+    with the teams document after delay seconds
+    """
+    try:
+        while await reader.readuntil(b"\r\n\r\n"):
+            await asyncio.sleep(delay)
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                         b"Content-Length: %d\r\n\r\n%s" % (len(BODY), BODY))
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def start_stub_stats_api(delay):
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(
+        partial(stub_stats_api, delay=delay), "127.0.0.1", 0, backlog=4096))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/api"
+
+
+def pooled_wsgi_server(app, threads):
+    """
+    Werkzeug server handling requests on a fixed pool of threads, as a
+    gunicorn gthread worker with --threads does
+    """
+    from werkzeug.serving import BaseWSGIServer
+
+    class PooledWSGIServer(BaseWSGIServer):
+        request_queue_size = 4096
+
+        def process_request(self, request, client_address):
+            pool.submit(self.process_request_thread, request, client_address)
+
+        def process_request_thread(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    pool = ThreadPoolExecutor(max_workers=threads)
+    return PooledWSGIServer("127.0.0.1", 0, app)
+
+
+def serve(app, stats_api, model_ms, threads):
+    """
+    Runs in the server process: serve one app with the stubs until killed
+    """
+    logging.disable(logging.ERROR)
+    # The ASGI app imports the same manager, so both serve the stub model
+    web.chat_sessions.start_chat = StubModel(model_ms, 0).start_chat
+    web.api_function_map[TOOL] = partial(tools.call_url_tool, TOOL)
+    tools.STATS_API_BASE = stats_api
+    if app == "flask":
+        server = pooled_wsgi_server(web.app, threads)
+        print(server.server_port, flush=True)
+        server.serve_forever()
+    else:
+        import asgi
+        import uvicorn
+
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        # Listening before uvicorn starts, so the first clients queue rather than fail
+        sock.listen(4096)
+        print(sock.getsockname()[1], flush=True)
+        uvicorn.Server(uvicorn.Config(asgi.app, log_level="error", backlog=4096)).run(sockets=[sock])
+
+
+async def fetch(connection, path):
+    """
+    One GET on a plain asyncio connection, reopened when the server closes it.
+    Returns the connection and the status code.
+    """
+    port, reader, writer = connection
+    if writer is None:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n".encode())
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").lower()
+    status = int(head.split()[1])
+    length = int(head.split("content-length:")[1].split("\r\n")[0])
+    await reader.readexactly(length)
+    if head.startswith("http/1.0") or "connection: close" in head:
+        writer.close()
+        writer = None
+    return (port, reader, writer), status
+
+
+async def load(port, concurrency, total, seasons):
+    """
+    concurrency clients sending total queries between them, on plain asyncio
+    connections so the load side stays cheap
+    """
+    latencies, errors = [], [0]
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(next(seasons))
+
+    async def client():
+        connection = (port, None, None)
+        while not queue.empty():
+            season = queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                connection, status = await fetch(connection, f"/generate?query=teams+in+{season}")
+                errors[0] += status != 200
+            except (OSError, asyncio.IncompleteReadError):
+                connection = (port, None, None)
+                errors[0] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return np.array(latencies) * 1000, time.perf_counter() - started, errors[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[32, 256, 1024])
+    parser.add_argument("--threads", type=int, default=32, help="Flask request threads")
+    parser.add_argument("--model-ms", type=float, default=100, help="stub model time per call")
+    parser.add_argument("--upstream-ms", type=float, default=200, help="stub Stats API response time")
+    parser.add_argument("--serve", nargs=2, metavar=("APP", "STATS_API"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(*args.serve, args.model_ms, args.threads)
+        return
+
+    stats_api = start_stub_stats_api(args.upstream_ms / 1000)
+    seasons = (f"{season:04d}" for season in range(10000))
+    print(f"stub model {args.model_ms:.0f} ms x 2 calls, stub Stats API {args.upstream_ms:.0f} ms, "
+          f"Flask on {args.threads} threads, ASGI on one event loop with {aio.MAX_CONNECTIONS} upstream connections")
+    print(f"  {'clients':>7} {'app':<6} {'p50':>9} {'p99':>9} {'queries/s':>10} {'errors':>7}")
+    for app in ("flask", "asgi"):
+        server = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--serve", app, stats_api, "--model-ms", str(args.model_ms),
+             "--threads", str(args.threads)], stdout=subprocess.PIPE, text=True)
+        try:
+            port = int(server.stdout.readline())
+            for concurrency in args.concurrency:
+                total = max(2 * concurrency, 200)
+                latencies, elapsed, errors = asyncio.run(load(port, concurrency, total, seasons))
+                print(f"  {concurrency:>7} {app:<6} {np.percentile(latencies, 50):6.0f} ms "
+                      f"{np.percentile(latencies, 99):6.0f} ms {total / elapsed:10.1f} {errors:>7}")
+        finally:
+            server.kill()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
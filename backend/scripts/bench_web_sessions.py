@@ -0,0 +1,170 @@
+"""
+Concurrency benchmark of the web /generate endpoint's chat sessions.
+
+The Flask app runs on a local threaded server with a stub Gemini model and
+a stub tool. Every query is one tool call and a summary, the stub model
+answering after a delay that grows with the chat history it is sent, as a
+real model's prompt processing does. Clients send queries concurrently,
+either all on one chat behind one lock with an untrimmed history (the old
+module-level chat) or each on its own session. Reports latency, throughput
+and how latency moves from the first to the last tenth of the run.
+
+    python scripts/bench_web_sessions.py --clients 8 --queries 10
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [BACKEND, os.path.join(BACKEND, "web")]
+
+import main as web  # noqa: E402
+import sessions  # noqa: E402
+from vertexai.generative_models import Content, GenerationResponse, Part  # noqa: E402
+from werkzeug.serving import make_server  # noqa: E402
+
+# Not in the response cache's TOOL_TTLS, so every query runs the tool
+TOOL = "get_mlb_teams_by_season"
+TEAMS = {"teams": [{"id": n, "name": f"Team {n}", "abbreviation": f"T{n}", "league": {"id": 103 + n % 2},
+                    "division": {"id": 200 + n % 6}, "venue": {"id": n, "name": f"Park {n}"}} for n in range(30)]}
+
+
+class StubModel:
+    def __init__(self, base_ms, ms_per_kib, summary_words=60, chunk_ms=0, chunk_words=4):
+        self.base_ms = base_ms
+        self.ms_per_kib = ms_per_kib
+        words = [f"word{n} " for n in range(summary_words)]
+        # A summary is generated chunk_ms per streamed chunk of chunk_words
+        self.chunks = ["".join(words[n:n + chunk_words]) for n in range(0, summary_words, chunk_words)]
+        self.chunk_ms = chunk_ms
+
+    def start_chat(self):
+        return StubChat(self)
+
+
+class StubChat:
+    """
+    Stands in for a Gemini ChatSession: a query is answered with a TOOL call
+    for the season it names, a function response with the summary
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.history = []
+
+    def delay(self):
+        if not self.model.ms_per_kib:
+            return self.model.base_ms / 1000
+        kib = sum(len(json.dumps(content.to_dict())) for content in self.history) / 1024
+        return (self.model.base_ms + self.model.ms_per_kib * kib) / 1000
+
+    def reply(self, message):
+        user = Content(role="user", parts=[Part.from_text(message) if isinstance(message, str) else message])
+        if isinstance(message, str):
+            season = re.search(r"\b\d{4}\b", message)
+            part = {"function_call": {"name": TOOL, "args": {"season": season.group() if season else "2024"}}}
+        else:
+            part = {"text": "".join(self.model.chunks)}
+        self.history += [user, Content.from_dict({"role": "model", "parts": [part]})]
+        return part
+
+    def send_message(self, message, stream=False):
+        time.sleep(self.delay())
+        part = self.reply(message)
+        if stream:
+            return self.stream(part)
+        if "text" in part:
+            time.sleep(len(self.model.chunks) * self.model.chunk_ms / 1000)
+        return response(part)
+
+    async def send_message_async(self, message):
+        await asyncio.sleep(self.delay())
+        part = self.reply(message)
+        if "text" in part:
+            await asyncio.sleep(len(self.model.chunks) * self.model.chunk_ms / 1000)
+        return response(part)
+
+    def stream(self, part):
+        if "text" not in part:
+            yield response(part)
+            return
+        for chunk in self.model.chunks:
+            time.sleep(self.model.chunk_ms / 1000)
+            yield response({"text": chunk})
+
+
+def response(part):
+    return GenerationResponse.from_dict({"candidates": [{"content": {"role": "model", "parts": [part]}}]})
+
+
+def serve():
+    server = make_server("127.0.0.1", 0, web.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def run(base, clients, queries, shared):
+    def client(number):
+        session_id = "shared" if shared else f"client-{number}"
+        results = []
+        with requests.Session() as http:
+            for query in range(queries):
+                started = time.perf_counter()
+                response = http.get(f"{base}/generate", params={"query": f"teams in 2024 ({query})",
+                                                                "session_id": session_id})
+                response.raise_for_status()
+                results.append((started, time.perf_counter() - started))
+        return results
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = sorted(r for client_results in pool.map(client, range(clients)) for r in client_results)
+    return np.array([latency for _, latency in results]) * 1000, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=10, help="queries sent by each client, one at a time")
+    parser.add_argument("--model-ms", type=float, default=50, help="stub model time for an empty history")
+    parser.add_argument("--ms-per-kib", type=float, default=2, help="stub model time per KiB of history")
+    parser.add_argument("--tool-ms", type=float, default=20, help="stub tool time")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    model = StubModel(args.model_ms, args.ms_per_kib)
+    web.api_function_map[TOOL] = lambda params: time.sleep(args.tool_ms / 1000) or TEAMS
+    server, base = serve()
+
+    print(f"{args.clients} clients x {args.queries} queries, stub model {args.model_ms:.0f} ms + "
+          f"{args.ms_per_kib:g} ms/KiB of history, {args.tool_ms:.0f} ms tool")
+    trim_history = sessions.ChatSession.trim_history
+    try:
+        for shared in (True, False):
+            web.chat_sessions = sessions.ChatSessionManager(model.start_chat)
+            if shared:
+                # The module-level chat kept its whole history
+                sessions.ChatSession.trim_history = lambda session, max_turns=None: None
+            latencies, elapsed = run(base, args.clients, args.queries, shared)
+            sessions.ChatSession.trim_history = trim_history
+            tenth = max(len(latencies) // 10, 1)
+            print(f"  {'shared' if shared else 'sessions':<9} {np.percentile(latencies, 50):8.0f} ms p50 "
+                  f"{np.percentile(latencies, 99):8.0f} ms p99 {len(latencies) / elapsed:6.1f} queries/s   "
+                  f"first tenth {latencies[:tenth].mean():6.0f} ms, last tenth {latencies[-tenth:].mean():6.0f} ms")
+    finally:
+        sessions.ChatSession.trim_history = trim_history
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark of streamed /generateStream answers against the JSON /generate.
+
+The Flask app runs on a local threaded server with the stub model of
+bench_web_sessions.py, which takes a fixed time to its first token and
+streams the summary in chunks, and a stub tool. Each query is one tool
+call and a summary. Reports, per endpoint, time to the first body byte,
+to the first render (the structured tool result the page can show) and
+to the first summary text, and to the end of the answer. The JSON
+endpoint renders everything at once when its body arrives.
+
+    python scripts/bench_web_stream.py --queries 20 --model-ms 300 --chunk-ms 30
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_web_sessions import TEAMS, TOOL, StubModel, serve, web  # noqa: E402
+from sessions import ChatSessionManager  # noqa: E402
+
+
+def timed_json(http, base, query):
+    started = time.perf_counter()
+    with http.get(f"{base}/generate", params={"query": query}, stream=True) as response:
+        response.raise_for_status()
+        first_byte = None
+        for _ in response.iter_content(chunk_size=None):
+            first_byte = first_byte or time.perf_counter() - started
+        done = time.perf_counter() - started
+    return {"first_byte": first_byte, "first_render": done, "first_summary": done, "done": done}
+
+
+def timed_stream(http, base, query):
+    started = time.perf_counter()
+    times = {}
+    with http.get(f"{base}/generateStream", params={"query": query}, stream=True) as response:
+        response.raise_for_status()
+        for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+            now = time.perf_counter() - started
+            times.setdefault("first_byte", now)
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+                if event == "error":
+                    raise RuntimeError("stream answered with an error event")
+                times.setdefault({"tool_end": "first_render", "summary": "first_summary"}.get(event, event), now)
+    times["done"] = time.perf_counter() - started
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--model-ms", type=float, default=300, help="stub model time to its first token")
+    parser.add_argument("--chunk-ms", type=float, default=30, help="stub model time per streamed summary chunk")
+    parser.add_argument("--tool-ms", type=float, default=100, help="stub tool time")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    model = StubModel(args.model_ms, 0, chunk_ms=args.chunk_ms)
+    web.chat_sessions = ChatSessionManager(model.start_chat)
+    web.api_function_map[TOOL] = lambda params: time.sleep(args.tool_ms / 1000) or TEAMS
+    server, base = serve()
+
+    print(f"{args.queries} queries, stub model {args.model_ms:.0f} ms to first token, {len(model.chunks)} summary "
+          f"chunks of {args.chunk_ms:.0f} ms, {args.tool_ms:.0f} ms tool, {len(json.dumps(TEAMS)) / 1024:.1f} KiB result")
+    print(f"  {'endpoint':<16} {'first byte':>11} {'first render':>13} {'first summary':>14} {'done':>9}   (p50)")
+    try:
+        with requests.Session() as http:
+            for path, timed in (("/generate", timed_json), ("/generateStream", timed_stream)):
+                runs = [timed(http, base, f"teams in 2024 ({n})") for n in range(args.queries)]
+                p50 = {key: np.percentile([run[key] for run in runs], 50) * 1000 for key in runs[0]}
+                print(f"  {path:<16} {p50['first_byte']:8.0f} ms {p50['first_render']:10.0f} ms "
+                      f"{p50['first_summary']:11.0f} ms {p50['done']:6.0f} ms")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
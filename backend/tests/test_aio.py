@@ -0,0 +1,29 @@
+import asyncio
+
+from mlbdata.aio import AsyncStatsApiClient
+
+
+class Response:
+    status_code = 200
+
+
+def test_requests_beyond_the_pool_wait_outside_it(monkeypatch):
+    async def scenario():
+        client = AsyncStatsApiClient(max_connections=4)
+        in_flight, peak = [0], [0]
+
+        async def get(url, **kwargs):
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+            await asyncio.sleep(0.01)
+            in_flight[0] -= 1
+            return Response()
+
+        monkeypatch.setattr(client.client, "get", get)
+        responses = await asyncio.gather(*(client.get(f"https://statsapi.mlb.com/api/v1/x/{n}") for n in range(20)))
+        await client.close()
+        return responses, peak[0]
+
+    responses, peak = asyncio.run(scenario())
+    assert len(responses) == 20
+    assert peak == 4
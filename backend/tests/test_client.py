@@ -0,0 +1,18 @@
+from mlbdata.client import StatsApiClient
+
+
+class Response:
+    text = content = "{}"
+
+    def raise_for_status(self):
+        pass
+
+
+def test_equivalent_reference_urls_share_a_cache_entry(monkeypatch):
+    client = StatsApiClient()
+    fetched = []
+    monkeypatch.setattr(client, "get", lambda url: fetched.append(url) or Response())
+    client.fetch_text("https://statsapi.mlb.com/api/v1/teams?sportId=1&season=2024")
+    client.fetch_text("https://STATSAPI.mlb.com/api/v1/teams/?season=2024&sportId=1")
+    assert len(fetched) == 1
+    assert client.cache.stats()["hits"] == 1
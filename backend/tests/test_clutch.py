@@ -0,0 +1,83 @@
+import numpy as np
+
+from mlbdata.clutch import (AFTER_HALF, FIRST, LEVERAGE, MAX_RUN_DIFF, REGULATION, SECOND, THIRD,
+                            WIN_EXPECTANCY, score_plays, top_clutch_plays)
+
+TIED = MAX_RUN_DIFF
+LOADED = FIRST | SECOND | THIRD
+
+
+def play(inning, top, outs_after, home, away, bases_after=0, complete=True):
+    return {
+        "about": {"inning": inning, "isTopInning": top, "isComplete": complete},
+        "matchup": {"postOnFirst": bool(bases_after & FIRST), "postOnSecond": bool(bases_after & SECOND),
+                    "postOnThird": bool(bases_after & THIRD)},
+        "result": {"homeScore": home, "awayScore": away},
+        "count": {"outs": outs_after},
+    }
+
+
+def test_tables_are_probabilities():
+    assert WIN_EXPECTANCY.min() >= 0
+    assert WIN_EXPECTANCY.max() <= 1 + 1e-9
+    assert np.all(LEVERAGE >= 0)
+
+
+def test_game_starts_even():
+    assert abs(WIN_EXPECTANCY[1, 0, 0, 0, TIED] - 0.5) < 1e-6
+
+
+def test_win_expectancy_rises_with_home_lead():
+    assert np.all(np.diff(WIN_EXPECTANCY[1:], axis=-1) >= -1e-9)
+
+
+def test_end_of_game_states():
+    # Home team ahead after the top of the 9th does not bat
+    assert AFTER_HALF[REGULATION, 0, TIED + 1] == 1.0
+    # Tied after nine goes to extras as a coin flip
+    assert abs(AFTER_HALF[REGULATION, 1, TIED] - 0.5) < 1e-6
+
+
+def test_leverage_is_highest_late_and_close():
+    late_and_close = LEVERAGE[REGULATION, 1, 2, LOADED, TIED]
+    first_inning = LEVERAGE[1, 0, 0, 0, TIED]
+    blowout = LEVERAGE[5, 0, 0, 0, TIED + 10]
+    assert late_and_close > 4
+    assert 0.5 < first_inning < 1.5
+    assert blowout < 0.1
+
+
+def test_walk_off_scores_highest():
+    plays = [
+        play(1, True, 1, 0, 0),
+        play(1, True, 2, 0, 0),
+        play(1, True, 3, 0, 0),
+        play(9, False, 1, 3, 3, bases_after=FIRST),
+        play(9, False, 2, 3, 3, bases_after=SECOND),
+        play(9, False, 2, 4, 3),
+    ]
+    complete, wpa, leverage, we_after, score = score_plays(plays, final=True)
+    assert len(complete) == 6
+    assert int(np.argmax(score)) == 5
+    assert we_after[-1] == 1.0
+    # WPA is for the batting team: the walk-off is positive for the home side
+    assert wpa[-1] > 0.3
+
+
+def test_incomplete_plays_are_skipped():
+    complete, wpa, _, _, _ = score_plays([play(1, True, 1, 0, 0), play(1, True, 1, 0, 0, complete=False)])
+    assert len(complete) == 1
+    assert wpa.shape == (1,)
+
+
+def test_top_clutch_plays_order_and_limit():
+    plays = [play(9, False, 0, 3, 3, bases_after=FIRST), play(1, True, 1, 0, 0), play(9, False, 0, 4, 3)]
+    ranked = top_clutch_plays(plays, final=True, limit=2)
+    assert len(ranked) == 2
+    assert ranked[0][0] is plays[2]
+    assert ranked[0][1]["clutch_score"] >= ranked[1][1]["clutch_score"]
+    assert set(ranked[0][1]) == {"wpa", "leverage_index", "home_win_probability", "clutch_score"}
+
+
+def test_no_plays():
+    assert top_clutch_plays([]) == []
@@ -0,0 +1,172 @@
+import threading
+import time
+
+import pytest
+
+from jobs import QueueFull, SummaryJobs, callback_allowed
+
+
+class Model:
+    """
+    summarize() that blocks until released, counting calls per url
+    """
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = []
+
+    def __call__(self, url):
+        self.calls.append(url)
+        self.release.wait(5)
+        if "broken" in url:
+            raise ValueError("model error")
+        return f"summary of {url}"
+
+
+def test_submit_returns_before_the_summary():
+    model = Model()
+    jobs = SummaryJobs(model, workers=1)
+    job = jobs.submit("https://clips/a.mp4")
+    assert job.status in ("queued", "running")
+    model.release.set()
+    finished = jobs.get(job.id, wait=5)
+    assert finished.status == "done"
+    assert finished.to_dict()["summary"] == "summary of https://clips/a.mp4"
+
+
+def test_same_clip_shares_a_job():
+    model = Model()
+    jobs = SummaryJobs(model, workers=2)
+    first = jobs.submit("https://clips/a.mp4")
+    second = jobs.submit("https://CLIPS/a.mp4")
+    assert first is second
+    model.release.set()
+    jobs.get(first.id, wait=5)
+    assert len(model.calls) == 1
+    assert jobs.stats()["deduplicated"] == 1
+
+
+def test_full_queue_rejects():
+    model = Model()
+    jobs = SummaryJobs(model, workers=1, queue_size=1)
+    jobs.submit("https://clips/1.mp4")
+    while not model.calls:
+        time.sleep(0.001)
+    jobs.submit("https://clips/2.mp4")
+    with pytest.raises(QueueFull):
+        jobs.submit("https://clips/3.mp4")
+    model.release.set()
+    assert jobs.stats()["rejected"] == 1
+
+
+def test_failed_summary():
+    model = Model()
+    model.release.set()
+    jobs = SummaryJobs(model, workers=1)
+    job = jobs.get(jobs.submit("https://clips/broken.mp4").id, wait=5)
+    assert job.to_dict()["status"] == "error"
+    assert job.to_dict()["error"] == "model error"
+
+
+def test_cached_summary_finishes_at_once():
+    model = Model()
+    jobs = SummaryJobs(model, cached=lambda url: "stored", workers=1)
+    job = jobs.submit("https://clips/a.mp4")
+    assert job.status == "done" and job.cached
+    assert model.calls == []
+
+
+def test_unknown_job():
+    jobs = SummaryJobs(Model(), workers=1)
+    assert jobs.get("missing") is None
+
+
+def test_latency_stats():
+    model = Model()
+    model.release.set()
+    jobs = SummaryJobs(model, workers=2)
+    for n in range(5):
+        jobs.get(jobs.submit(f"https://clips/{n}.mp4").id, wait=5)
+    stats = jobs.stats()
+    assert stats["completed"] == 5
+    assert stats["queue_depth"] == 0
+    assert stats["run_ms"]["p50"] is not None
+
+
+def test_callback_hosts(monkeypatch):
+    monkeypatch.setattr("jobs.CALLBACK_HOSTS", ["hooks.example.com"])
+    assert callback_allowed("https://hooks.example.com/done")
+    assert not callback_allowed("https://evil.example.com/done")
+    assert not callback_allowed("file://hooks.example.com/done")
+
+
+@pytest.fixture
+def store(tmp_path):
+    from summary_cache import SummaryCache
+    return SummaryCache(str(tmp_path / "summaries.sqlite3"))
+
+
+def test_stored_jobs_are_found_by_another_process(store):
+    model = Model()
+    jobs = SummaryJobs(model, store=store, workers=1)
+    other = SummaryJobs(Model(), store=store, workers=1)
+    job = jobs.submit("https://clips/a.mp4")
+    assert other.get(job.id).status in ("queued", "running")
+
+    threading.Timer(0.2, model.release.set).start()
+    polled = other.get(job.id, wait=5)
+    assert polled.status == "done"
+    assert polled.to_dict()["summary"] == "summary of https://clips/a.mp4"
+    assert other.stats()["store_reads"] >= 2
+
+
+def test_stale_stored_job_is_reported_interrupted(store):
+    jobs = SummaryJobs(Model(), store=store, workers=1)
+    job = jobs.submit("https://clips/a.mp4")
+    restarted = SummaryJobs(Model(), store=store, workers=1, stale=0)
+    time.sleep(0.01)
+    assert restarted.get(job.id).to_dict()["status"] == "error"
+    assert restarted.get("missing") is None
+
+
+class SlowStore:
+    """
+    Job store whose writes block until released, recording the statuses written
+    """
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.statuses = []
+
+    def put_job(self, record):
+        self.release.wait(5)
+        self.statuses.append(record["status"])
+
+    def prune_jobs(self, before):
+        self.release.wait(5)
+
+
+def test_store_writes_do_not_hold_the_job_lock():
+    model, store = Model(), SlowStore()
+    model.release.set()
+    jobs = SummaryJobs(model, store=store, workers=1)
+    submitted = []
+    submitter = threading.Thread(target=lambda: submitted.append(jobs.submit("https://clips/a.mp4")))
+    submitter.start()
+    time.sleep(0.05)
+    started = time.perf_counter()
+    assert jobs.stats()["submitted"] == 1
+    assert time.perf_counter() - started < 1
+    store.release.set()
+    submitter.join()
+    assert jobs.get(submitted[0].id, wait=5).status == "done"
+    assert store.statuses == ["queued", "running", "done"]
+
+
+def test_unopenable_store_disables_the_cache(tmp_path, monkeypatch):
+    import summary_cache
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    monkeypatch.setattr(summary_cache, "SUMMARY_CACHE_PATH", str(blocker / "summaries.sqlite3"))
+    monkeypatch.setattr(summary_cache, "_cache", None)
+    assert summary_cache.get_summary_cache() is None
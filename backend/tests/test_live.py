@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+from mlbdata.live import LiveGameTracker, PatchError, apply_patch_op
+
+
+def test_add_replace_remove_on_objects():
+    doc = {"liveData": {"plays": {"currentPlay": {"count": {"balls": 0}}}}}
+    apply_patch_op(doc, {"op": "replace", "path": "/liveData/plays/currentPlay/count/balls", "value": 2})
+    apply_patch_op(doc, {"op": "add", "path": "/liveData/plays/currentPlay/count/strikes", "value": 1})
+    apply_patch_op(doc, {"op": "remove", "path": "/liveData/plays/currentPlay/count/balls"})
+    assert doc["liveData"]["plays"]["currentPlay"]["count"] == {"strikes": 1}
+
+
+def test_list_operations():
+    doc = {"allPlays": [{"n": 0}, {"n": 2}]}
+    apply_patch_op(doc, {"op": "add", "path": "/allPlays/1", "value": {"n": 1}})
+    apply_patch_op(doc, {"op": "add", "path": "/allPlays/-", "value": {"n": 3}})
+    apply_patch_op(doc, {"op": "replace", "path": "/allPlays/0/n", "value": -1})
+    apply_patch_op(doc, {"op": "remove", "path": "/allPlays/3"})
+    assert doc["allPlays"] == [{"n": -1}, {"n": 1}, {"n": 2}]
+
+
+def test_escaped_tokens():
+    doc = {"a/b": {"c~d": 1}}
+    apply_patch_op(doc, {"op": "replace", "path": "/a~1b/c~0d", "value": 2})
+    assert doc == {"a/b": {"c~d": 2}}
+
+
+@pytest.mark.parametrize("op", [
+    {"op": "replace", "path": "/missing/field", "value": 1},
+    {"op": "remove", "path": "/plays/5"},
+    {"op": "move", "path": "/plays/0", "from": "/plays/1"},
+    {"op": "replace", "path": "", "value": {}},
+])
+def test_bad_patches_raise(op):
+    with pytest.raises(PatchError):
+        apply_patch_op({"plays": [1, 2]}, op)
+
+
+class Response:
+    def __init__(self, data):
+        self.content = json.dumps(data).encode()
+        self.headers = {}
+
+    def raise_for_status(self):
+        pass
+
+
+class Client:
+    """
+    Answers feed/live and diffPatch urls from a list of queued responses
+    """
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.urls = []
+
+    def get(self, url, params=None):
+        self.urls.append(url)
+        return Response(self.responses.pop(0))
+
+
+def feed(timestamp, balls=0, state="Live"):
+    return {
+        "metaData": {"timeStamp": timestamp},
+        "gameData": {"status": {"abstractGameState": state}},
+        "liveData": {"plays": {"currentPlay": {"count": {"balls": balls}}}},
+    }
+
+
+def test_tracker_applies_diff_patch():
+    patch = [{"diff": [
+        {"op": "replace", "path": "/liveData/plays/currentPlay/count/balls", "value": 3},
+        {"op": "replace", "path": "/metaData/timeStamp", "value": "t2"},
+    ]}]
+    client = Client(feed("t1"), patch)
+    tracker = LiveGameTracker(1, client=client)
+    tracker.refresh()
+    tracker.refresh(force=True)
+
+    assert client.urls[1].endswith("/diffPatch")
+    assert tracker.current_play()["count"]["balls"] == 3
+    assert tracker.timecode == "t2"
+    assert (tracker.full_fetches, tracker.patch_updates) == (1, 1)
+
+
+def test_tracker_falls_back_to_full_feed_on_bad_patch():
+    bad_patch = [{"diff": [{"op": "replace", "path": "/liveData/missing/field", "value": 1}]}]
+    client = Client(feed("t1"), bad_patch, feed("t3", balls=2))
+    tracker = LiveGameTracker(1, client=client)
+    tracker.refresh()
+    tracker.refresh(force=True)
+
+    assert tracker.current_play()["count"]["balls"] == 2
+    assert tracker.full_fetches == 2
+
+
+def test_final_games_are_not_refreshed():
+    client = Client(feed("t1", state="Final"))
+    tracker = LiveGameTracker(1, client=client)
+    tracker.refresh()
+    tracker.refresh(force=True)
+    assert len(client.urls) == 1
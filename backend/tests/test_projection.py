@@ -0,0 +1,39 @@
+import pytest
+
+from mlbdata import projection
+
+
+def teams_response():
+    return {
+        "copyright": "Copyright 2024 MLB Advanced Media",
+        "teams": [{
+            "id": 147, "name": "New York Yankees", "link": "/api/v1/teams/147",
+            "venue": {"id": 3313, "name": "Yankee Stadium", "link": "/api/v1/venues/3313"},
+            "sport": {"id": 1, "link": "/api/v1/sports/1", "name": "Major League Baseball"},
+            "teamurl": "https://www.mlbstatic.com/team-logos/147.svg",
+        }],
+    }
+
+
+def test_fields_outside_the_schema_are_dropped():
+    projected = projection.project_response("get_mlb_teams", teams_response())
+    assert projected == {"teams": [{
+        "id": 147, "name": "New York Yankees", "teamurl": "https://www.mlbstatic.com/team-logos/147.svg",
+        "venue": {"id": 3313, "name": "Yankee Stadium"},
+    }]}
+    assert projection.stats()["tools"]["get_mlb_teams"]["saved_bytes"] > 0
+
+
+@pytest.mark.parametrize("verbose", [True, "true", "1"])
+def test_verbose_calls_get_the_full_response(verbose):
+    assert projection.project_response("get_mlb_teams", teams_response(), verbose) == teams_response()
+
+
+@pytest.mark.parametrize("verbose", [False, None, "false"])
+def test_verbose_must_be_set(verbose):
+    assert "copyright" not in projection.project_response("get_mlb_teams", teams_response(), verbose)
+
+
+def test_errors_and_unknown_tools_are_unchanged():
+    assert projection.project_response("get_mlb_teams", {"error": "timeout"}) == {"error": "timeout"}
+    assert projection.project_response("get_current_play", teams_response()) == teams_response()
@@ -0,0 +1,86 @@
+import asyncio
+
+from queues import MediaQueue, SessionQueues
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_media_is_dropped_oldest_first():
+    async def scenario():
+        queue = MediaQueue(max_media=2)
+        for chunk in (b"1", b"2", b"3"):
+            await queue.put(chunk, media=True)
+        return [await queue.get(), await queue.get()], queue.stats()
+
+    items, stats = run(scenario())
+    assert items == [b"2", b"3"]
+    assert stats["dropped"] == 1
+
+
+def test_messages_are_never_dropped():
+    async def scenario():
+        queue = MediaQueue(max_media=1)
+        await queue.put("tool result")
+        await queue.put(b"1", media=True)
+        await queue.put(b"2", media=True)
+        return [await queue.get(), await queue.get()]
+
+    assert run(scenario()) == ["tool result", b"2"]
+
+
+def test_put_waits_when_messages_are_full():
+    async def scenario():
+        queue = MediaQueue(max_media=1, max_messages=1)
+        await queue.put("first")
+        blocked = asyncio.ensure_future(queue.put("second"))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        assert await queue.get() == "first"
+        await asyncio.wait_for(blocked, 1)
+        return await queue.get(), queue.stats()
+
+    item, stats = run(scenario())
+    assert item == "second"
+    assert stats["blocked"] == 1
+
+
+def test_depth_stays_bounded_without_a_consumer():
+    async def scenario():
+        queue = MediaQueue(max_media=50)
+        for _ in range(10000):
+            await queue.put(b"x" * 640, media=True)
+        return queue.stats()
+
+    stats = run(scenario())
+    assert stats["depth"] == 50
+    assert stats["peak"] == 50
+    assert stats["dropped"] == 10000 - 50
+
+
+def test_session_totals():
+    async def scenario():
+        sessions = SessionQueues()
+        session_id, upstream, downstream = sessions.create()
+        await upstream.put(b"a", media=True)
+        assert len(sessions.stats()["open"]) == 1
+        sessions.close(session_id)
+        return sessions.stats()
+
+    stats = run(scenario())
+    assert stats["open"] == []
+    assert stats["closed"]["sessions"] == 1
+
+
+def test_get_waits_for_an_item():
+    async def scenario():
+        queue = MediaQueue(max_media=1)
+        getter = asyncio.ensure_future(queue.get())
+        await asyncio.sleep(0.01)
+        assert not getter.done()
+        await queue.put("hello")
+        return await asyncio.wait_for(getter, 1)
+
+    assert run(scenario()) == "hello"
+
@@ -0,0 +1,59 @@
+from mlbdata.cache import DAY
+from response_cache import NEVER_CACHE, TOOL_TTLS, ResponseCache, normalize_params
+
+
+def test_normalize_params():
+    params = {"team_id": "147.0", "name": " Yankees ", "game_date": "2024/06/02", "verbose": True, "season": ""}
+    assert normalize_params(params) == {"team_id": "147", "name": "yankees", "game_date": "2024-06-02"}
+
+
+def test_rephrased_calls_share_a_key():
+    cache = ResponseCache()
+    assert cache.key("get_standings", {"season": 2024, "league_id": "103"}) == \
+        cache.key("get_standings", {"league_id": 103.0, "season": " 2024"})
+
+
+def test_uncached_tools_have_no_key():
+    cache = ResponseCache()
+    assert cache.key("get_mlb_teams", {"season": 2024}) is None
+    assert cache.get(None) is None
+
+
+def test_put_and_get():
+    cache = ResponseCache()
+    key = cache.key("get_roster", {"team_id": 147, "season": 2024})
+    cache.put(key, "get_roster", {"team_id": 147, "season": 2024}, {"roster": []}, "summary", 1200.0)
+    entry = cache.get(key)
+    assert entry["summary"] == "summary"
+    assert cache.stats()["latency_saved_ms"] == 1200.0
+
+
+def test_errors_are_not_cached():
+    cache = ResponseCache()
+    key = cache.key("get_roster", {"team_id": 147})
+    cache.put(key, "get_roster", {"team_id": 147}, {"error": "upstream down"}, "summary", 10.0)
+    assert cache.get(key) is None
+
+
+def test_game_ttl_follows_status():
+    assert TOOL_TTLS["get_find_game"]({"status": "Final"}) == DAY
+    assert TOOL_TTLS["get_find_game"]({"status": "In Progress"}) == 30
+
+
+def test_live_tools_are_never_cached():
+    cache = ResponseCache()
+    assert "get_current_play" in NEVER_CACHE
+    assert cache.key("get_current_play", {"team_id": 147, "gamedate": "2024-06-02"}) is None
+
+
+def test_running_season_scan_is_not_cached():
+    cache = ResponseCache()
+    params = {"team_id": 147, "season": 2023}
+    key = cache.key("get_season_clutch_moments", params)
+    running = {"summary": {"status": "running", "scored": 40}, "clutch_plays": []}
+    cache.put(key, "get_season_clutch_moments", params, running, "partial summary", 900.0)
+    assert cache.get(key) is None
+
+    done = {"summary": {"status": "done", "scored": 81}, "clutch_plays": []}
+    cache.put(key, "get_season_clutch_moments", params, done, "summary", 900.0)
+    assert cache.get(key)["summary"] == "summary"
@@ -0,0 +1,44 @@
+import pytest
+
+from mlbdata.schedule import _SeasonIndex, normalize_date
+
+
+@pytest.mark.parametrize("text", ["2024-06-02", "2024/06/02", " 2024-06-02 "])
+def test_year_first_dates(text):
+    assert normalize_date(text) == "2024-06-02"
+
+
+@pytest.mark.parametrize("text", ["25/06/2024", "25-06-2024", "06/25/2024", "06-25-2024"])
+def test_unambiguous_day_month_orders(text):
+    assert normalize_date(text) == "2024-06-25"
+
+
+@pytest.mark.parametrize("text", ["06/02/2024", "06-02-2024"])
+def test_ambiguous_dates_are_month_first(text):
+    assert normalize_date(text) == "2024-06-02"
+
+
+@pytest.mark.parametrize("text", ["", "yesterday", "2024-13-45", None])
+def test_unparseable_dates(text):
+    assert normalize_date(text) is None
+
+
+def scheduled(game_pk, day, home=147, away=111, number=1):
+    return {"gamePk": game_pk, "gameNumber": number, "officialDate": day,
+            "teams": {"home": {"team": {"id": home}}, "away": {"team": {"id": away}}}}
+
+
+def test_reindexing_swaps_in_new_tables():
+    entry = _SeasonIndex(2024)
+    entry.index_dates([{"date": "2024-06-01", "games": [scheduled(1, "2024-06-01")]},
+                       {"date": "2024-06-02", "games": [scheduled(3, "2024-06-02", number=2),
+                                                        scheduled(2, "2024-06-02")]}])
+    before = entry.tables
+    entry.index_dates([{"date": "2024-06-02", "games": [scheduled(4, "2024-06-02", home=121)]}], reindex=True)
+    by_date, by_team_date = entry.tables
+
+    # Readers still holding the old tables see them unchanged
+    assert [g["gamePk"] for g in before[1][(147, "2024-06-02")]] == [2, 3]
+    assert (147, "2024-06-02") not in by_team_date
+    assert [g["gamePk"] for g in by_team_date[(121, "2024-06-02")]] == [4]
+    assert [g["gamePk"] for g in by_date["2024-06-01"]] == [1]
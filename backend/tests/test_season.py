@@ -0,0 +1,114 @@
+import threading
+
+import pytest
+
+from mlbdata import clutch, season
+
+
+def plate_appearance(inning, top, outs, home, away, event="Single"):
+    return {
+        "result": {"event": event, "description": f"{event} in the {inning}th", "homeScore": home, "awayScore": away},
+        "about": {"inning": inning, "isTopInning": top, "isComplete": True, "isScoringPlay": False},
+        "count": {"outs": outs},
+        "matchup": {"batter": {"fullName": "Batter"}, "pitcher": {"fullName": "Pitcher"}},
+        "playEvents": [{"playId": f"{inning}-{top}-{outs}-{home}"}],
+    }
+
+
+def game(game_pk):
+    return {"gamePk": game_pk, "officialDate": "2024-06-02",
+            "teams": {"home": {"team": {"name": "Home"}, "score": 1}, "away": {"team": {"name": "Away"}, "score": 0}}}
+
+
+class Schedule:
+    def __init__(self, games):
+        self.games = games
+        self.calls = 0
+
+    def team_games(self, team_id, year, start, end):
+        self.calls += 1
+        return self.games
+
+
+@pytest.fixture
+def scan_env(tmp_path, monkeypatch):
+    """
+    Three games on a fake schedule whose feeds are held back until released
+    """
+    release = threading.Event()
+    fetched = []
+    schedule = Schedule([game(1), game(2), game(3)])
+
+    def final_game(g):
+        fetched.append(g["gamePk"])
+        release.wait(5)
+        return {"plays": [plate_appearance(1, True, 1, 0, 0), plate_appearance(9, False, 1, g["gamePk"], 0, "Home Run")]}
+
+    monkeypatch.setattr(season, "CHECKPOINT_DIR", str(tmp_path))
+    monkeypatch.setattr(season, "SCORE_WORKERS", 0)
+    monkeypatch.setattr(season, "get_schedule_index", lambda: schedule)
+    monkeypatch.setattr(season, "final_game", final_game)
+    return release, fetched, schedule
+
+
+def test_slow_scan_returns_progress_and_callers_share_it(scan_env):
+    release, fetched, schedule = scan_env
+    first = season.scan_season(147, season=2024, wait=0.05)
+    second = season.scan_season(147, season=2024, wait=0.05)
+    assert first["summary"]["status"] == second["summary"]["status"] == "running"
+    assert schedule.calls == 1
+
+    release.set()
+    report = season.scan_season(147, season=2024, wait=5)
+    assert report["summary"]["status"] == "done"
+    assert report["summary"]["games"] == 3
+    assert sorted(fetched) == [1, 2, 3]
+    assert report["clutch_plays"][0]["event"] == "Home Run"
+    assert season.stats()["running"] == 0
+
+
+def test_finished_scan_resumes_from_checkpoint(scan_env):
+    release, fetched, _ = scan_env
+    release.set()
+    season.scan_season(147, season=2024, wait=5)
+    report = season.scan_season(147, season=2024, wait=5)
+    assert report["summary"]["resumed"] == 3
+    assert report["summary"]["scored"] == 0
+    assert len(fetched) == 3
+
+
+def test_limit_applies_to_the_merged_ranking(scan_env):
+    release, _, _ = scan_env
+    release.set()
+    report = season.scan_season(147, season=2024, limit=2, wait=5)
+    assert len(report["clutch_plays"]) == 2
+
+
+def test_joining_caller_with_a_larger_limit_gets_its_plays(scan_env):
+    release, _, _ = scan_env
+    first = season.scan_season(147, season=2024, limit=1, wait=0.05)
+    assert first["summary"]["status"] == "running"
+    joined = season.scan_season(147, season=2024, limit=6, wait=0.05)
+    release.set()
+    assert joined["summary"]["status"] == "running"
+    assert len(season.scan_season(147, season=2024, limit=6, wait=5)["clutch_plays"]) == 6
+    assert len(season.scan_season(147, season=2024, limit=1, wait=5)["clutch_plays"]) == 1
+
+
+def test_game_scored_with_a_smaller_limit_is_scored_again(scan_env):
+    release, fetched, _ = scan_env
+    release.set()
+    season.scan_season(147, season=2024, limit=1, wait=5)
+    report = season.scan_season(147, season=2024, limit=2, wait=5)
+    assert report["summary"]["scored"] == 3
+    assert len(report["clutch_plays"]) == 2
+    assert len(fetched) == 6
+
+
+def test_score_pool_uses_spawned_workers():
+    pool = season._get_score_pool()
+    assert pool._mp_context.get_start_method() == "spawn"
+    assert pool._initializer is clutch.init_score_worker
+    key_plays, score_ms = pool.submit(clutch.score_game, {"gamePk": 1},
+                                      [plate_appearance(1, True, 1, 0, 0)], 5).result(timeout=60)
+    assert len(key_plays) == 1
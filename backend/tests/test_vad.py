@@ -0,0 +1,85 @@
+import base64
+
+import numpy as np
+
+from vad import FRAME_MS, VadStats, VoiceGate
+
+RATE = 16000
+FRAME_BYTES = RATE * FRAME_MS // 1000 * 2
+
+
+def silence(ms):
+    return np.zeros(RATE * ms // 1000, dtype="<i2").tobytes()
+
+
+def tone(ms, amplitude=8000, hz=220):
+    t = np.arange(RATE * ms // 1000) / RATE
+    return (amplitude * np.sin(2 * np.pi * hz * t)).astype("<i2").tobytes()
+
+
+def test_silence_is_dropped():
+    gate = VoiceGate(sample_rate=RATE)
+    assert gate.filter(silence(2000)) == b""
+    assert gate.stats()["bytes_saved"] == len(silence(2000))
+
+
+def test_speech_is_forwarded_with_pre_roll_and_hangover():
+    gate = VoiceGate(sample_rate=RATE, pre_roll_ms=200, hangover_ms=400)
+    audio = silence(1000) + tone(500) + silence(1000)
+    out = gate.filter(audio)
+    assert len(out) == len(silence(200) + tone(500) + silence(400))
+    # Forwarded audio starts with the pre-roll of silence, then the speech
+    assert out[:len(silence(200))] == silence(200)
+
+
+def test_pre_roll_reaches_into_the_previous_chunk():
+    gate = VoiceGate(sample_rate=RATE, pre_roll_ms=200, hangover_ms=0)
+    assert gate.filter(silence(1000)) == b""
+    out = gate.filter(tone(300))
+    assert len(out) == len(silence(200) + tone(300))
+
+
+def test_partial_frames_are_carried_over():
+    gate = VoiceGate(sample_rate=RATE, pre_roll_ms=0, hangover_ms=0)
+    speech = tone(100)
+    first = gate.filter(speech[:FRAME_BYTES + 10])
+    second = gate.filter(speech[FRAME_BYTES + 10:])
+    assert first + second == speech
+
+
+def test_base64_input():
+    gate = VoiceGate(sample_rate=RATE, pre_roll_ms=0, hangover_ms=0)
+    assert gate.filter(base64.b64encode(tone(100)).decode()) == tone(100)
+
+
+def noise(ms, dbfs, seed=1):
+    samples = np.random.default_rng(seed).normal(0, 32768 * 10 ** (dbfs / 20), RATE * ms // 1000)
+    return np.clip(samples, -32768, 32767).astype("<i2").tobytes()
+
+
+def test_steady_noise_is_learned_and_dropped():
+    # White noise crosses zero as often as unvoiced speech, at a level the
+    # unvoiced test alone would pass
+    gate = VoiceGate(sample_rate=RATE)
+    audio = noise(5000, -55)
+    for offset in range(0, len(audio), 2 * FRAME_BYTES):
+        gate.filter(audio[offset:offset + 2 * FRAME_BYTES])
+    stats = gate.stats()
+    assert stats["frames_out"] < stats["frames_in"] // 10
+    assert gate.filter(tone(200)) != b""
+
+
+def test_thinning_keeps_one_frame_in_n():
+    gate = VoiceGate(sample_rate=RATE, thin_every=10)
+    out = gate.filter(silence(2000))
+    assert len(out) == 10 * FRAME_BYTES
+
+
+def test_stats_totals():
+    stats = VadStats()
+    gate = VoiceGate(sample_rate=RATE)
+    gate.filter(silence(1000))
+    stats.add(gate)
+    snapshot = stats.snapshot()
+    assert snapshot["sessions"] == 1
+    assert snapshot["audio_seconds_saved"] == 1.0
@@ -0,0 +1,336 @@
+"""
+Background jobs for video summaries.
+
+A summary takes one multimodal model call, often tens of seconds, so
+/summaryJobs answers with a job id straight away and a fixed pool of
+VIDEO_SUMMARY_WORKERS threads works through a queue of at most
+VIDEO_JOB_QUEUE_SIZE jobs. Clients poll the job, optionally waiting for it
+to finish, or pass a callback url that gets the finished job POSTed to it.
+A clip that is already queued or running is not queued again: the second
+submission gets the first job. Finished jobs are kept for VIDEO_JOB_TTL_SECONDS.
+
+Jobs run in the process that accepted them. With a store (the SQLite
+summary cache) every state change is written through, so a poll that lands
+on another process, or comes after a restart, still finds the job. A stored
+job that has not finished or been updated for VIDEO_JOB_STALE_SECONDS lost
+its process and is reported as failed. Without a store jobs only live in
+memory and the server must run as a single process.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from urllib.parse import urlparse
+
+import requests
+
+from mlbdata.singleflight import normalize_url
+
+logger = logging.getLogger(__name__)
+
+WORKERS = int(os.environ.get("VIDEO_SUMMARY_WORKERS", 4))
+QUEUE_SIZE = int(os.environ.get("VIDEO_JOB_QUEUE_SIZE", 100))
+JOB_TTL_SECONDS = float(os.environ.get("VIDEO_JOB_TTL_SECONDS", 3600))
+JOB_STALE_SECONDS = float(os.environ.get("VIDEO_JOB_STALE_SECONDS", 1800))
+# Comma separated hosts that may receive callbacks; empty disables them
+CALLBACK_HOSTS = [host.strip() for host in os.environ.get("VIDEO_JOB_CALLBACK_HOSTS", "").split(",") if host.strip()]
+CALLBACK_TIMEOUT = 10
+
+# Recent jobs kept for the latency percentiles in stats()
+LATENCY_WINDOW = 500
+
+# How often a poll waiting on a job of another process rereads the store
+STORE_POLL_SECONDS = 0.5
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, url, callback=None):
+        self.id = uuid.uuid4().hex
+        self.url = url
+        self.callbacks = [callback] if callback else []
+        self.status = "queued"
+        self.summary = None
+        self.error = None
+        self.cached = False
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.done = threading.Event()
+        # Set once submit() has written the queued record
+        self.stored = threading.Event()
+
+    def record(self):
+        return {"id": self.id, "url": self.url, "status": self.status, "summary": self.summary,
+                "error": self.error, "cached": self.cached, "submitted_at": self.submitted_at,
+                "started_at": self.started_at, "finished_at": self.finished_at}
+
+    @classmethod
+    def from_record(cls, record):
+        job = cls(record["url"])
+        for name, value in record.items():
+            setattr(job, name, value)
+        if job.finished_at is not None:
+            job.done.set()
+        return job
+
+    def to_dict(self):
+        job = {
+            "job_id": self.id,
+            "status": self.status,
+            "url": self.url,
+            "submitted_at": self.submitted_at,
+        }
+        if self.started_at is not None:
+            job["wait_ms"] = round((self.started_at - self.submitted_at) * 1000, 1)
+        if self.finished_at is not None:
+            job["run_ms"] = round((self.finished_at - self.started_at) * 1000, 1)
+        if self.status == "done":
+            job["summary"] = self.summary
+            job["cached"] = self.cached
+        if self.status == "error":
+            job["error"] = self.error
+        return job
+
+
+def callback_allowed(url):
+    parsed = urlparse(url)
+    return parsed.scheme in ("http", "https") and parsed.hostname in CALLBACK_HOSTS
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(int(len(ordered) * fraction), len(ordered) - 1)], 1)
+
+
+class SummaryJobs:
+    """
+    Job table and worker pool. summarize is called on a worker thread with
+    the clip url and returns the summary text; cached, if given, returns a
+    stored summary or None and is checked at submit time. store, if given,
+    keeps job records across processes (put_job, get_job and prune_jobs).
+    """
+
+    def __init__(self, summarize, cached=None, store=None, workers=WORKERS, queue_size=QUEUE_SIZE,
+                 ttl=JOB_TTL_SECONDS, stale=JOB_STALE_SECONDS):
+        self.summarize = summarize
+        self.cached = cached
+        self.store = store
+        self.ttl = ttl
+        self.stale = stale
+        self._store_pruned_at = 0.0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._active = {}
+        self._running = 0
+        self._counts = {"submitted": 0, "deduplicated": 0, "cache_hits": 0, "completed": 0, "failed": 0,
+                        "rejected": 0, "callbacks_sent": 0, "callbacks_failed": 0, "store_reads": 0,
+                        "store_errors": 0}
+        self._wait_ms = deque(maxlen=LATENCY_WINDOW)
+        self._run_ms = deque(maxlen=LATENCY_WINDOW)
+        self._threads = []
+        for number in range(1, workers + 1):
+            thread = threading.Thread(target=self._work, name=f"summary-worker-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, url, callback=None):
+        """
+        The job for url: a finished one on a cache hit, the queued or running
+        one for the same clip, or a new queued job. Raises QueueFull when
+        the queue is at capacity.
+        """
+        key = normalize_url(url)
+        summary = self.cached(url) if self.cached is not None else None
+        record = None
+        with self._lock:
+            prune_cutoff = self._prune()
+            self._counts["submitted"] += 1
+            if summary is not None:
+                job = Job(url, callback)
+                job.status, job.summary, job.cached = "done", summary, True
+                job.started_at = job.finished_at = job.submitted_at
+                job.done.set()
+                self._jobs[job.id] = job
+                self._counts["cache_hits"] += 1
+                record = job.record()
+            elif key in self._active:
+                self._counts["deduplicated"] += 1
+                job = self._active[key]
+                if callback:
+                    job.callbacks.append(callback)
+                callback = None
+            else:
+                job = Job(url, callback)
+                # Only submit() puts, under the lock, so a queue with room stays that way
+                if self._queue.full():
+                    self._counts["rejected"] += 1
+                    raise QueueFull()
+                self._queue.put_nowait(job)
+                self._jobs[job.id] = job
+                self._active[key] = job
+                record, callback = job.record(), None
+        # The store is written after releasing the lock, so a slow disk does
+        # not hold up polls and other submissions
+        if record is not None:
+            if not self._store(record):
+                self._count("store_errors")
+            job.stored.set()
+        if prune_cutoff is not None:
+            self._prune_store(prune_cutoff)
+        if callback:
+            threading.Thread(target=self._send_callback, args=(job, callback), daemon=True).start()
+        return job
+
+    def get(self, job_id, wait=0):
+        """
+        The job with job_id, after waiting up to wait seconds for it to
+        finish, or None if there is no such job
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return self._get_stored(job_id, wait)
+        if wait > 0:
+            job.done.wait(wait)
+        return job
+
+    def _get_stored(self, job_id, wait):
+        """
+        A job another process (or an earlier run of this one) accepted, as
+        last written to the store, polling it while it is unfinished
+        """
+        if self.store is None:
+            return None
+        deadline = time.time() + wait
+        while True:
+            try:
+                stored = self.store.get_job(job_id)
+            except Exception as e:
+                logger.warning(f"Reading summary job {job_id} failed: {e}")
+                self._count("store_errors")
+                return None
+            self._count("store_reads")
+            if stored is None:
+                return None
+            record, updated_at = stored
+            job = Job.from_record(record)
+            if job.done.is_set():
+                return job
+            if time.time() - updated_at > self.stale:
+                job.status, job.error = "error", "Job was interrupted, submit the clip again"
+                return job
+            if time.time() >= deadline:
+                return job
+            time.sleep(min(STORE_POLL_SECONDS, max(deadline - time.time(), 0)))
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            # The queued record must not land after this job's later ones
+            job.stored.wait()
+            with self._lock:
+                self._running += 1
+                job.status = "running"
+                job.started_at = time.time()
+                record = job.record()
+            if not self._store(record):
+                self._count("store_errors")
+            try:
+                summary = self.summarize(job.url)
+                status, error = "done", None
+            except Exception as e:
+                logger.exception(f"Summary job {job.id} for {job.url} failed")
+                summary, status, error = None, "error", str(e)
+            with self._lock:
+                self._running -= 1
+                job.summary, job.error = summary, error
+                job.finished_at = time.time()
+                job.status = status
+                self._active.pop(normalize_url(job.url), None)
+                self._counts["completed" if status == "done" else "failed"] += 1
+                self._wait_ms.append((job.started_at - job.submitted_at) * 1000)
+                self._run_ms.append((job.finished_at - job.started_at) * 1000)
+                record = job.record()
+            if not self._store(record):
+                self._count("store_errors")
+            job.done.set()
+            self._queue.task_done()
+            logger.info(f"Summary job {job.id} {status} after {(job.finished_at - job.submitted_at):.1f} s")
+            for callback in job.callbacks:
+                self._send_callback(job, callback)
+
+    def _send_callback(self, job, callback):
+        try:
+            requests.post(callback, json=job.to_dict(), timeout=CALLBACK_TIMEOUT).raise_for_status()
+            outcome = "callbacks_sent"
+        except requests.RequestException as e:
+            logger.warning(f"Callback for summary job {job.id} to {callback} failed: {e}")
+            outcome = "callbacks_failed"
+        with self._lock:
+            self._counts[outcome] += 1
+
+    def _store(self, record):
+        """
+        Write a job record through to the store. False if that failed.
+        """
+        if self.store is None:
+            return True
+        try:
+            self.store.put_job(record)
+            return True
+        except Exception as e:
+            logger.warning(f"Storing summary job {record['id']} failed: {e}")
+            return False
+
+    def _prune(self):
+        """
+        Drop expired jobs from memory, under the lock. Returns the cutoff
+        when the store is due to be pruned as well, or None.
+        """
+        cutoff = time.time() - self.ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+        if self.store is not None and time.time() - self._store_pruned_at > 60:
+            self._store_pruned_at = time.time()
+            return cutoff
+        return None
+
+    def _prune_store(self, cutoff):
+        try:
+            self.store.prune_jobs(cutoff)
+        except Exception as e:
+            logger.warning(f"Pruning stored summary jobs failed: {e}")
+            self._count("store_errors")
+
+    def stats(self):
+        with self._lock:
+            wait_ms, run_ms = list(self._wait_ms), list(self._run_ms)
+            report = {
+                "workers": len(self._threads),
+                "queue_size": self._queue.maxsize,
+                "queue_depth": self._queue.qsize(),
+                "running": self._running,
+                "jobs_kept": len(self._jobs),
+                **self._counts,
+            }
+        report["wait_ms"] = {"avg": round(sum(wait_ms) / len(wait_ms), 1) if wait_ms else None,
+                             "p50": _percentile(wait_ms, 0.5), "p95": _percentile(wait_ms, 0.95)}
+        report["run_ms"] = {"avg": round(sum(run_ms) / len(run_ms), 1) if run_ms else None,
+                            "p50": _percentile(run_ms, 0.5), "p95": _percentile(run_ms, 0.95)}
+        return report
@@ -1,6 +1,8 @@
 import requests
 import json
+import logging
 import os
+import time
 from google.cloud import aiplatform
 from google.protobuf import json_format
 from google.protobuf.struct_pb2 import Value
@@ -8,34 +10,79 @@ import vertexai
 from flask_cors import CORS
 from flask import Flask,jsonify,request
 from vertexai.generative_models import GenerativeModel, Part
+from mlbdata.singleflight import SingleFlight, normalize_url
+from summary_cache import get_summary_cache
+from jobs import SummaryJobs, QueueFull, callback_allowed
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app,origins=[""])
 
-@app.route('/generateVideoSummary', methods=['GET'])
-def summarize_video():
-    
-    aiplatform.init(project="", location="")
-    query = request.args.get('query')
+# Set up once per process, not per request
+aiplatform.init(project="", location="")
+model = GenerativeModel("gemini-2.0-flash-exp")
 
-    print(query)
-    model = GenerativeModel("gemini-2.0-flash-exp")
-
-    prompt = """
+PROMPT = """
     Provide a detailed description of the video and structure in bullet points. Show scores, player statsitics in a nice html table that can be rendered easily.
      """
+# Part of the summary cache key: change it whenever PROMPT changes
+PROMPT_VERSION = "1"
+
+# Concurrent requests for the same clip share one model call
+summary_flights = SingleFlight()
 
+
+def generate_summary(video_url):
     video_file = Part.from_uri(
-    uri=query,
+    uri=video_url,
     mime_type="video/mp4",
     )
 
-    contents = [video_file, prompt]
+    contents = [video_file, PROMPT]
 
+    started = time.perf_counter()
     response = model.generate_content(contents)
+    model_ms = (time.perf_counter() - started) * 1000
+    logger.info(f"Summarized {video_url} in {model_ms:.0f} ms")
+
+    cache = get_summary_cache()
+    if cache is not None:
+        cache.put(video_url, PROMPT_VERSION, response.text, model_ms)
+    return response.text
+
+
+def summarize(video_url):
+    """
+    Summary of a clip from the cache, or from one model call shared by
+    every request that asks for it meanwhile
+    """
+    summary = cached_summary(video_url)
+    if summary is not None:
+        return summary
+
+    def generate():
+        # A flight that finished between the check above and this one starting
+        # has stored its summary already
+        summary = cached_summary(video_url)
+        return summary if summary is not None else generate_summary(video_url)
+
+    return summary_flights.do(normalize_url(video_url), generate)
+
+
+@app.route('/generateVideoSummary', methods=['GET'])
+def summarize_video():
+
+    query = request.args.get('query')
+    if not query:
+        return jsonify({"error": "No query provided"}), 400
+
+    print(query)
+
     # Create a dictionary with the summary
     structured_data = {
-    "summary": response.text
+    "summary": summarize(query)
     }
 
     # Convert to JSON
@@ -43,6 +90,54 @@ def summarize_video():
 
     return json_response
 
+def cached_summary(video_url):
+    cache = get_summary_cache()
+    return cache.get(video_url, PROMPT_VERSION) if cache is not None else None
+
+
+# Job records are written through to the summary cache's SQLite file, so any
+# process sharing it can answer a poll
+summary_jobs = SummaryJobs(summarize, cached=cached_summary, store=get_summary_cache())
+
+# Longest a poll may wait for its job to finish
+MAX_POLL_WAIT_SECONDS = 25
+
+
+@app.route('/summaryJobs', methods=['POST'])
+def submit_summary_job():
+    query = request.args.get('query')
+    if not query:
+        return jsonify({"error": "No query provided"}), 400
+
+    callback = request.args.get('callback')
+    if callback and not callback_allowed(callback):
+        return jsonify({"error": "Callback host not allowed"}), 400
+
+    try:
+        job = summary_jobs.submit(query, callback)
+    except QueueFull:
+        return jsonify({"error": "Too many summaries queued, try again shortly"}), 503, {"Retry-After": "10"}
+    return jsonify(job.to_dict()), 202, {"Location": f"/summaryJobs/{job.id}"}
+
+
+@app.route('/summaryJobs/<job_id>', methods=['GET'])
+def get_summary_job(job_id):
+    wait = min(request.args.get('wait', 0, type=float), MAX_POLL_WAIT_SECONDS)
+    job = summary_jobs.get(job_id, wait)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_snapshot():
+    cache = get_summary_cache()
+    return jsonify({
+        "summary_cache": cache.stats() if cache is not None else None,
+        "summary_coalescing": summary_flights.stats(),
+        "summary_jobs": summary_jobs.stats(),
+    })
+
 if __name__ == '__main__':
-    app.run(debug=True, host="0.0.0.0", port=int(os.environ.get("PORT", 8080)))
-    
\ No newline at end of file
+    # The reloader would run the app, and its summary workers, in a second process
+    app.run(debug=True, use_reloader=False, host="0.0.0.0", port=int(os.environ.get("PORT", 8080)), threaded=True)
@@ -0,0 +1,133 @@
+"""
+Persistent cache of video summaries.
+
+Highlight clips do not change once published, so a summary is stored in
+SQLite keyed on the clip's url and the prompt version, and every later
+request for the clip is served from there. Bump PROMPT_VERSION in main.py
+when the prompt changes so older summaries are no longer served.
+
+The same file keeps summary job records (see jobs.py), so a job can be
+polled from any server process and after a restart.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from mlbdata.singleflight import normalize_url
+
+logger = logging.getLogger(__name__)
+
+# An empty path disables the cache
+SUMMARY_CACHE_PATH = os.environ.get("VIDEO_SUMMARY_CACHE_PATH", "video_summaries.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    url TEXT,
+    prompt_version TEXT,
+    summary TEXT,
+    model_ms REAL,
+    created_at REAL,
+    PRIMARY KEY (url, prompt_version)
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    record TEXT,
+    updated_at REAL
+);
+"""
+
+
+class SummaryCache:
+    """
+    SQLite store with one connection per thread, in WAL mode so several
+    server processes can share the file
+    """
+
+    def __init__(self, path=SUMMARY_CACHE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "model_ms_saved": 0.0}
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def get(self, url, prompt_version):
+        row = self._connection().execute(
+            "SELECT summary, model_ms FROM summaries WHERE url = ? AND prompt_version = ?",
+            (normalize_url(url), prompt_version),
+        ).fetchone()
+        with self._stats_lock:
+            if row is None:
+                self._stats["misses"] += 1
+            else:
+                self._stats["hits"] += 1
+                self._stats["model_ms_saved"] += row[1]
+        return None if row is None else row[0]
+
+    def put(self, url, prompt_version, summary, model_ms):
+        conn = self._connection()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?)",
+                         (normalize_url(url), prompt_version, summary, model_ms, time.time()))
+        with self._stats_lock:
+            self._stats["writes"] += 1
+
+    def put_job(self, record):
+        conn = self._connection()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO jobs VALUES (?, ?, ?)",
+                         (record["id"], json.dumps(record), time.time()))
+
+    def get_job(self, job_id):
+        """
+        The stored record of a job and when it was last written, or None
+        """
+        row = self._connection().execute(
+            "SELECT record, updated_at FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return None if row is None else (json.loads(row[0]), row[1])
+
+    def prune_jobs(self, before):
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM jobs WHERE updated_at < ?", (before,))
+
+    def stats(self):
+        with self._stats_lock:
+            report = dict(self._stats)
+        report["model_ms_saved"] = round(report["model_ms_saved"], 1)
+        report["entries"] = self._connection().execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        return report
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_summary_cache():
+    """
+    The process-wide SummaryCache, or None when VIDEO_SUMMARY_CACHE_PATH is
+    empty or the database cannot be opened
+    """
+    global _cache
+    if not SUMMARY_CACHE_PATH:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = SummaryCache(SUMMARY_CACHE_PATH)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Summary cache disabled, cannot open {SUMMARY_CACHE_PATH}: {e}")
+                return None
+        return _cache
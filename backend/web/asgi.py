@@ -0,0 +1,197 @@
+"""
+asyncio-native entry point for the web backend.
+
+Same routes, sessions, response cache and function map as the Flask app in
+main.py, but model calls and single Stats API calls are awaited on the event
+loop instead of holding a thread each, so one worker keeps many slow
+requests in flight. Tools that need more than one call still run on a small
+thread pool. Run with:
+
+    gunicorn --worker-class uvicorn.workers.UvicornWorker asgi:app
+"""
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from main import (
+    CORS_ORIGINS,
+    ChatTurn,
+    api_function_map,
+    chat_sessions,
+    response_cache,
+    sse_event,
+    summary_text,
+)
+from mlbdata import aio
+from mlbdata.metrics import snapshot as metrics
+from mlbdata.aio import close_async_client
+from mlbdata.tools import run_function
+
+logger = logging.getLogger(__name__)
+
+TOOL_WORKERS = int(os.environ.get("WEB_TOOL_WORKERS", 8))
+
+app = FastAPI()
+app.add_middleware(CORSMiddleware, allow_origins=CORS_ORIGINS, allow_methods=["GET"], allow_headers=["*"],
+                   expose_headers=["X-Session-Id"])
+
+tool_executor = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="web-tool")
+
+
+def session_lock(session):
+    # asyncio locks belong to a loop, so they are made here rather than in ChatSession
+    if session.async_lock is None:
+        session.async_lock = asyncio.Lock()
+    return session.async_lock
+
+
+def resolve_session(request):
+    return chat_sessions.get(request.query_params.get('session_id') or request.headers.get('X-Session-Id'))
+
+
+async def call_api_function(function_call):
+    function_name = function_call.name
+    function_params = {key: value for key, value in function_call.args.items()}
+
+    logger.info(f"Calling function: {function_name}")
+    return function_name, function_params, await run_function(function_name, function_params, api_function_map, tool_executor)
+
+
+async def run_chat_turn(session, enhanced_query):
+    turn = ChatTurn(session)
+    try:
+        model_response = await session.chat.send_message_async(enhanced_query)
+        cached = None
+        while True:
+            function_call = model_response.candidates[0].content.parts[0].function_call
+            if not turn.wants_tool(function_call):
+                break
+            cached = turn.replay(function_call)
+            if cached is not None:
+                break
+            part = turn.respond(*await call_api_function(function_call))
+            model_response = await session.chat.send_message_async(part)
+
+        summary = cached["summary"] if cached is not None else summary_text(model_response.text)
+        turn.finish(summary)
+        return {**turn.api_response, "summary": summary, "session_id": session.session_id}, 200
+
+    except Exception as e:
+        logger.error(f"Error processing query: {str(e)}")
+        return {"error": "An error occurred while processing the query", "session_id": session.session_id}, 500
+    finally:
+        # Also when the request was cancelled because the client went away
+        turn.close()
+
+
+async def stream_chat_turn(session, enhanced_query):
+    """
+    Async version of main.stream_chat_turn, with the same events
+    """
+    started = time.perf_counter()
+
+    def elapsed_ms():
+        return round((time.perf_counter() - started) * 1000, 1)
+
+    async with session_lock(session):
+        turn = ChatTurn(session)
+        yield sse_event("session", {"session_id": session.session_id, "elapsed_ms": elapsed_ms()})
+
+        try:
+            message = enhanced_query
+            summary = []
+            while True:
+                function_call = None
+                async for chunk in await session.chat.send_message_async(message, stream=True):
+                    part = chunk.candidates[0].content.parts[0]
+                    if part.function_call:
+                        function_call = part.function_call
+                    elif "text" in part.to_dict():
+                        text = summary_text(part.text)
+                        summary.append(text)
+                        yield sse_event("summary", {"text": text, "elapsed_ms": elapsed_ms()})
+
+                if not turn.wants_tool(function_call):
+                    break
+
+                yield sse_event("tool_start", {"name": function_call.name, "args": dict(function_call.args), "elapsed_ms": elapsed_ms()})
+                cached = turn.replay(function_call)
+                if cached is not None:
+                    yield sse_event("tool_end", {"name": function_call.name, "result": cached["api_response"],
+                                                 "cached": True, "tool_ms": 0.0, "elapsed_ms": elapsed_ms()})
+                    yield sse_event("summary", {"text": cached["summary"], "cached": True, "elapsed_ms": elapsed_ms()})
+                    break
+
+                function_name, function_params, api_response = await call_api_function(function_call)
+                summary = []
+                yield sse_event("tool_end", {
+                    "name": function_name,
+                    "result": api_response,
+                    "tool_ms": round(turn.tool_ms(), 1),
+                    "elapsed_ms": elapsed_ms(),
+                })
+                message = turn.respond(function_name, function_params, api_response)
+
+            turn.finish("".join(summary))
+            yield sse_event("done", {"session_id": session.session_id, "elapsed_ms": elapsed_ms()})
+        except Exception as e:
+            logger.error(f"Error streaming query: {str(e)}")
+            yield sse_event("error", {"error": "An error occurred while processing the query", "elapsed_ms": elapsed_ms()})
+        finally:
+            # Also on CancelledError when the client disconnected mid-turn
+            turn.close()
+
+
+@app.get("/generate")
+async def process_mlb_query(request: Request):
+    user_query = request.query_params.get('query')
+    if not user_query:
+        return JSONResponse({"error": "No query provided"}, status_code=400)
+
+    session = resolve_session(request)
+    logger.info(f"Received query for session {session.session_id}: {user_query}")
+    enhanced_query = user_query + "\nProvide the API response in concise, high-level summary."
+
+    async with session_lock(session):
+        body, status = await run_chat_turn(session, enhanced_query)
+    return JSONResponse(body, status_code=status, headers={"X-Session-Id": session.session_id})
+
+
+@app.get("/generateStream")
+async def stream_mlb_query(request: Request):
+    user_query = request.query_params.get('query')
+    if not user_query:
+        return JSONResponse({"error": "No query provided"}, status_code=400)
+
+    session = resolve_session(request)
+    logger.info(f"Received streaming query for session {session.session_id}: {user_query}")
+    enhanced_query = user_query + "\nProvide the API response in concise, high-level summary."
+
+    return StreamingResponse(
+        stream_chat_turn(session, enhanced_query),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Session-Id": session.session_id},
+    )
+
+
+@app.get("/metrics")
+async def metrics_snapshot():
+    return {**metrics(), "async_stats_api": aio.stats(), "chat_sessions": chat_sessions.stats(),
+            "response_cache": response_cache.stats()}
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await close_async_client()
+    tool_executor.shutdown(wait=False)
@@ -1,31 +1,46 @@
-import requests
 import json
-from flask import Flask, jsonify, request
+import threading
+import time
+from functools import partial
+from flask import Flask, Response, jsonify, request, stream_with_context
 import vertexai
 import os
 from flask_cors import CORS
 from vertexai.generative_models import (
-    FunctionDeclaration, GenerationConfig, GenerativeModel, Part, Tool
+    Content, FunctionDeclaration, GenerationConfig, GenerativeModel, Part, Tool
 )
 import logging
+from mlbdata import games
+from mlbdata.metrics import snapshot as metrics
+from mlbdata.projection import VERBOSE_DESCRIPTION, project_response
+from mlbdata.tools import call_url_tool
+from response_cache import NEVER_CACHE, TOOL_TTLS, ResponseCache
+from sessions import ChatSessionManager
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize Vertex AI
+# Vertex AI is initialized with the model on first use, see get_gemini_model
 PROJECT_ID = ""  # @param {type:"string"}
 LOCATION = ""  # @param {type:"string"}
-vertexai.init(project=PROJECT_ID, location=LOCATION)
+
+# Also used by the ASGI app in asgi.py
+CORS_ORIGINS = [""]
 
 app = Flask(__name__)
-CORS(app, origins=[""])
+CORS(app, origins=CORS_ORIGINS)
+
+def with_verbose(parameters):
+    # Projected tools may ask for the full Stats API response
+    parameters["properties"]["verbose"] = {"type": "boolean", "description": VERBOSE_DESCRIPTION}
+    return parameters
 
 # Function Declarations
 get_mlb_leagues = FunctionDeclaration(
     name="get_mlb_leagues",
     description="Provides detailed information about all the Major League Baseball leagues that are playing in a given season and those leagues where division is still in use. This API can provide details about the number of leagues in MLB. It provides details on the number of games played in the league for a season, number of teams that are part of the league, number of wild card teams,preSeasonStartDate,preSeasonEndDate,seasonStartDate,springStartDate,springEndDate,regularSeasonStartDate,allStarDate,regularSeasonEndDate,postSeasonStartDate,postSeasonEndDate,seasonEndDate,offseasonStartDate,offSeasonEndDate,qualifierPlateAppearances",
-    parameters={
+    parameters=with_verbose({
         "type": "object",
         "properties": {
             "season": {
@@ -33,12 +48,12 @@ get_mlb_leagues = FunctionDeclaration(
                 "description": "season that the team is playing in",
             }
         },
-    },
+    }),
 )
 get_mlb_seasons = FunctionDeclaration(
     name="get_mlb_seasons",
     description="Provides detailed information about all the Major League Baseball seasons. This includes springStartDate,springEndDate,preSeasonStartDate,seasonStartDate,regularSeasonStartDate,regularSeasonEndDate,seasonEndDate,offseasonStartDate,offSeasonEndDate,qualifierPlateAppearances,qualifierOutsPitched,allStarDate",
-    parameters={
+    parameters=with_verbose({
         "type": "object",
         "properties": {
             "sportId": {
@@ -51,12 +66,12 @@ get_mlb_seasons = FunctionDeclaration(
             }
 
         },
-    },
+    }),
 )
 get_mlb_teams = FunctionDeclaration(
     name="get_mlb_teams",
     description="Retrieves all the Major League Baseball teams and not players. It retrieves team id or the id of all the teams, springLeague information, venue and stadium information, first year of play for that team, location of the team, which league does the team play in, which division does the team play in. Any query about a team without season information can be addressed using this API call.",
-    parameters={
+    parameters=with_verbose({
         "type": "object",
         "properties": {
             "sportID": {
@@ -64,13 +79,13 @@ get_mlb_teams = FunctionDeclaration(
                 "description": "Sport id for MLB",
             }
         },
-    },
+    }),
 )
 
 get_mlb_teams_by_season = FunctionDeclaration(
     name="get_mlb_teams_by_season",
     description="Provides details about all the Major Leaguee Baseball teams playing in a given season. It retrieves team id or the id of all the teams, springLeague information, venue information, stadium information, first year of play for that team, location of the team, which league does the team play in, which division does the team play in. Any query about a team can be addressed using this API call.",
-    parameters={
+    parameters=with_verbose({
         "type": "object",
         "properties": {
             "season": {
@@ -78,7 +93,7 @@ get_mlb_teams_by_season = FunctionDeclaration(
                 "description": "season that the team is playing in",
             }
         },
-    },
+    }),
 )
 
 get_mlb_teams_by_teamname_season = FunctionDeclaration(
@@ -102,7 +117,7 @@ get_mlb_teams_by_teamname_season = FunctionDeclaration(
 get_roster = FunctionDeclaration(
     name="get_roster",
     description="This provides MLB team roster information and its summary. It provides all information about all players playing for MLB in a season. Basic information about the MLB player name, player birthDate, name, player jersey number, player height, player weight,player number, player birth date,current player age, player birth city,player birth state, player birth country,player height, player weight, player position, draft year, education,awards name,award date,award season, award team,award date,mlb debut date,bat side code,pitch hand code,strike zone top, stroke zone bottom,draft pick round, draft pick number,signing bonus, trades or transactions, trade or transaction teams, trade or transactions dates,trade description,player type, player active or inactive",
-    parameters={
+    parameters=with_verbose({
         "type": "object",
         "properties": {
             "team_id": {
@@ -114,7 +129,7 @@ get_roster = FunctionDeclaration(
                 "description": "MLB season",
             }
         },
-    },
+    }),
 )
 
 
@@ -188,6 +203,32 @@ get_mlb_clutch_moments = FunctionDeclaration(
      },
 
 )
+get_season_clutch_moments = FunctionDeclaration(
+    name="get_season_clutch_moments",
+    description="Get the biggest clutch moments of a MLB team across a whole season or a date range. Every finished game is scored by win probability added and leverage index and the plays are merged into one ranked list with the game, batter, pitcher, inning, score and highlight video of each play",
+    parameters={
+        "type": "object",
+        "properties": {
+            "team_id": {
+                "type": "string",
+                "description": "Id of the team",
+            },
+            "season": {
+                "type": "string",
+                "description": "Season to scan when no dates are given",
+            },
+            "start_date": {
+                "type": "string",
+                "description": "First game date of the range, YYYY-MM-DD",
+            },
+            "end_date": {
+                "type": "string",
+                "description": "Last game date of the range, YYYY-MM-DD",
+            }
+        },
+    },
+)
+
 get_mlb_most_followed_teams = FunctionDeclaration(
     name="get_mlb_most_followed_teams",
     description="Retrieve information about most followed and most favorite teams in MLB or Major League Baseball. Summarise the response of the API and it gives the favorite team id for a user and favorite team ids for the user. Team ids can be found in the get_mlb_teams function call and name of the team will be retrieved from the get_mlb_teams API call ",
@@ -231,7 +272,7 @@ get_mlb_user_video_watch_sept15 = FunctionDeclaration(
 get_standings = FunctionDeclaration(
     name="get_standings",
     description="This provides MLB team standings or the team records for a season. Details on league Record/wins,league Record/losses,league Record/ties,league Record/points,streakNumber,streak,divisionRank,leagueRank,leagueRecord,wins,losses,ties,home wins, home losses, away wins, away losses,division records wins,division records losses,division records ties,division records points,overall Records wins, overall Records losses, overall Records ties, overall Records points,league Records wins, league Records losses, league Records ties,league Records points,runs allowed,runs Scored,division Champ,split Records wins, split Records losses, split Records ties, split Records types, split Records points",
-    parameters={
+    parameters=with_verbose({
         "type": "object",
         "properties": {
             "leagueId": {
@@ -243,7 +284,7 @@ get_standings = FunctionDeclaration(
                 "description": "MLB season",
             }
         },
-    },
+    }),
 )
 get_mlb_attendance = FunctionDeclaration(
     name="get_mlb_attendance",
@@ -287,6 +328,7 @@ mlb_insights_tool = Tool(
         get_roster,
         get_find_game,
         get_mlb_clutch_moments,
+        get_season_clutch_moments,
         get_mlb_most_followed_teams,
         get_mlb_user_video_watch,
         get_standings,
@@ -297,418 +339,254 @@ mlb_insights_tool = Tool(
     ],
 )
 
-# API Functions with improved error handling
-def fetch_mlb_data(url):
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
-        logger.error(f"API request failed: {str(e)}")
-        return {"error": str(e)}
-
-def get_mlb_leagues_from_api(content):
-    url = f"https://statsapi.mlb.com/api/v1/league?sportId=1&season={content['season']}"
-    return fetch_mlb_data(url)
-
-def get_mlb_seasons_from_api(content):
-    url = f"https://statsapi.mlb.com/api/v1/seasons/?sportId=1&season={content['season']}"
-    return fetch_mlb_data(url)
-
-def get_mlb_teams_from_api(content):
-    url = f"https://statsapi.mlb.com/api/v1/teams?sportId=1"
-    response = fetch_mlb_data(url)
-    if 'teams' in response:
-        for team in response['teams']:
-            team_id = team["id"]
-            team["teamurl"] = f"https://www.mlbstatic.com/team-logos/{team_id}.svg"
-    return response
-
-def get_mlb_teams_by_season_from_api(content):
-    url = f"https://statsapi.mlb.com/api/v1/teams?sportId=1&season={content['season']}"
-    response = fetch_mlb_data(url)
-    if 'teams' in response:
-        for team in response['teams']:
-            team_id = team["id"]
-            team["teamurl"] = f"https://www.mlbstatic.com/team-logos/{team_id}.svg"
-    return response
-
-def get_mlb_teams_by_teamname_season_from_api(content):
-    url = f"https://statsapi.mlb.com/api/v1/teams/{content['team_id']}?sportId=1&season={content['season']}"
-    return fetch_mlb_data(url)
-
-def get_roster_from_api(content):
-    url = f"https://statsapi.mlb.com/api/v1/teams/{content['team_id']}/roster/active?season={content['season']}"
-    response = fetch_mlb_data(url)
-    if 'roster' in response:
-        for player in response['roster']:
-            player_id = player["person"]["id"]
-            player["playerurl"] = f"https://securea.mlb.com/mlb/images/players/head_shot/{player_id}.jpg"
-    return response
-
-
-def extract_season(gamedate):
+# Single Stats API calls (leagues, seasons, teams, roster, standings) are url
+# tools in mlbdata.tools, game and clutch tools are shared in mlbdata.games
+api_function_map = {
+    **{name: partial(call_url_tool, name) for name in (
+        "get_mlb_leagues", "get_mlb_seasons", "get_mlb_teams", "get_mlb_teams_by_season", "get_roster", "get_standings")},
+    "get_find_game": games.get_game_data,
+    "get_season_clutch_moments": games.get_season_clutch_moments,
+    "get_current_play": games.get_current_play,
+}
+
+# A cache entry for a tool the model cannot call would silently never be used
+_unknown_cached_tools = (set(TOOL_TTLS) | NEVER_CACHE) - set(api_function_map)
+if _unknown_cached_tools:
+    raise RuntimeError(f"TOOL_TTLS names not in api_function_map: {sorted(_unknown_cached_tools)}")
+
+_gemini_model = None
+_gemini_model_lock = threading.Lock()
+
+def get_gemini_model():
     """
-    Extract the season (year) from the game date
-    Handles multiple date formats
+    The model, created on first use so importing this module (as the season
+    scan's spawned workers do) does not initialize Vertex AI
     """
-    date_formats = [
-        '%Y-%m-%d',  # YYYY-MM-DD
-        '%d-%m-%Y',  # DD-MM-YYYY
-        '%m-%d-%Y',  # MM-DD-YYYY
-        '%Y/%m/%d',  # YYYY/MM/DD
-        '%d/%m/%Y',  # DD/MM/YYYY
-        '%m/%d/%Y'   # MM/DD/YYYY
-    ]
-    
-    for fmt in date_formats:
-        try:
-            date_obj = datetime.strptime(gamedate, fmt)
-            return date_obj.year
-        except ValueError:
-            continue
-    
-    # If no format matches, try to extract year directly
-    try:
-        # Try extracting 4-digit year
-        year = int(''.join(filter(str.isdigit, gamedate))[:4])
-        if 1900 <= year <= datetime.now().year + 1:
-            return year
-    except (ValueError, TypeError):
-        pass
-    print(datetime.now().year)
-    # If all else fails, return current year
-    return datetime.now().year
-
-def get_game_data(content):
+    global _gemini_model
+    if _gemini_model is None:
+        with _gemini_model_lock:
+            if _gemini_model is None:
+                vertexai.init(project=PROJECT_ID, location=LOCATION)
+                _gemini_model = GenerativeModel(
+                    "gemini-2.0-flash-exp",
+                    generation_config=GenerationConfig(temperature=0),
+                    tools=[mlb_insights_tool],
+                )
+    return _gemini_model
 
-    try:
-        # Extract season and format date
-
-        season = extract_season(content['gamedate'])
-        
-        url = f"https://statsapi.mlb.com/api/v1/schedule?sportId=1&season={season}&types=regular&date={content['gamedate']}&teamIds={content['team_id']}"
-        
-        api_response = requests.get(url)
-        api_response.raise_for_status()
-        
-        data = api_response.json()
-        
-        if 'totalGames' not in data or data['totalGames'] is None:
-            return json.dumps({"error": "Invalid or missing 'totalGames' in API response."}, indent=2)
-        
-        if data['totalGames'] == 0:
-            return json.dumps({"error": "No games found for the specified date and team."}, indent=2)
-        
-        if 'dates' not in data or not data['dates']:
-            return json.dumps({"error": "Invalid or missing 'dates' in API response."}, indent=2)
-        
-        games = data['dates'][0]['games']
-        if not games:
-            return json.dumps({"error": "No games data found in API response."}, indent=2)
-        
-        gamePk = games[0]['gamePk']
-        
-        gameurl = f"https://statsapi.mlb.com/api/v1/schedule?sportId=1&season={season}&types=regular&date={content['gamedate']}&gamePk={gamePk}&hydrate=game(content(highlights(highlights)))"
-        
-        response = requests.get(gameurl)
-        response.raise_for_status()
-        data = response.json()
-        
-        if 'dates' not in data or not data['dates'] or 'games' not in data['dates'][0] or not data['dates'][0]['games']:
-            return json.dumps({"error": "Invalid or missing game data in API response."}, indent=2)
-        
-        game_data = data['dates'][0]['games'][0]
-        
-        output = {
-            "game_date": game_data.get('gameDate', 'Unknown'),
-            "status": game_data.get('status', {}).get('detailedState', 'Unknown'),
-            "teams": {
-                "away": {
-                    "name": game_data.get('teams', {}).get('away', {}).get('team', {}).get('name', 'Unknown'),
-                    "score": game_data.get('teams', {}).get('away', {}).get('score', 'Unknown')
-                },
-                "home": {
-                    "name": game_data.get('teams', {}).get('home', {}).get('team', {}).get('name', 'Unknown'),
-                    "score": game_data.get('teams', {}).get('home', {}).get('score', 'Unknown')
-                }
-            },
-            "highlights": []
-        }
-        
-        if 'content' in game_data and 'highlights' in game_data['content']:
-            highlights = game_data['content']['highlights']['highlights'].get('items', [])
-            for highlight in highlights:
-                highlight_data = {
-                    "title": highlight.get('headline', 'Unknown'),
-                    "id": highlight.get('id', 'Unknown'),
-                    "video_url": next((p['url'] for p in highlight.get('playbacks', []) if p.get('name') == 'mp4Avc'), None)
-                }
-                output['highlights'].append(highlight_data)
-        
-        return json.dumps(output, indent=2)
-    
-    except ValueError as e:
-        return json.dumps({"error": f"Date parsing error: {str(e)}"}, indent=2)
-    except requests.exceptions.RequestException as e:
-        return json.dumps({"error": f"An error occurred while fetching data: {str(e)}"}, indent=2)
-    except KeyError as e:
-        return json.dumps({"error": f"Missing expected data in API response: {str(e)}"}, indent=2)
-    except Exception as e:
-        return json.dumps({"error": f"An unexpected error occurred: {str(e)}"}, indent=2)
+def call_api_function(function_call):
+    function_name = function_call.name
+    function_params = {key: value for key, value in function_call.args.items()}
 
-def get_game_highlights(content):
+    logger.info(f"Calling function: {function_name}")
+    return function_name, function_params, api_function_map[function_name](function_params)
 
-    season = extract_season(content['gamedate'])
-    base_url = f"https://statsapi.mlb.com/api/v1/schedule?sportId=1&season={season}&types=regular&date={content['gamedate']}&teamIds={content['team_id']}&hydrate=game(content(highlights(highlights)))"
-    
-    try:
-        response = requests.get(base_url)
-        response.raise_for_status()
-        data = response.json()
-        
-        games = data['dates'][0]['games']
-        if not games:
-            return json.dumps({"error": "No games data found in API response."}, indent=2)
-        
-        gamePk = games[0]['gamePk']
-
-    except requests.RequestException as e:
-        print(f"Error fetching game data: {e}")
-        return None
-
-    base_url = f"https://statsapi.mlb.com/api/v1.1/game/{gamePk}/feed/live"
-    
-    try:
-        response = requests.get(base_url)
-        response.raise_for_status()
-        data = response.json()
-    except requests.RequestException as e:
-        print(f"Error fetching game data: {e}")
-        return None
-
-    highlights = {
-        "game_info": {
-            "gamePk": gamePk,
-            "home_team": data["gameData"]["teams"]["home"]["name"],
-            "away_team": data["gameData"]["teams"]["away"]["name"],
-            "home_score": data["liveData"]["linescore"]["teams"]["home"]["runs"],
-            "away_score": data["liveData"]["linescore"]["teams"]["away"]["runs"],
-        },
-        "key_plays": []
-    }
-
-    all_plays = data["liveData"]["plays"]["allPlays"]
-
-    for play in all_plays:
-        if is_key_play(play):
-            play_data = extract_play_data(play)
-            highlights["key_plays"].append(play_data)
-
-    return highlights
-
-def is_key_play(play):
-    event = play["result"]["event"]
-    return (event in ["Home Run", "Strikeout"] or
-            play["about"]["isScoringPlay"] or
-            "out" in event.lower())
-
-def extract_play_data(play):
-    result = play["result"]
-    about = play["about"]
-    matchup = play["matchup"]
-
-    play_data = {
-        "play_id": play["playEvents"][-1].get("playId", ""),
-        "inning": about["inning"],
-        "is_top_inning": about["isTopInning"],
-        "event": result["event"],
-        "description": result["description"],
-        "is_scoring_play": about["isScoringPlay"],
-        "batter": matchup["batter"]["fullName"],
-        "pitcher": matchup["pitcher"]["fullName"],
-        "pitch_data": extract_pitch_data(play["playEvents"][-1])
-    }
-
-    return play_data
-
-def extract_pitch_data(pitch_event):
-    if "pitchData" not in pitch_event:
-        return {}
-
-    pitch_data = pitch_event["pitchData"]
-    return {
-        "start_speed": pitch_data.get("startSpeed"),
-        "end_speed": pitch_data.get("endSpeed"),
-        "spin_rate": pitch_data.get("breaks", {}).get("spinRate"),
-        "pitch_type": pitch_event.get("details", {}).get("type", {}).get("description")
-    }
-
-def get_video_highlights(game_id):
-    url = f"https://statsapi.mlb.com/api/v1/game/{game_id}/content"
-    
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-    except requests.RequestException as e:
-        print(f"Error fetching video highlights: {e}")
-        return {}
-
-    video_urls = {}
-    for highlight in data.get("highlights", {}).get("highlights", {}).get("items", []):
-        play_id = highlight.get("guid", "")
-        video_url = next((p["url"] for p in highlight.get("playbacks", []) if p.get("name") == "mp4Avc"), None)
-        if play_id and video_url:
-            video_urls[play_id] = video_url
-
-    return video_urls
-
-def get_mlb_clutch_plays(content):
-    highlights = get_game_highlights(content)
-    if not highlights:
-        return
-    print(highlights)
-    gamesPk = highlights['game_info']
-    print(gamesPk['gamePk'])
-    video_urls = get_video_highlights(gamesPk['gamePk'])
-
-    for play in highlights["key_plays"]:
-        play["video_url"] = video_urls.get(play["play_id"], "")
-
-    print(highlights)
-    return json.dumps(highlights, indent=2)
-
-
-
-def get_find_game_from_api(content):
-    url = f"https://statsapi.mlb.com/api/v1/schedule?sportId=1&season={content['season']}&types=regular&date={content['gamedate']}&teamIds={content['team_id']}"
-    data = fetch_mlb_data(url)
-    
-    if data.get('totalGames', 0) > 0:
-        game_pk = data['dates'][0]['games'][0]['gamePk']
-        game_url = f"https://statsapi.mlb.com/api/v1/schedule?sportId=1&season={content['season']}&types=regular&date={content['gamedate']}&gamePk={game_pk}&hydrate=game(content(highlights(highlights)))"
-        game_data = fetch_mlb_data(game_url)
-        
-        if 'dates' in game_data and game_data['dates']:
-            game = game_data['dates'][0]['games'][0]
-            output = {
-                "game_date": game['gameDate'],
-                "status": game['status']['detailedState'],
-                "teams": {
-                    "away": {
-                        "name": game['teams']['away']['team']['name'],
-                        "score": game['teams']['away']['score']
-                    },
-                    "home": {
-                        "name": game['teams']['home']['team']['name'],
-                        "score": game['teams']['home']['score']
-                    }
-                },
-                "highlights": []
-            }
-            
-            if 'content' in game and 'highlights' in game['content']:
-                for highlight in game['content']['highlights']['highlights']['items']:
-                    highlight_data = {
-                        "title": highlight['headline'],
-                        "video_url": next((p['url'] for p in highlight['playbacks'] if p['name'] == 'mp4Avc'), None)
-                    }
-                    output['highlights'].append(highlight_data)
-            
-            return output
-    
-    return {"error": "No game data found"}
+def function_response_part(function_name, function_params, api_response):
+    # The browser gets the full response, the model only the projected fields
+    model_payload = project_response(function_name, api_response, function_params.get('verbose'))
+    return Part.from_function_response(
+        name=function_name,
+        response={"content": json.dumps(model_payload, separators=(",", ":"))},
+    )
 
-def get_mlb_clutch_moments_from_api(content):
-    url = f"https://statsapi.mlb.com/api/v1/schedule?sportId=1&season={content['season']}&types=regular&date={content['gamedate']}&teamIds={content['team_id']}"
-    return fetch_mlb_data(url)
+def replay_cached_turn(chat, function_name, function_params, cached):
+    """
+    Record a cached answer in the chat history as if the tool had run,
+    so follow-up questions see the same conversation
+    """
+    chat.history.append(Content(role="user", parts=[function_response_part(function_name, function_params, cached["api_response"])]))
+    chat.history.append(Content(role="model", parts=[Part.from_text(cached["summary"])]))
 
+def summary_text(text):
+    return text.replace("'\'", "").replace('``````', "")
 
-def get_standings_from_api(content):
-    url = f"https://statsapi.mlb.com/api/v1/standings?leagueId={content['leagueId']}&season={content['season']}"
-    return fetch_mlb_data(url)
+class ChatTurn:
+    """
+    Bookkeeping of one chat turn's function-calling loop, shared by the Flask
+    routes here and the ASGI routes in asgi.py, which only differ in how they
+    call the model and the tools: the response cache lookup and replay, the
+    answer written to the cache, and dropping a turn that did not finish.
+    """
 
-def get_current_play_from_api(content):
+    def __init__(self, session):
+        self.session = session
+        self.chat = session.chat
+        session.trim_history()
+        self.history_length = len(self.chat.history)
+        session.queries += 1
+        self.api_response = {}
+        self.last_call = None
+        self.completed = False
+
+    def wants_tool(self, function_call):
+        return bool(function_call) and function_call.name in api_function_map
+
+    def replay(self, function_call):
+        """
+        The cached answer to function_call, recorded in the chat history, or
+        None. Starts the tool timer on a miss.
+        """
+        args = dict(function_call.args)
+        self.cache_key = response_cache.key(function_call.name, args)
+        cached = response_cache.get(self.cache_key)
+        if cached is not None:
+            replay_cached_turn(self.chat, function_call.name, args, cached)
+            # The answer is already cached, whatever ran before it in this turn
+            self.api_response, self.last_call = cached["api_response"], None
+        self.tool_started = time.perf_counter()
+        return cached
+
+    def tool_ms(self):
+        return (time.perf_counter() - self.tool_started) * 1000
+
+    def respond(self, function_name, function_params, api_response):
+        """
+        Record a tool's response and return the part that sends it to the model
+        """
+        self.api_response = api_response
+        self.last_call = (self.cache_key, function_name, function_params, self.tool_started)
+        return function_response_part(function_name, function_params, api_response)
+
+    def finish(self, summary):
+        """
+        Cache the answer when the last model reply followed a tool call
+        """
+        if self.last_call is not None:
+            cache_key, function_name, function_params, tool_started = self.last_call
+            response_cache.put(cache_key, function_name, function_params, self.api_response, summary,
+                               (time.perf_counter() - tool_started) * 1000)
+        self.completed = True
+
+    def close(self):
+        if not self.completed:
+            # Drop the half-finished turn, also when the client went away mid-turn,
+            # so the next query does not follow an unanswered function call
+            del self.chat.history[self.history_length:]
+
+# Every browser session gets its own chat, so histories are not shared between users
+chat_sessions = ChatSessionManager(lambda: get_gemini_model().start_chat())
+
+# Answers keyed on the resolved tool call, shared by all sessions
+response_cache = ResponseCache()
 
-    url = f"https://statsapi.mlb.com/api/v1/schedule?sportId=1&season={content['season']}&types=regular&date={content['gamedate']}&teamIds={content['team_id']}"
+@app.route('/generate', methods=['GET'])
+def process_mlb_query():
+    user_query = request.args.get('query')
+    if not user_query:
+        return jsonify({"error": "No query provided"}), 400
 
-    data = fetch_mlb_data(url)
-    
-    if data.get('totalGames', 0) > 0:
-        game_pk = data['dates'][0]['games'][0]['gamePk']
+    session = chat_sessions.get(request.args.get('session_id') or request.headers.get('X-Session-Id'))
+    logger.info(f"Received query for session {session.session_id}: {user_query}")
+    enhanced_query = user_query + "\nProvide the API response in concise, high-level summary."
 
-    gameurl = f"https://statsapi.mlb.com/api/v1.1/game/{game_pk}/feed/live"
+    with session.lock:
+        response, status = run_chat_turn(session, enhanced_query)
+    response.headers['X-Session-Id'] = session.session_id
+    return response, status
 
-    gamedata = fetch_mlb_data(gameurl)
+def run_chat_turn(session, enhanced_query):
+    turn = ChatTurn(session)
+    try:
+        model_response = session.chat.send_message(enhanced_query)
+        cached = None
+        while True:
+            function_call = model_response.candidates[0].content.parts[0].function_call
+            if not turn.wants_tool(function_call):
+                break
+            cached = turn.replay(function_call)
+            if cached is not None:
+                break
+            model_response = session.chat.send_message(turn.respond(*call_api_function(function_call)))
 
-    currentplay = gamedata['liveData']['plays']['currentPlay']
+        summary = cached["summary"] if cached is not None else summary_text(model_response.text)
+        turn.finish(summary)
+        return jsonify({**turn.api_response, "summary": summary, "session_id": session.session_id}), 200
 
-    return currentplay
+    except Exception as e:
+        logger.error(f"Error processing query: {str(e)}")
+        return jsonify({"error": "An error occurred while processing the query", "session_id": session.session_id}), 500
+    finally:
+        turn.close()
 
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'), default=str)}\n\n"
 
-api_function_map = {
-    "get_mlb_leagues": get_mlb_leagues_from_api,
-    "get_mlb_seasons": get_mlb_seasons_from_api,
-    "get_mlb_teams": get_mlb_teams_from_api,
-    "get_mlb_teams_by_season": get_mlb_teams_by_season_from_api,
-    "get_roster": get_roster_from_api,
-    "get_find_game": get_find_game_from_api,
-    "get_current_play":get_current_play_from_api,
-}
+def stream_chat_turn(session, enhanced_query):
+    """
+    Run one chat turn as Server-Sent Events: tool_start and tool_end around
+    every function call, summary events as the answer is generated, then done
+    """
+    started = time.perf_counter()
 
-gemini_model = GenerativeModel(
-    "gemini-2.0-flash-exp",
-    generation_config=GenerationConfig(temperature=0),
-    tools=[mlb_insights_tool],
-)
+    def elapsed_ms():
+        return round((time.perf_counter() - started) * 1000, 1)
 
-chat = gemini_model.start_chat()
+    with session.lock:
+        turn = ChatTurn(session)
+        yield sse_event("session", {"session_id": session.session_id, "elapsed_ms": elapsed_ms()})
 
-@app.route('/generate', methods=['GET'])
-def process_mlb_query():
+        try:
+            message = enhanced_query
+            summary = []
+            while True:
+                function_call = None
+                for chunk in session.chat.send_message(message, stream=True):
+                    part = chunk.candidates[0].content.parts[0]
+                    if part.function_call:
+                        function_call = part.function_call
+                    elif "text" in part.to_dict():
+                        text = summary_text(part.text)
+                        summary.append(text)
+                        yield sse_event("summary", {"text": text, "elapsed_ms": elapsed_ms()})
+
+                if not turn.wants_tool(function_call):
+                    break
+
+                yield sse_event("tool_start", {"name": function_call.name, "args": dict(function_call.args), "elapsed_ms": elapsed_ms()})
+                cached = turn.replay(function_call)
+                if cached is not None:
+                    yield sse_event("tool_end", {"name": function_call.name, "result": cached["api_response"],
+                                                 "cached": True, "tool_ms": 0.0, "elapsed_ms": elapsed_ms()})
+                    yield sse_event("summary", {"text": cached["summary"], "cached": True, "elapsed_ms": elapsed_ms()})
+                    break
+
+                function_name, function_params, api_response = call_api_function(function_call)
+                summary = []
+                yield sse_event("tool_end", {
+                    "name": function_name,
+                    "result": api_response,
+                    "tool_ms": round(turn.tool_ms(), 1),
+                    "elapsed_ms": elapsed_ms(),
+                })
+                message = turn.respond(function_name, function_params, api_response)
+
+            turn.finish("".join(summary))
+            yield sse_event("done", {"session_id": session.session_id, "elapsed_ms": elapsed_ms()})
+        except Exception as e:
+            logger.error(f"Error streaming query: {str(e)}")
+            yield sse_event("error", {"error": "An error occurred while processing the query", "elapsed_ms": elapsed_ms()})
+        finally:
+            turn.close()
+
+@app.route('/generateStream', methods=['GET'])
+def stream_mlb_query():
     user_query = request.args.get('query')
     if not user_query:
         return jsonify({"error": "No query provided"}), 400
 
-    logger.info(f"Received query: {user_query}")
+    session = chat_sessions.get(request.args.get('session_id') or request.headers.get('X-Session-Id'))
+    logger.info(f"Received streaming query for session {session.session_id}: {user_query}")
     enhanced_query = user_query + "\nProvide the API response in concise, high-level summary."
 
-    try:
-        model_response = chat.send_message(enhanced_query)
-        
-        function_call_in_progress = True
-        while function_call_in_progress:
-            function_call = model_response.candidates[0].content.parts[0].function_call
-            print(function_call)
-            if function_call and function_call.name in api_function_map:
-                function_name = function_call.name
-                function_params = {key: value for key, value in function_call.args.items()}
-                
-                logger.info(f"Calling function: {function_name}")
-                api_response = api_function_map[function_name](function_params)
-                
-                model_response = chat.send_message(
-                    Part.from_function_response(
-                        name=function_name,
-                        response={"content": json.dumps(api_response)},
-                    ),
-                )
-            else:
-                function_call_in_progress = False
-
-        summary = model_response.text.replace("'\'", "").replace('``````', "")
-        
-        combined_response = {
-            **api_response,
-            "summary": summary
-        }
-        
-        return jsonify(combined_response)
-    
-    except Exception as e:
-        logger.error(f"Error processing query: {str(e)}")
-        return jsonify({"error": "An error occurred while processing the query"}), 500
+    return Response(
+        stream_with_context(stream_chat_turn(session, enhanced_query)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Session-Id": session.session_id},
+    )
+
+@app.route('/metrics', methods=['GET'])
+def metrics_snapshot():
+    return jsonify({**metrics(), "chat_sessions": chat_sessions.stats(), "response_cache": response_cache.stats()})
 
 if __name__ == '__main__':
-    app.run(debug=True, host="0.0.0.0", port=int(os.environ.get("PORT", 8080)))
+    app.run(debug=True, host="0.0.0.0", port=int(os.environ.get("PORT", 8080)), threaded=True)
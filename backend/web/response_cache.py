@@ -0,0 +1,105 @@
+import json
+import os
+import re
+import threading
+from datetime import datetime
+
+from mlbdata.cache import DAY, HOUR, MINUTE, TTLCache
+from mlbdata.schedule import normalize_date
+
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get("GENERATE_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+
+# Parameters that do not change the data a tool returns
+IGNORED_PARAMS = ("verbose",)
+
+
+def _game_ttl(api_response):
+    # A finished game's details no longer change, a scheduled or live one does
+    return DAY if str(api_response.get("status", "")).startswith(("Final", "Game Over")) else 30
+
+
+def _season_scan_ttl(api_response):
+    # A scan still running only has a partial ranking, so it is not cached
+    return 0 if api_response.get("summary", {}).get("status") == "running" else HOUR
+
+
+# How long a /generate answer stays valid, by the volatility of its tool's data.
+# Keys are the tool names in web/main.py's api_function_map, which checks them
+# at import. Tools that only resolve ids (teams, leagues) are left out: a
+# question that starts with them usually goes on to call another tool.
+TOOL_TTLS = {
+    "get_mlb_seasons": lambda response: DAY,
+    "get_roster": lambda response: HOUR,
+    "get_standings": lambda response: 5 * MINUTE,
+    "get_find_game": _game_ttl,
+    "get_season_clutch_moments": _season_scan_ttl,
+}
+
+# Live tools whose answer is stale by the next pitch, never cached
+NEVER_CACHE = frozenset({"get_current_play"})
+
+_INTEGER = re.compile(r"-?\d+(\.0+)?")
+
+
+def normalize_params(params):
+    """
+    Canonical form of tool arguments: trimmed lower-case strings, dates as
+    YYYY-MM-DD, whole numbers without a fraction, empty values dropped
+    """
+    normalized = {}
+    for key, value in params.items():
+        if key in IGNORED_PARAMS or value is None or str(value).strip() == "":
+            continue
+        text = str(value).strip().lower()
+        if "date" in key:
+            text = normalize_date(text) or text
+        elif _INTEGER.fullmatch(text):
+            text = str(int(float(text)))
+        normalized[key] = text
+    return normalized
+
+
+class ResponseCache:
+    """
+    Final /generate payloads (tool result and summary) keyed on the tool call
+    the model resolved a question to, so rephrasings of the same question
+    skip the tool and the summary round-trip.
+    """
+
+    def __init__(self, max_bytes=RESPONSE_CACHE_MAX_BYTES):
+        self.cache = TTLCache(max_bytes)
+        self._lock = threading.Lock()
+        self.saved_ms = 0.0
+
+    def key(self, function_name, params):
+        if function_name in NEVER_CACHE or function_name not in TOOL_TTLS:
+            return None
+        return json.dumps([function_name, sorted(normalize_params(params).items())])
+
+    def get(self, key):
+        if key is None:
+            return None
+        entry = self.cache.get(key)
+        if entry is not None:
+            with self._lock:
+                self.saved_ms += entry["turn_ms"]
+        return entry
+
+    def put(self, key, function_name, params, api_response, summary, turn_ms):
+        """
+        Cache a finished turn. turn_ms is the time from the tool call to the
+        end of the summary, which a later hit saves.
+        """
+        if key is None or not isinstance(api_response, dict) or "error" in api_response:
+            return
+        ttl = TOOL_TTLS[function_name](api_response)
+        if ttl <= 0:
+            return
+        season = normalize_params(params).get("season", "")
+        if season.isdigit() and int(season) < datetime.now().year:
+            ttl = max(ttl, DAY)
+        entry = {"api_response": api_response, "summary": summary, "turn_ms": turn_ms}
+        self.cache.set(key, entry, ttl, size=len(json.dumps(entry, default=str)))
+
+    def stats(self):
+        return {**self.cache.stats(), "latency_saved_ms": round(self.saved_ms, 1)}
@@ -0,0 +1,98 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+MAX_SESSIONS = int(os.environ.get("CHAT_MAX_SESSIONS", 1000))
+SESSION_IDLE_SECONDS = float(os.environ.get("CHAT_SESSION_IDLE_SECONDS", 30 * 60))
+MAX_HISTORY_TURNS = int(os.environ.get("CHAT_MAX_HISTORY_TURNS", 8))
+
+
+def _is_user_query(content):
+    """
+    True for a user turn that carries the query itself, not a function response
+    """
+    return content.role == "user" and all("function_response" not in part.to_dict() for part in content.parts)
+
+
+class ChatSession:
+    def __init__(self, session_id, chat):
+        self.session_id = session_id
+        self.chat = chat
+        self.lock = threading.Lock()
+        # Created by the ASGI app on its event loop, see asgi.session_lock
+        self.async_lock = None
+        self.last_used = time.monotonic()
+        self.queries = 0
+
+    def trim_history(self, max_turns=MAX_HISTORY_TURNS):
+        """
+        Keep the last max_turns queries with their function calls and answers.
+        History is only cut at the start of a query so call/response pairs stay together.
+        """
+        history = self.chat.history
+        starts = [i for i, content in enumerate(history) if _is_user_query(content)]
+        if len(starts) > max_turns:
+            del history[:starts[-max_turns]]
+
+
+class ChatSessionManager:
+    """
+    One Gemini chat per client session. Sessions idle for longer than
+    SESSION_IDLE_SECONDS are evicted, as are the least recently used ones
+    beyond MAX_SESSIONS. Each session has its own lock, so different
+    sessions are served in parallel while a session's turns stay ordered.
+    """
+
+    def __init__(self, start_chat, max_sessions=MAX_SESSIONS, idle_seconds=SESSION_IDLE_SECONDS):
+        self.start_chat = start_chat
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted = 0
+
+    def _evict(self, now):
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and now - session.last_used <= self.idle_seconds:
+                break
+            del self._sessions[session_id]
+            self.evicted += 1
+
+    def get(self, session_id=None):
+        """
+        Return the session for an id, starting a new one (with a fresh id
+        when none was given) if it is unknown or was evicted
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            session = self._sessions.get(session_id) if session_id else None
+            if session is None:
+                session_id = session_id or uuid.uuid4().hex
+                session = self._sessions[session_id] = ChatSession(session_id, self.start_chat())
+                self.created += 1
+                self._evict(now)
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_used = now
+            return session
+
+    def stats(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return {
+            "active": len(sessions),
+            "busy": sum(1 for s in sessions if s.lock.locked() or (s.async_lock is not None and s.async_lock.locked())),
+            "created": self.created,
+            "evicted": self.evicted,
+            "max_sessions": self.max_sessions,
+            "idle_seconds": self.idle_seconds,
+            "max_history_turns": MAX_HISTORY_TURNS,
+        }
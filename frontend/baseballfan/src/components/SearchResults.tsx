@@ -13,7 +13,8 @@ const SearchResults: React.FC<SearchResultsProps> = ({ results, isLoading }) =>
   const [popupState, setPopupState] = useState({
     isOpen: false,
     summary: '',
-    title: ''
+    title: '',
+    loading: false
   });
   if (isLoading) {
     return (
@@ -24,17 +25,29 @@ const SearchResults: React.FC<SearchResultsProps> = ({ results, isLoading }) =>
   }
 
   const handleSummarizeVideo = async (videoUrl: string | number | boolean, title: any) => {
+    setPopupState({ isOpen: true, summary: '', title: title, loading: true });
     try {
-      const response = await fetch(`{hostname}/generateVideoSummary?query=${encodeURIComponent(videoUrl)}`);
+      // Summaries run as background jobs: submit one, then wait on it until it finishes
+      const response = await fetch(`{hostname}/summaryJobs?query=${encodeURIComponent(videoUrl)}`, { method: 'POST' });
       if (!response.ok) {
-        throw new Error('Failed to fetch summary');
+        throw new Error('Failed to submit summary');
+      }
+      let job = await response.json();
+      while (job.status === 'queued' || job.status === 'running') {
+        const poll = await fetch(`{hostname}/summaryJobs/${job.job_id}?wait=20`);
+        if (!poll.ok) {
+          throw new Error('Failed to fetch summary');
+        }
+        job = await poll.json();
+      }
+      if (job.status !== 'done') {
+        throw new Error(job.error || 'Failed to fetch summary');
       }
-      const data = await response.json();
 
-      setPopupState({ isOpen: true, summary: data.summary, title: title });
+      setPopupState({ isOpen: true, summary: job.summary, title: title, loading: false });
     } catch (error) {
       console.error('Error summarizing video:', error);
-      setPopupState({ isOpen: true, summary: 'Failed to summarize video.', title: title });
+      setPopupState({ isOpen: true, summary: 'Failed to summarize video.', title: title, loading: false });
     }
   };
 
@@ -102,6 +115,7 @@ const SearchResults: React.FC<SearchResultsProps> = ({ results, isLoading }) =>
                     isOpen={popupState.isOpen}
                     summary={popupState.summary}
                     title={popupState.title}
+                    loading={popupState.loading}
                     onClose={() => setPopupState({ ...popupState, isOpen: false })}
                   />
                 </CardContent>
@@ -316,6 +330,18 @@ const SearchResults: React.FC<SearchResultsProps> = ({ results, isLoading }) =>
       </Card>
     );
   }
+  else if (results.summary) {
+    // Summary only, or a streamed answer whose tool results have not arrived yet
+    return (
+      <Card>
+        <CardContent>
+          <Typography variant="body2" color="text.secondary" paragraph>
+            {results.summary}
+          </Typography>
+        </CardContent>
+      </Card>
+    );
+  }
   return null;
 };
 
@@ -1,18 +1,25 @@
 import React from 'react';
-import { Dialog, DialogTitle, DialogContent, DialogActions, Button, Typography } from '@mui/material';
+import { Dialog, DialogTitle, DialogContent, DialogActions, Button, Typography, CircularProgress, Box } from '@mui/material';
 
 interface SummaryPopupProps {
     isOpen: boolean;
     summary: string;
     title: string;
+    loading?: boolean;
     onClose: () => void;
   }
-  const SummaryPopup: React.FC<SummaryPopupProps> = ({ isOpen, summary, title, onClose }) => {
+  const SummaryPopup: React.FC<SummaryPopupProps> = ({ isOpen, summary, title, loading, onClose }) => {
     return (
       <Dialog open={isOpen} onClose={onClose}>
         <DialogTitle>{title}</DialogTitle>
         <DialogContent>
-          <Typography>{summary}</Typography>
+          {loading ? (
+            <Box sx={{ display: 'flex', justifyContent: 'center', p: 2 }}>
+              <CircularProgress />
+            </Box>
+          ) : (
+            <Typography>{summary}</Typography>
+          )}
         </DialogContent>
         <DialogActions>
           <Button onClick={onClose}>Close</Button>
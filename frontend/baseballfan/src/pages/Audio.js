@@ -37,6 +37,12 @@ const theme = createTheme({
 
 const WS_URL = "";
 
+// Binary media frames (see backend/audio/frames.py): a 4-byte header of kind,
+// version and little-endian sequence number, then the raw payload
+const FRAME_HEADER_BYTES = 4;
+const FRAME_VERSION = 1;
+const FRAME_KIND_PCM = 1;
+
 const Audio = ({}) => {
   const [isRecording, setIsRecording] = useState(false);
   const [wsStatus, setWsStatus] = useState('disconnected');
@@ -49,6 +55,8 @@ const Audio = ({}) => {
   const intervalRef = useRef(null);
   const audioInputContextRef = useRef(null);
   const workletNodeRef = useRef(null);
+  const binaryFramesRef = useRef(false);
+  const frameSequenceRef = useRef(0);
   const [seasonData, setSeasonData] = useState(null);
   const [leagueData, setLeagueData] = useState(null);
   const [rosterData, setRosterData] = useState(null);
@@ -81,6 +89,8 @@ const Audio = ({}) => {
   const initializeWebSocket = () => {
     console.log("Connecting to WebSocket:", WS_URL);
     const ws = new WebSocket(WS_URL);
+    ws.binaryType = "arraybuffer";
+    binaryFramesRef.current = false;
 
     ws.onclose = (event) => {
       console.log("WebSocket closed:", event);
@@ -109,16 +119,30 @@ const Audio = ({}) => {
     console.log("Sending setup message");
     const setupMessage = {
       setup: { generation_config: { response_modalities: ["AUDIO"] } },
+      binary: true,
     };
     ws.send(JSON.stringify(setupMessage));
   };
 
-  const sendAudioMessage = (b64PCM) => {
+  const sendAudioMessage = (pcmBuffer) => {
     if (!webSocketRef.current || webSocketRef.current.readyState !== WebSocket.OPEN) {
       console.log("WebSocket not ready");
       return;
     }
 
+    if (binaryFramesRef.current) {
+      const frame = new Uint8Array(FRAME_HEADER_BYTES + pcmBuffer.byteLength);
+      const header = new DataView(frame.buffer);
+      header.setUint8(0, FRAME_KIND_PCM);
+      header.setUint8(1, FRAME_VERSION);
+      header.setUint16(2, frameSequenceRef.current, true);
+      frameSequenceRef.current = (frameSequenceRef.current + 1) & 0xffff;
+      frame.set(new Uint8Array(pcmBuffer), FRAME_HEADER_BYTES);
+      webSocketRef.current.send(frame.buffer);
+      return;
+    }
+
+    const b64PCM = btoa(String.fromCharCode.apply(null, new Uint8Array(pcmBuffer)));
     const payload = {
       realtime_input: {
         media_chunks: [
@@ -132,7 +156,21 @@ const Audio = ({}) => {
   };
 
   const handleIncomingMessage = (event) => {
+    if (event.data instanceof ArrayBuffer) {
+      if (event.data.byteLength < FRAME_HEADER_BYTES) return;
+      const header = new DataView(event.data, 0, FRAME_HEADER_BYTES);
+      if (header.getUint8(0) === FRAME_KIND_PCM && header.getUint8(1) === FRAME_VERSION) {
+        processAudioResponse(event.data.slice(FRAME_HEADER_BYTES));
+      }
+      return;
+    }
+
     const messageData = JSON.parse(event.data);
+    // The server accepted binary frames, send the microphone audio that way too
+    if (messageData.protocol) {
+      binaryFramesRef.current = messageData.protocol.binary === true && messageData.protocol.version === FRAME_VERSION;
+      return;
+    }
     const response = new Response(messageData);
 
     if (response.text) {
@@ -217,6 +255,10 @@ const Audio = ({}) => {
     if (response.audioData) {
       processAudioResponse(response.audioData);
     }
+    // Plays pushed by the server while subscribed to a live game
+    if (messageData.live_play && messageData.live_play.current_play) {
+      setCurrentPlayData(messageData.live_play.current_play);
+    }
   };
 
 
@@ -229,7 +271,8 @@ const Audio = ({}) => {
     workletNodeRef.current.connect(audioInputContextRef.current.destination);
   };
 
-  const processAudioResponse = async (base64AudioChunk) => {
+  // audioChunk is raw PCM16 from a binary frame or base64 text from a JSON one
+  const processAudioResponse = async (audioChunk) => {
     try {
       if (!audioInputContextRef.current) {
         await initAudioContext();
@@ -239,14 +282,9 @@ const Audio = ({}) => {
         await audioInputContextRef.current.resume();
       }
 
-      const arrayBuffer = base64ToArrayBuffer(base64AudioChunk);
-      const float32Data = convertPCM16LEToFloat32(arrayBuffer);
-      workletNodeRef.current.port.postMessage(float32Data);
-
-      const bufferSource = audioInputContextRef.current.createBufferSource();
-      const audioBuffer = audioInputContextRef.current.createBuffer(1, float32Data.length, 24000);
-      audioBuffer.getChannelData(0).set(float32Data);
-      bufferSource.buffer = audioBuffer;
+      const arrayBuffer = typeof audioChunk === "string" ? base64ToArrayBuffer(audioChunk) : audioChunk;
+      // The worklet converts PCM16 to float on the audio thread; the buffer is transferred, not copied
+      workletNodeRef.current.port.postMessage(arrayBuffer, [arrayBuffer]);
 
     } catch (error) {
       console.error("Error processing audio chunk:", error);
@@ -259,8 +297,7 @@ const Audio = ({}) => {
     pcmDataRef.current.forEach((value, index) => {
       view.setInt16(index * 2, value, true);
     });
-    const base64 = btoa(String.fromCharCode.apply(null, new Uint8Array(buffer)));
-    sendAudioMessage(base64);
+    sendAudioMessage(buffer);
     pcmDataRef.current = [];
   };
 
@@ -665,14 +702,5 @@ function base64ToArrayBuffer(base64) {
   return bytes.buffer;
 }
 
-function convertPCM16LEToFloat32(pcmData) {
-  const inputArray = new Int16Array(pcmData);
-  const float32Array = new Float32Array(inputArray.length);
-  for (let i = 0; i < inputArray.length; i++) {
-    float32Array[i] = inputArray[i] / 32768;
-  }
-  return float32Array;
-}
-
 export default Audio;
 
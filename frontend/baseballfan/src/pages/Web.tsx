@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useRef, useState } from 'react';
 import { Container, Typography, Box, CircularProgress } from '@mui/material';
 import SearchBar from '../components/SearchBar';
 import SearchResults from '../components/SearchResults';
@@ -9,14 +9,26 @@ const Web: React.FC = () => {
   const [searchResults, setSearchResults] = useState<any>(null);
 
   const [isLoading, setIsLoading] = useState(false);
+
+  // The backend keeps one chat per session, so follow-up questions keep their context
+  const sessionId = useRef<string | null>(sessionStorage.getItem('mlbSessionId'));
   
-  const handleSearch = async (query: string) => {
-    setIsLoading(true);
+  const eventSource = useRef<EventSource | null>(null);
+
+  const rememberSession = (id?: string) => {
+    if (id) {
+      sessionId.current = id;
+      sessionStorage.setItem('mlbSessionId', id);
+    }
+  };
+
+  // Fallback for browsers without EventSource: one JSON response at the end
+  const fetchSearch = async (url: string) => {
     try {
-      const response = await fetch(`https://{host}/generate?query=${encodeURIComponent(query)}`);
+      const response = await fetch(url);
       const data = await response.json();
+      rememberSession(data.session_id);
       setSearchResults(data);
-
     } catch (error) {
       console.error('Error fetching search results:', error);
     } finally {
@@ -24,6 +36,62 @@ const Web: React.FC = () => {
     }
   };
 
+  const handleSearch = async (query: string) => {
+    setIsLoading(true);
+    setSearchResults(null);
+    eventSource.current?.close();
+
+    const sessionParam = sessionId.current ? `&session_id=${encodeURIComponent(sessionId.current)}` : '';
+    const params = `query=${encodeURIComponent(query)}${sessionParam}`;
+    if (typeof EventSource === 'undefined') {
+      await fetchSearch(`https://{host}/generate?${params}`);
+      return;
+    }
+
+    // Tool results are rendered as soon as they arrive, the summary fills in token by token
+    const started = performance.now();
+    let firstRender: number | null = null;
+    const rendered = () => {
+      if (firstRender === null) {
+        firstRender = performance.now() - started;
+        console.debug(`First render after ${firstRender.toFixed(0)} ms`);
+      }
+      setIsLoading(false);
+    };
+
+    const source = new EventSource(`https://{host}/generateStream?${params}`);
+    eventSource.current = source;
+    source.addEventListener('session', (event) => {
+      const data = JSON.parse((event as MessageEvent).data);
+      console.debug(`First byte after ${(performance.now() - started).toFixed(0)} ms`);
+      rememberSession(data.session_id);
+    });
+    source.addEventListener('tool_end', (event) => {
+      const data = JSON.parse((event as MessageEvent).data);
+      setSearchResults((previous: any) => ({ ...data.result, summary: previous?.summary ?? '' }));
+      rendered();
+    });
+    source.addEventListener('summary', (event) => {
+      const data = JSON.parse((event as MessageEvent).data);
+      setSearchResults((previous: any) => ({ ...previous, summary: (previous?.summary ?? '') + data.text }));
+      rendered();
+    });
+    source.addEventListener('done', (event) => {
+      const data = JSON.parse((event as MessageEvent).data);
+      console.debug(`Stream done after ${(performance.now() - started).toFixed(0)} ms (server ${data.elapsed_ms} ms)`);
+      source.close();
+      setIsLoading(false);
+    });
+    // Server side failures arrive as an "error" event with data, dropped connections without;
+    // either way the stream is closed so EventSource does not reconnect and resend the query
+    source.addEventListener('error', (event) => {
+      const data = (event as MessageEvent).data;
+      console.error('Error streaming search results:', data ? JSON.parse(data).error : event);
+      source.close();
+      setIsLoading(false);
+    });
+  };
+
   return (
     <>
       <Header/>
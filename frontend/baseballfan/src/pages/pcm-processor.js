@@ -1,15 +1,37 @@
+function pcm16ToFloat32(buffer) {
+    const samples = new Int16Array(buffer);
+    const float32 = new Float32Array(samples.length);
+    for (let i = 0; i < samples.length; i++) {
+        float32[i] = samples[i] / 32768;
+    }
+    return float32;
+}
+
+// Jitter buffer: playback starts once PREBUFFER_SECONDS of audio are queued, and
+// again after an underrun, so uneven chunk arrival does not cause clicks. Gemini
+// sends audio faster than real time, so only beyond MAX_BUFFER_SECONDS is the
+// oldest audio dropped, to bound memory when the tab cannot keep up
+const PREBUFFER_SECONDS = 0.1;
+const MAX_BUFFER_SECONDS = 30;
+
 class PCMProcessor extends AudioWorkletProcessor {
     constructor() {
         super();
-        this.buffer = new Float32Array();
-
+        this.chunks = [];
+        this.offset = 0;
+        this.buffered = 0;
+        this.playing = false;
         // Correct way to handle messages in AudioWorklet
         this.port.onmessage = (e) => {
-            const newData = e.data;
-            const newBuffer = new Float32Array(this.buffer.length + newData.length);
-            newBuffer.set(this.buffer);
-            newBuffer.set(newData, this.buffer.length);
-            this.buffer = newBuffer;
+            // Raw PCM16 little-endian from Audio.js, or samples already converted to float
+            const newData = e.data instanceof ArrayBuffer ? pcm16ToFloat32(e.data) : e.data;
+            this.chunks.push(newData);
+            this.buffered += newData.length;
+
+            while (this.buffered > MAX_BUFFER_SECONDS * sampleRate && this.chunks.length > 1) {
+                this.buffered -= this.chunks.shift().length - this.offset;
+                this.offset = 0;
+            }
         };
     }
 
@@ -17,12 +39,31 @@ class PCMProcessor extends AudioWorkletProcessor {
         const output = outputs[0];
         const channelData = output[0];
 
-        if (this.buffer.length >= channelData.length) {
-            channelData.set(this.buffer.slice(0, channelData.length));
-            this.buffer = this.buffer.slice(channelData.length);
-            return true;
+        if (!this.playing) {
+            if (this.buffered < PREBUFFER_SECONDS * sampleRate) {
+                return true;
+            }
+            this.playing = true;
+        }
+
+        let written = 0;
+        while (written < channelData.length && this.chunks.length > 0) {
+            const chunk = this.chunks[0];
+            const count = Math.min(chunk.length - this.offset, channelData.length - written);
+            channelData.set(chunk.subarray(this.offset, this.offset + count), written);
+            written += count;
+            this.offset += count;
+            this.buffered -= count;
+            if (this.offset === chunk.length) {
+                this.chunks.shift();
+                this.offset = 0;
+            }
         }
 
+        // Underrun: wait for the buffer to refill before playing again
+        if (written < channelData.length) {
+            this.playing = false;
+        }
         return true;
     }
 }